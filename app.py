@@ -2,9 +2,13 @@
 import pandas as pd
 import sys
 import os
-from collections import Counter
+import io
+import hashlib
+import subprocess
+import time
+from collections import OrderedDict
+import numpy as np
 import plotly.express as px
-import re
 """Responsabilidad: Mostrar información y capturar interacciones del usuario."""
 
 # ========== CONFIGURACIÓN DE PATHS ==========
@@ -26,6 +30,11 @@ for path in sys.path[:6]:  # Mostrar solo los primeros 6
 try:
     from sentiment_service import SentimentService
     from dataset_analyzer import DatasetAnalyzer
+    from utils import load_reviews_data, save_results
+    from insight_aggregator import InsightAggregator
+    from domain.result_batch import ResultBatch
+    from job_queue import JobQueue, QUEUED, RUNNING, DONE, FAILED
+    from schema_sniffer import sniff_dataframe
     st.success("✅ Sistema de ANALISIS básico cargado correctamente")
 except ImportError as e:
     st.error(f"❌ Error cargando sistema básico: {e}")
@@ -43,28 +52,367 @@ except ImportError as e:
 
 # ... el resto del código permanece igual ...
 
-def extract_aspects_simple(text):
-    """Extraer palabras clave simples del texto - EN EL FRONTEND"""
-    if not text or not isinstance(text, str):
-        return []
+# Tamaños de lote de la inferencia progresiva (el ultimo se repite hasta terminar)
+STREAM_BATCH_SIZES = (16, 64, 256)
+MAX_CACHED_ANALYSES = 4
+# Cola de jobs de dataset completo (compartida con `python main.py worker`)
+JOBS_DIR = os.path.join(project_root, 'jobs')
+JOB_POLL_SECONDS = 2
+
+# Palabras que el dashboard descarta ademas de las stop words del servicio
+DASHBOARD_STOP_WORDS = frozenset({
+    'have', 'has', 'had', 'been', 'being', 'do', 'does', 'did', 'will', 'would', 'could',
+    'should', 'may', 'might', 'must', 'can', 'its', 'their', 'what', 'which',
+    'who', 'whom', 'whose', 'where', 'when', 'why', 'how'
+})
+
+def dashboard_aspects(aspects):
+    """Aspectos de un resultado sin las palabras que el dashboard tambien descarta"""
+    return [aspect for aspect in aspects if aspect not in DASHBOARD_STOP_WORDS]
+
+def top_aspects(counter, n):
+    """Aspectos mas frecuentes de un contador de InsightAggregator, con el filtro del dashboard"""
+    return [(aspect, count) for aspect, count in counter.most_common() if aspect not in DASHBOARD_STOP_WORDS][:n]
+
+def render_review_explorer(results, index):
+    """Explorar todas las reseñas analizadas por termino, categoria, estrellas e idioma"""
+    from domain.entities import BusinessCategory
+
+    st.header("🔎 Explorar Reseñas")
+    col1, col2 = st.columns(2)
+    with col1:
+        terms = st.text_input("**Términos** (todos deben aparecer; 'entreg*' busca por prefijo)", key="explorer_terms")
+        category = st.selectbox("**Categoría**", ["Todas"] + [c.value for c in BusinessCategory], key="explorer_category")
+    with col2:
+        min_stars, max_stars = st.slider("**Estrellas**", 1, 5, (1, 5), key="explorer_stars")
+        language = st.selectbox("**Idioma**", ["Todos"] + index.languages, key="explorer_language")
+    page = st.number_input("**Página**", min_value=1, value=1, key="explorer_page")
+
+    found = topic_service.drill_down(
+        results, index, terms=terms,
+        category=None if category == "Todas" else category,
+        # Rango completo: incluye tambien etiquetas fuera de la escala de estrellas
+        min_stars=None if min_stars == 1 else min_stars, max_stars=None if max_stars == 5 else max_stars,
+        language=None if language == "Todos" else language,
+        page=page - 1, page_size=10
+    )
+    st.write(f"**{found['total']} reseñas** coinciden (página {page} de {max(found['pages'], 1)})")
+    for row, result in zip(found['row_ids'], found['results']):
+        with st.expander(f"Fila {row}: {result['sentiment']} (confianza: {result.get('confidence', 0):.2f})"):
+            st.write(result['text'])
+
+def render_metrics(insights, chart_key):
+    """Metricas clave y grafico de distribucion (tambien parciales mientras avanza la inferencia)"""
+    st.subheader("📊 Metricas Clave")
+    col1, col2, col3, col4 = st.columns(4)
+
+    sentiment_counts = insights.distribution()
+    total = insights.analyzed_rows
+    positive = insights.positive
+    negative = insights.negative
+    neutral = total - positive - negative
+
+    with col1:
+        st.metric("👍 Positivos", f"{(positive/total)*100:.1f}%", f"{positive} textos")
+
+    with col2:
+        st.metric("👎 Negativos", f"{(negative/total)*100:.1f}%", f"{negative} textos")
+
+    with col3:
+        st.metric("⚖️ Neutrales", f"{(neutral/total)*100:.1f}%", f"{neutral} textos")
+
+    with col4:
+        avg_rating = insights.average_rating()
+        st.metric("⭐ Rating Promedio", f"{avg_rating:.1f}/5")
+    
+    # Grafico de distribucion
+    st.subheader("📊 distribucion de Sentimientos")
+    
+    # Preparar datos para el Grafico
+    sentiment_df = pd.DataFrame({
+        'Sentimiento': list(sentiment_counts.keys()),
+        'Cantidad': list(sentiment_counts.values())
+    })
     
-    try:
-        # Palabras comunes a excluir
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 
-                     'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'this', 
-                     'that', 'with', 'have', 'has', 'had', 'been', 'being', 'do',
-                     'does', 'did', 'will', 'would', 'could', 'should', 'may',
-                     'might', 'must', 'can', 'its', 'their', 'what', 'which',
-                     'who', 'whom', 'whose', 'where', 'when', 'why', 'how'}
-        
-        # Limpiar y extraer palabras
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
-        aspects = [word for word in words if word not in stop_words and len(word) > 2]
-        
-        return aspects[:5]  # Máximo 5 aspectos
-        
-    except Exception:
-        return []
+    fig = px.bar(
+        sentiment_df, 
+        x='Sentimiento', 
+        y='Cantidad',
+        color='Sentimiento',
+        title="distribucion de Sentimientos por Estrellas"
+    )
+    st.plotly_chart(fig, use_container_width=True, key=chart_key)
+
+def upload_digest(uploaded_file, file_bytes):
+    """sha256 del contenido, calculado una vez por subida (los reruns reutilizan el digest)"""
+    upload_id = getattr(uploaded_file, 'file_id', None) or getattr(uploaded_file, 'id', None)
+    if upload_id is None:
+        return hashlib.sha256(file_bytes).hexdigest()
+    upload = (upload_id, len(file_bytes))
+    digests = st.session_state.setdefault('upload_digests', {})
+    if upload not in digests:
+        # Solo interesa la subida actual
+        digests.clear()
+        digests[upload] = hashlib.sha256(file_bytes).hexdigest()
+    return digests[upload]
+
+def analysis_key(digest, text_column, sample_size, sentiment_service):
+    """Clave de cache: contenido del archivo (digest), columna, muestra y modelo"""
+    model_id = sentiment_service.registry.peek(sentiment_service.default_model).model_id
+    return (digest, text_column, sample_size, model_id)
+
+@st.cache_data(show_spinner=False)
+def load_uploaded_data(digest, _file_bytes, file_name):
+    """Leer el archivo subido una vez por contenido (los reruns reutilizan el DataFrame)
+
+    La cache usa el digest como clave: _file_bytes no se vuelve a hashear en cada rerun.
+    """
+    buffer = io.BytesIO(_file_bytes)
+    buffer.name = file_name
+    return load_reviews_data(buffer)
+
+def run_analysis(sentiment_service, texts):
+    """Inferencia por lotes crecientes con progreso y metricas parciales en vivo"""
+    progress = st.progress(0.0, text=f"🔍 Analizando {len(texts)} textos con BERT...")
+    live = st.empty()
+    insights = InsightAggregator()
+    batches = []
+    start = 0
+    while start < len(texts):
+        # El primer lote es pequeño para mostrar resultados enseguida; despues se agranda
+        size = STREAM_BATCH_SIZES[min(len(batches), len(STREAM_BATCH_SIZES) - 1)]
+        end = min(start + size, len(texts))
+        # features=True: idioma y claves para los temas y el indice invertido
+        batch = sentiment_service.analyze_result_batch(texts[start:end], row_indices=np.arange(start, end),
+                                                      source=texts, features=True)
+        batches.append(batch)
+        insights.update(batch)
+        progress.progress(end / len(texts), text=f"🔍 {end}/{len(texts)} textos analizados")
+        with live.container():
+            render_metrics(insights, chart_key=f"live_chart_{len(batches)}")
+        start = end
+
+    results = ResultBatch.concat(batches)
+    analysis = {'results': results, 'insights': insights, 'topics': [], 'index': None}
+    if topic_service:
+        progress.progress(1.0, text="🔍 Analizando temas y categorías...")
+        analysis['topics'] = topic_service.extract_topics_from_legacy(results)
+        analysis['index'] = topic_service.build_index(results)
+
+    # Resultados con columnas tipadas (estrellas int8, confianza float32, idioma, aspectos)
+    results_buffer = io.BytesIO()
+    save_results(results, results_buffer, file_format='parquet')
+    analysis['parquet'] = results_buffer.getvalue()
+
+    progress.empty()
+    live.empty()
+    return analysis
+
+def render_report(analysis):
+    """Reporte completo a partir de un analisis ya calculado (no vuelve a inferir)"""
+    results = analysis['results']
+    insights = analysis['insights']
+    topics = analysis['topics']
+
+    if topics:
+        st.subheader("🎯 Temas Detectados (Analisis Mejorado)")
+
+        for topic in topics[:5]:  # Mostrar solo top 5
+            with st.expander(f"📋 {topic['name'].title()} (Frecuencia: {topic['frequency']})"):
+                st.write(f"**Categoria:** {topic['category']}")
+                st.write(f"**Ratio Negativo:** {topic['negative_ratio']:.1%}")
+                st.write(f"**Idioma:** {topic['language']}")
+                st.write("**Ejemplos:**")
+                for example in topic['examples']:
+                    st.write(f"• {example}")
+
+    st.header("📈 Resultados del Analisis")
+    render_metrics(insights, chart_key="sentiment_chart")
+
+    positive_results = results.select(results.positive_mask())
+    negative_results = results.select(results.negative_mask())
+    positive = insights.positive
+    negative = insights.negative
+
+    st.download_button(
+        "💾 Descargar resultados (Parquet)",
+        data=analysis['parquet'],
+        file_name="resultados_sentimiento.parquet",
+        mime="application/octet-stream"
+    )
+    
+    # PROBLEMAS CRITICOS
+    st.subheader("🚨 Problemas CRITICOS Detectados")
+
+    if negative > 0:
+        top_issues = top_aspects(insights.negative_aspects, 8)
+
+        if top_issues:
+            st.info("**Temas más mencionados en reviews negativos:**")
+            for issue, count in top_issues:
+                st.write(f"• **{issue}** - mencionado en {count} quejas")
+        else:
+            st.warning("No se detectaron aspectos específicos en las reviews negativas")
+    else:
+        st.success("🎉 **Excelente!** No se detectaron reviews negativas en la muestra analizada")
+
+    # FORTALEZAS
+    st.subheader("💪 Fortalezas Detectadas")
+
+    if positive > 0:
+        top_strengths = top_aspects(insights.positive_aspects, 5)
+
+        if top_strengths:
+            st.info("**Temas más mencionados en reviews positivos:**")
+            for strength, count in top_strengths:
+                st.write(f"• **{strength}** - mencionado en {count} elogios")
+
+    # EJEMPLOS DETALLADOS
+    st.subheader("📝 Ejemplos de ANALISIS")
+
+    tab1, tab2, tab3 = st.tabs(["👍 Positivos", "👎 Negativos", "⚖️ Neutrales"])
+
+    with tab1:
+        positive_examples = positive_results[:5]
+        for i, example in enumerate(positive_examples, 1):
+            with st.expander(f"Ejemplo positivo {i}: {example['sentiment']} (confianza: {example.get('confidence', 0):.2f})"):
+                st.write(f"**Texto:** {example['text']}")
+                aspects = dashboard_aspects(example['aspects'])
+                if aspects:
+                    st.write(f"**Palabras clave:** {', '.join(aspects)}")
+
+    with tab2:
+        negative_examples = negative_results[:5]
+        for i, example in enumerate(negative_examples, 1):
+            with st.expander(f"Ejemplo negativo {i}: {example['sentiment']} (confianza: {example.get('confidence', 0):.2f})"):
+                st.write(f"**Texto:** {example['text']}")
+                aspects = dashboard_aspects(example['aspects'])
+                if aspects:
+                    st.write(f"**Palabras clave:** {', '.join(aspects)}")
+
+    with tab3:
+        neutral_examples = results.select(results.neutral_mask())[:5]
+        for i, example in enumerate(neutral_examples, 1):
+            with st.expander(f"Ejemplo neutral {i}: {example['sentiment']} (confianza: {example.get('confidence', 0):.2f})"):
+                st.write(f"**Texto:** {example['text']}")
+                aspects = dashboard_aspects(example['aspects'])
+                if aspects:
+                    st.write(f"**Palabras clave:** {', '.join(aspects)}")
+
+    # RECOMENDACIONES
+    st.subheader("💡 Recomendaciones Accionables")
+
+    if negative > 0:
+        top = top_aspects(insights.negative_aspects, 1)
+        if top:
+            top_issue, count = top[0]
+            st.warning(f"**Prioridad ALTA:** Abordar problemas relacionados con **{top_issue}**")
+            st.write(f"*Impacto potencial: Este tema aparece en {count} de {negative} reviews negativas*")
+
+    if positive > 0:
+        top = top_aspects(insights.positive_aspects, 1)
+        if top:
+            top_strength, count = top[0]
+            st.success(f"**Oportunidad:** Potenciar **{top_strength}** en estrategias de marketing")
+            st.write(f"*Este aspecto es mencionado en {count} reviews positivas*")
+
+    if analysis['index'] is not None:
+        render_review_explorer(results, analysis['index'])
+
+@st.cache_resource
+def get_job_queue():
+    return JobQueue(JOBS_DIR)
+
+@st.cache_resource
+def _worker_process():
+    # Contenedor del proceso worker lanzado desde el dashboard (uno por servidor de Streamlit)
+    return {'process': None}
+
+def ensure_worker(queue):
+    """Lanzar un worker local si no hay ninguno vivo (ni uno recien lanzado que aun no dio latido)"""
+    holder = _worker_process()
+    process = holder['process']
+    if queue.active_workers() or (process is not None and process.poll() is None):
+        return
+    holder['process'] = subprocess.Popen(
+        [sys.executable, os.path.join(project_root, 'main.py'), 'worker', '--jobs-dir', queue.root_dir],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+
+def render_background_job(file_bytes, file_name, text_column, total_rows):
+    """Enviar el dataset completo a la cola y seguir su progreso sin bloquear la sesion"""
+    queue = get_job_queue()
+    st.write(f"Se analizarán las **{total_rows} filas** en un worker local; puedes seguir usando el dashboard.")
+
+    if st.button("📨 **Enviar ANALISIS del dataset completo**", type="primary", use_container_width=True):
+        st.session_state['job_id'] = queue.submit_bytes(file_bytes, file_name, text_column=text_column,
+                                                        total_rows=total_rows)
+        ensure_worker(queue)
+
+    job_id = st.session_state.get('job_id')
+    job = queue.get(job_id) if job_id else None
+    if not job:
+        return
+
+    st.subheader(f"🗂️ Job `{job['id']}`")
+    progress = job['progress']
+    if job['status'] in (QUEUED, RUNNING):
+        ensure_worker(queue)
+        st.progress(progress.get('fraction', 0.0),
+                    text=f"{job['status']}: {progress.get('rows_done', 0)}/{total_rows} filas "
+                         f"({progress.get('rows_per_second', 0):.0f} filas/s)")
+        col1, col2 = st.columns(2)
+        with col1:
+            auto_refresh = st.checkbox("Actualizar automáticamente", value=True, key="job_auto_refresh")
+        with col2:
+            if st.button("⛔ Cancelar job"):
+                queue.cancel(job['id'])
+                st.rerun()
+        if auto_refresh:
+            time.sleep(JOB_POLL_SECONDS)
+            st.rerun()
+    elif job['status'] == DONE:
+        render_job_report(queue.report(job['id']))
+    elif job['status'] == FAILED:
+        st.error(f"❌ El job falló: {job['error']}")
+    else:
+        st.warning("⛔ Job cancelado")
+
+def render_job_report(report):
+    """Resultados agregados de un job terminado (report.json de DatasetJob)"""
+    insights = report['insights']
+    st.header("📈 Resultados del Dataset Completo")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("📄 Filas analizadas", f"{report['analyzed_rows']}", f"de {report['rows']}")
+    with col2:
+        st.metric("👍 Positivos", f"{insights['positive_percentage']:.1f}%")
+    with col3:
+        st.metric("👎 Negativos", f"{insights['negative_percentage']:.1f}%")
+    with col4:
+        st.metric("⭐ Rating Promedio", f"{report['average_rating']:.1f}/5")
+
+    distribution = report['bert_distribution']
+    fig = px.bar(
+        pd.DataFrame({'Estrellas': list(distribution.keys()), 'Cantidad': list(distribution.values())}),
+        x='Estrellas',
+        y='Cantidad',
+        title="distribucion de Sentimientos por Estrellas"
+    )
+    st.plotly_chart(fig, use_container_width=True, key="job_chart")
+
+    if insights['common_issues']:
+        st.subheader("🚨 Problemas CRITICOS Detectados")
+        for issue, count in insights['common_issues']:
+            st.write(f"• **{issue}** - mencionado en {count} quejas")
+
+    with open(report['results_path'], 'rb') as handle:
+        st.download_button(
+            "💾 Descargar resultados (Parquet)",
+            data=handle,
+            file_name=os.path.basename(report['results_path']),
+            mime="application/octet-stream"
+        )
 
 def main():
     st.set_page_config(
@@ -80,7 +428,8 @@ def main():
     # Inicializar servicios
     @st.cache_resource
     def load_services():
-        sentiment_service = SentimentService()
+        # El modelo se carga y calienta en segundo plano mientras se sube el archivo
+        sentiment_service = SentimentService(preload=True)
         analyzer = DatasetAnalyzer(sentiment_service)
         return sentiment_service, analyzer
     
@@ -89,32 +438,29 @@ def main():
     # SECCION: SUBIDA DE ARCHIVOS
     st.header("📤 Subir Datos")
     uploaded_file = st.file_uploader(
-        "Arrastra tu archivo CSV o Excel aquí", 
-        type=['csv', 'xlsx'],
-        help="Formatos soportados: CSV, Excel"
+        "Arrastra tu archivo CSV, Excel, Parquet o Feather aquí", 
+        type=['csv', 'xlsx', 'parquet', 'feather'],
+        help="Formatos soportados: CSV, Excel, Parquet, Feather"
     )
     
     if uploaded_file:
         # Cargar datos
         try:
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
+            file_bytes = uploaded_file.getvalue()
+            digest = upload_digest(uploaded_file, file_bytes)
+            df = load_uploaded_data(digest, file_bytes, uploaded_file.name)
+            if df is None:
+                st.error("❌ No se pudo leer el archivo (formatos: CSV, Excel, Parquet, Feather)")
+                return
                 
             st.success(f"✅ **Datos cargados:** {len(df)} filas, {len(df.columns)} columnas")
             
             # SECCION: deteccion DE COLUMNAS
             st.header("🔍 Configuración del ANALISIS")
             
-            # Detectar columnas de texto automaticamente
-            text_columns = []
-            for col in df.columns:
-                col_lower = col.lower()
-                if any(keyword in col_lower for keyword in ['text', 'comment', 'review', 'tweet', 'message', 'content', 'clean_']):
-                    text_columns.append(col)
-                elif df[col].dtype == 'object' and df[col].astype(str).str.len().mean() > 10:
-                    text_columns.append(col)
+            # Detectar columnas de texto con el perfil de una muestra de filas (no recorre el archivo entero)
+            profile = sniff_dataframe(df)
+            text_columns = profile.text_candidates
             
             if text_columns:
                 text_column = st.selectbox(
@@ -123,6 +469,8 @@ def main():
                     index=0,
                     help="Esta columna debe contener los comentarios, reviews o textos a analizar"
                 )
+                if profile.label_column and profile.label_column != text_column:
+                    st.caption(f"Columna de etiquetas detectada: **{profile.label_column}**")
             else:
                 st.warning("⚠️ No se detectaron columnas de texto automaticamente")
                 text_column = st.selectbox(
@@ -138,6 +486,16 @@ def main():
             
             # SECCION: ANALISIS
             st.header("🎯 Ejecutar ANALISIS")
+
+            mode = st.radio(
+                "**Modo de análisis:**",
+                ["Muestra interactiva", "Dataset completo (en segundo plano)"],
+                horizontal=True,
+                help="El dataset completo se procesa en un worker local con checkpoints"
+            )
+            if mode != "Muestra interactiva":
+                render_background_job(file_bytes, uploaded_file.name, text_column, len(df))
+                return
             
             sample_size = st.slider(
                 "**Número de muestras a analizar:**",
@@ -147,190 +505,29 @@ def main():
                 help="Para datasets grandes, analizar una muestra es más rápido"
             )
             
-            # ✅ EL BOTON PRIMERO - TODO EL ANALISIS DENTRO DE ESTE BLOQUE
-            if st.button("🚀 **Ejecutar ANALISIS Completo**", type="primary", use_container_width=True):
-                with st.spinner(f"🔍 Analizando {sample_size} textos con BERT..."):
-                    # Preparar datos
-                    df_sample = df.sample(sample_size, random_state=42)
-                    texts = df_sample[text_column].dropna().tolist()
-
-                    if not texts:
-                        st.error("❌ No hay textos válidos para analizar")
-                        return
-
-                    # ANALISIS de sentimientos
-                    results = sentiment_service.analyze_batch(texts)
-
-                    # ✅ AHORA SI - procesar temas DENTRO del mismo bloque (DESPUES de crear results)
-                    if topic_service:
-                        with st.spinner("🔍 Analizando temas y categorías..."):
-                            topics = topic_service.extract_topics_from_legacy(results)
-        
-                            if topics:
-                                st.subheader("🎯 Temas Detectados (Analisis Mejorado)")
-        
-                                for topic in topics[:5]:  # Mostrar solo top 5
-                                    with st.expander(f"📋 {topic['name'].title()} (Frecuencia: {topic['frequency']})"):
-                                        st.write(f"**Categoria:** {topic['category']}")
-                                        st.write(f"**Ratio Negativo:** {topic['negative_ratio']:.1%}")
-                                        st.write(f"**Idioma:** {topic['language']}")
-                                        st.write("**Ejemplos:**")
-                                        for example in topic['examples']:
-                                            st.write(f"• {example}")
-
-                    # ✅ SECCION DE RESULTADOS ORIGINAL tambien DENTRO del bloque
-                    st.header("📈 Resultados del Analisis")
-
-                    # Metricas principales
-                    st.subheader("📊 Metricas Clave")
-                    col1, col2, col3, col4 = st.columns(4)
-
-                    # Calcular metricas
-                    sentiments = [r['sentiment'] for r in results]
-                    sentiment_counts = Counter(sentiments)
-
-                    total = len(results)
-                    positive = sum(1 for s in sentiments if '4 stars' in s or '5 stars' in s)
-                    negative = sum(1 for s in sentiments if '1 star' in s or '2 stars' in s)
-                    neutral = total - positive - negative
-
-                    with col1:
-                        st.metric("👍 Positivos", f"{(positive/total)*100:.1f}%", f"{positive} textos")
-
-                    with col2:
-                        st.metric("👎 Negativos", f"{(negative/total)*100:.1f}%", f"{negative} textos")
-
-                    with col3:
-                        st.metric("⚖️ Neutrales", f"{(neutral/total)*100:.1f}%", f"{neutral} textos")
-
-                    with col4:
-                        avg_rating = sum(
-                            5 if '5 stars' in s else
-                            4 if '4 stars' in s else  
-                            3 if '3 stars' in s else
-                            2 if '2 stars' in s else 1 
-                            for s in sentiments
-                        ) / total
-                        st.metric("⭐ Rating Promedio", f"{avg_rating:.1f}/5")
-                    
-                    # Grafico de distribucion
-                    st.subheader("📊 distribucion de Sentimientos")
-                    
-                    # Preparar datos para el Grafico
-                    sentiment_df = pd.DataFrame({
-                        'Sentimiento': list(sentiment_counts.keys()),
-                        'Cantidad': list(sentiment_counts.values())
-                    })
-                    
-                    fig = px.bar(
-                        sentiment_df, 
-                        x='Sentimiento', 
-                        y='Cantidad',
-                        color='Sentimiento',
-                        title="distribucion de Sentimientos por Estrellas"
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    # PROBLEMAS CRITICOS
-                    st.subheader("🚨 Problemas CRITICOS Detectados")
-                    
-                    if negative > 0:
-                        negative_reviews = [r for r in results if '1 star' in r['sentiment'] or '2 stars' in r['sentiment']]
-                        all_aspects = []
-                        
-                        for review in negative_reviews:
-                            # EXTRAER ASPECTOS EN EL FRONTEND
-                            aspects = extract_aspects_simple(review['text'])
-                            all_aspects.extend(aspects)
-                        
-                        top_issues = Counter(all_aspects).most_common(8)
-                        
-                        if top_issues:
-                            st.info("**Temas más mencionados en reviews negativos:**")
-                            for issue, count in top_issues:
-                                st.write(f"• **{issue}** - mencionado en {count} quejas")
-                        else:
-                            st.warning("No se detectaron aspectos específicos en las reviews negativas")
-                    else:
-                        st.success("🎉 **Excelente!** No se detectaron reviews negativas en la muestra analizada")
-                    
-                    # FORTALEZAS
-                    st.subheader("💪 Fortalezas Detectadas")
-                    
-                    if positive > 0:
-                        positive_reviews = [r for r in results if '4 stars' in r['sentiment'] or '5 stars' in r['sentiment']]
-                        positive_aspects = []
-                        
-                        for review in positive_reviews:
-                            # EXTRAER ASPECTOS EN EL FRONTEND
-                            aspects = extract_aspects_simple(review['text'])
-                            positive_aspects.extend(aspects)
-                        
-                        top_strengths = Counter(positive_aspects).most_common(5)
-                        
-                        if top_strengths:
-                            st.info("**Temas más mencionados en reviews positivos:**")
-                            for strength, count in top_strengths:
-                                st.write(f"• **{strength}** - mencionado en {count} elogios")
-                    
-                    # EJEMPLOS DETALLADOS
-                    st.subheader("📝 Ejemplos de ANALISIS")
-                    
-                    tab1, tab2, tab3 = st.tabs(["👍 Positivos", "👎 Negativos", "⚖️ Neutrales"])
-                    
-                    with tab1:
-                        positive_examples = [r for r in results if '4 stars' in r['sentiment'] or '5 stars' in r['sentiment']][:5]
-                        for i, example in enumerate(positive_examples, 1):
-                            with st.expander(f"Ejemplo positivo {i}: {example['sentiment']} (confianza: {example.get('confidence', 0):.2f})"):
-                                st.write(f"**Texto:** {example['text']}")
-                                aspects = extract_aspects_simple(example['text'])
-                                if aspects:
-                                    st.write(f"**Palabras clave:** {', '.join(aspects)}")
-                    
-                    with tab2:
-                        negative_examples = [r for r in results if '1 star' in r['sentiment'] or '2 stars' in r['sentiment']][:5]
-                        for i, example in enumerate(negative_examples, 1):
-                            with st.expander(f"Ejemplo negativo {i}: {example['sentiment']} (confianza: {example.get('confidence', 0):.2f})"):
-                                st.write(f"**Texto:** {example['text']}")
-                                aspects = extract_aspects_simple(example['text'])
-                                if aspects:
-                                    st.write(f"**Palabras clave:** {', '.join(aspects)}")
-                    
-                    with tab3:
-                        neutral_examples = [r for r in results if '3 stars' in r['sentiment']][:5]
-                        for i, example in enumerate(neutral_examples, 1):
-                            with st.expander(f"Ejemplo neutral {i}: {example['sentiment']} (confianza: {example.get('confidence', 0):.2f})"):
-                                st.write(f"**Texto:** {example['text']}")
-                                aspects = extract_aspects_simple(example['text'])
-                                if aspects:
-                                    st.write(f"**Palabras clave:** {', '.join(aspects)}")
-                    
-                    # RECOMENDACIONES
-                    st.subheader("💡 Recomendaciones Accionables")
-                    
-                    if negative > 0:
-                        negative_reviews = [r for r in results if '1 star' in r['sentiment'] or '2 stars' in r['sentiment']]
-                        all_negative_aspects = []
-                        for review in negative_reviews:
-                            aspects = extract_aspects_simple(review['text'])
-                            all_negative_aspects.extend(aspects)
-                        
-                        if all_negative_aspects:
-                            top_issue, count = Counter(all_negative_aspects).most_common(1)[0]
-                            st.warning(f"**Prioridad ALTA:** Abordar problemas relacionados con **{top_issue}**")
-                            st.write(f"*Impacto potencial: Este tema aparece en {count} de {len(negative_reviews)} reviews negativas*")
-                    
-                    if positive > 0:
-                        positive_reviews = [r for r in results if '4 stars' in r['sentiment'] or '5 stars' in r['sentiment']]
-                        all_positive_aspects = []
-                        for review in positive_reviews:
-                            aspects = extract_aspects_simple(review['text'])
-                            all_positive_aspects.extend(aspects)
-                        
-                        if all_positive_aspects:
-                            top_strength, count = Counter(all_positive_aspects).most_common(1)[0]
-                            st.success(f"**Oportunidad:** Potenciar **{top_strength}** en estrategias de marketing")
-                            st.write(f"*Este aspecto es mencionado en {count} reviews positivas*")
+            # Analisis ya calculados en esta sesion, por (archivo, columna, muestra, modelo)
+            key = analysis_key(digest, text_column, sample_size, sentiment_service)
+            analyses = st.session_state.setdefault('analyses', OrderedDict())
+
+            if st.button("🚀 **Ejecutar ANALISIS Completo**", type="primary", use_container_width=True) \
+                    and key not in analyses:
+                # Preparar datos
+                df_sample = df.sample(sample_size, random_state=42)
+                # Array de NumPy: el texto no se copia a una lista de Python
+                texts = df_sample[text_column].dropna().to_numpy()
+
+                if len(texts) == 0:
+                    st.error("❌ No hay textos válidos para analizar")
+                    return
+
+                analyses[key] = run_analysis(sentiment_service, texts)
+                while len(analyses) > MAX_CACHED_ANALYSES:
+                    analyses.popitem(last=False)
+
+            # Reruns (widgets, explorador) y configuraciones ya analizadas se muestran al instante
+            if key in analyses:
+                analyses.move_to_end(key)
+                render_report(analyses[key])
                         
         except Exception as e:
             st.error(f"❌ Error procesando el archivo: {e}")
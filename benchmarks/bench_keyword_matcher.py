@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Benchmark: bucle por categoria/palabra clave vs KeywordMatcher al crecer el numero de claves
+
+python benchmarks/bench_keyword_matcher.py [--texts 2000] [--sizes 10 50 100 500 1000]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from domain.entities import TopicCategory, BusinessCategory, Language
+from core.topic_extraction.keyword_matcher import KeywordMatcher, SUBSTRING, PREFIX
+
+def random_word(rng: random.Random) -> str:
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+
+def build_categories(keywords_per_category: int, rng: random.Random):
+    return [
+        TopicCategory(category=category, keywords=[random_word(rng) for _ in range(keywords_per_category)],
+                      language=Language.ENGLISH)
+        for category in BusinessCategory
+    ]
+
+def build_texts(categories, count: int, rng: random.Random):
+    vocabulary = [keyword for category in categories for keyword in category.keywords]
+    filler = [random_word(rng) for _ in range(500)]
+    texts = []
+    for _ in range(count):
+        words = [rng.choice(filler) for _ in range(rng.randint(15, 40))]
+        # ~1 de cada 3 textos menciona alguna clave
+        if rng.random() < 0.33:
+            words.insert(rng.randrange(len(words)), rng.choice(vocabulary))
+        texts.append(' '.join(words))
+    return texts
+
+def naive_match(texts, categories):
+    """Implementacion anterior: texto x categoria x palabra clave, con lower() por categoria"""
+    return [[category for category in categories
+             if any(keyword in text.lower() for keyword in category.keywords)] for text in texts]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--texts', type=int, default=2000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 100, 500, 1000])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'keywords/cat':>12} {'total':>7} {'naive ms':>10} {'compile ms':>11} {'matcher ms':>11} "
+          f"{'speedup':>8} {'prefix ms':>10}  same")
+    for size in args.sizes:
+        rng = random.Random(args.seed)
+        categories = build_categories(size, rng)
+        texts = build_texts(categories, args.texts, rng)
+
+        started = time.perf_counter()
+        expected = naive_match(texts, categories)
+        naive_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        # Modo substring: misma semantica que el bucle anterior, para comparar resultados
+        matcher = KeywordMatcher(categories, SUBSTRING)
+        compile_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        matched = [matcher.match(text) for text in texts]
+        matcher_ms = (time.perf_counter() - started) * 1000
+
+        prefix_matcher = KeywordMatcher(categories, PREFIX)
+        started = time.perf_counter()
+        for text in texts:
+            prefix_matcher.match(text)
+        prefix_ms = (time.perf_counter() - started) * 1000
+
+        print(f"{size:>12} {matcher.keyword_count:>7} {naive_ms:>10.1f} {compile_ms:>11.1f} {matcher_ms:>11.1f} "
+              f"{naive_ms / matcher_ms:>7.1f}x {prefix_ms:>10.1f}  {matched == expected}")
+
+if __name__ == '__main__':
+    main()
@@ -52,5 +52,76 @@ def main():
         import traceback
         traceback.print_exc()
 
+def serve_command(argv):
+    """python main.py serve [--host H] [--port P] [--max-batch-size N] [--max-wait-ms MS]"""
+    import argparse
+    import logging
+    from services.inference_server import serve, DEFAULT_HOST, DEFAULT_PORT, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS
+
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Servidor HTTP local de inferencia")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--workers", type=int, default=0, help="Procesos de inferencia (0 = en proceso)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    service = SentimentService(preload=True, workers=args.workers)
+    serve(service, args.host, args.port, args.max_batch_size, args.max_wait_ms)
+
+def evaluate_command(argv):
+    """python main.py evaluate DATASET [--text-column C] [--label-column L] [--star-column S] [--model M] [--output report.json]"""
+    import argparse
+    import json
+    import logging
+    from services.evaluation import evaluate_dataset
+
+    parser = argparse.ArgumentParser(prog="main.py evaluate", description="Evaluar un modelo sobre un dataset etiquetado")
+    parser.add_argument("dataset")
+    parser.add_argument("--text-column")
+    parser.add_argument("--label-column")
+    parser.add_argument("--star-column", help="Etiquetas de 1-5 estrellas para calibrar la confianza")
+    parser.add_argument("--model", help="Nombre del modelo en el registro (por defecto, el modelo por defecto)")
+    parser.add_argument("--chunksize", type=int, default=10000)
+    parser.add_argument("--output", help="Ruta del reporte JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    with SentimentService() as service:
+        report = evaluate_dataset(service, args.dataset, text_column=args.text_column,
+                                  label_column=args.label_column, star_column=args.star_column,
+                                  chunksize=args.chunksize,
+                                  model_name=args.model, output_path=args.output)
+    for scheme in ('three_class', 'two_class'):
+        print(f"{scheme}: accuracy {report[scheme]['accuracy']:.2%}, macro F1 {report[scheme]['macro_f1']:.3f}")
+    if report['star_calibration']['rows']:
+        print(f"star calibration: ECE {report['star_calibration']['expected_calibration_error']:.3f}")
+    if not args.output:
+        print(json.dumps(report, indent=2, default=str))
+
+def worker_command(argv):
+    """python main.py worker [--jobs-dir DIR] [--poll-interval S] [--once]"""
+    import argparse
+    import logging
+    from services.job_queue import JobQueue, run_worker, DEFAULT_POLL_INTERVAL
+
+    parser = argparse.ArgumentParser(prog="main.py worker", description="Worker local de jobs de dataset completo")
+    parser.add_argument("--jobs-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs"))
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument("--once", action="store_true", help="Terminar cuando la cola quede vacia")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    with SentimentService(preload=True) as service:
+        run_worker(JobQueue(args.jobs_dir), service, poll_interval=args.poll_interval, once=args.once)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "evaluate":
+        evaluate_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "worker":
+        worker_command(sys.argv[2:])
+    else:
+        main()
\ No newline at end of file
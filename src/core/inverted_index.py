@@ -0,0 +1,285 @@
+# src/core/inverted_index.py
+"""Indice invertido en memoria sobre un corpus analizado: termino -> filas, con filtros vectorizados"""
+
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+from domain.entities import BusinessCategory, SPANISH_CATEGORIES, ENGLISH_CATEGORIES
+
+_TOKEN = re.compile(r'\w{2,}')
+_COMBINING = re.compile('[\u0300-\u036f]')
+_CATEGORY_BITS = {category: 1 << bit for bit, category in enumerate(BusinessCategory)}
+
+def normalize_term(term: str) -> str:
+    """Minusculas y sin acentos: 'Envío' -> 'envio'"""
+    term = term.lower()
+    if term.isascii():
+        return term
+    return _COMBINING.sub('', unicodedata.normalize('NFKD', term))
+
+def tokenize(text: str) -> List[str]:
+    if not isinstance(text, str):
+        return []
+    return _TOKEN.findall(normalize_term(text))
+
+class InvertedIndex:
+    """Listas de postings (ids de documento ordenados) por termino normalizado + columnas por documento
+
+    Los documentos se numeran 0..N-1 en el orden en que se agregan (la posicion en el ResultBatch
+    de origen); row_ids guarda el numero de fila original de cada documento. Las categorias se
+    calculan una vez por termino con el KeywordMatcher (sin acentos: 'envío' cuenta como 'envio').
+    """
+
+    def __init__(self, categories=None):
+        from core.topic_extraction.keyword_matcher import get_matcher
+        self._matcher = get_matcher(categories if categories is not None else SPANISH_CATEGORIES + ENGLISH_CATEGORIES)
+        self._category_bits = np.array([_CATEGORY_BITS[category.category] for category in self._matcher.categories],
+                                       dtype=np.uint8)
+        self.languages: List[str] = []
+        self._vocabulary: Dict[str, int] = {}
+        # Bits de categoria de cada termino (por term_id)
+        self._term_masks: List[int] = []
+        # Lotes agregados desde la ultima compactacion
+        self._pending: List[Dict[str, np.ndarray]] = []
+        self._lock = threading.Lock()
+
+        # Estado compactado (CSR): postings de term_id t = _postings[_offsets[t]:_offsets[t + 1]]
+        self._terms: List[str] = []
+        self._sorted_terms: List[str] = []
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._postings = np.zeros(0, dtype=np.int64)
+        self.row_ids = np.zeros(0, dtype=np.int64)
+        self.star_ids = np.zeros(0, dtype=np.int8)
+        self.language_ids = np.zeros(0, dtype=np.int8)
+        self.category_masks = np.zeros(0, dtype=np.uint8)
+        self._documents = 0
+
+    def __len__(self) -> int:
+        return self._documents
+
+    # --- Construccion ---
+
+    def add_batch(self, texts: Sequence[str], star_ids: Sequence[int], row_ids: Optional[Sequence[int]] = None,
+                  languages: Optional[Sequence[Optional[str]]] = None):
+        """Agregar documentos (los textos no se guardan, solo sus terminos y columnas)"""
+        count = len(texts)
+        if languages is None:
+            from core.language_id import get_identifier
+            languages, _ = get_identifier().identify_batch(texts)
+
+        with self._lock:
+            first = self._documents
+            term_ids: List[int] = []
+            doc_ids: List[int] = []
+            vocabulary = self._vocabulary
+            for position, text in enumerate(texts):
+                terms = set(tokenize(text))
+                term_ids.extend(vocabulary.setdefault(term, len(vocabulary)) for term in terms)
+                doc_ids.extend([first + position] * len(terms))
+
+            # Categorias por termino (una vez por termino nuevo); el documento hereda las de sus terminos
+            for term in list(vocabulary)[len(self._term_masks):]:
+                mask = 0
+                for index in self._matcher.match_indices(term):
+                    mask |= int(self._category_bits[index])
+                self._term_masks.append(mask)
+            term_ids_array = np.array(term_ids, dtype=np.int64)
+            doc_ids_array = np.array(doc_ids, dtype=np.int64)
+            masks = np.zeros(count, dtype=np.uint8)
+            np.bitwise_or.at(masks, doc_ids_array - first, np.array(self._term_masks, dtype=np.uint8)[term_ids_array])
+
+            language_ids = np.array([self._language_id(code) for code in languages], dtype=np.int8)
+            self._pending.append({
+                'term_ids': term_ids_array,
+                'doc_ids': doc_ids_array,
+                'row_ids': np.arange(first, first + count, dtype=np.int64) if row_ids is None
+                           else np.asarray(row_ids, dtype=np.int64),
+                'star_ids': np.asarray(star_ids, dtype=np.int8),
+                'language_ids': language_ids,
+                'category_masks': masks
+            })
+            self._documents += count
+
+    def add_result_batch(self, batch, languages: Optional[Sequence[Optional[str]]] = None):
+        """Indexar un ResultBatch: el id de documento es la posicion dentro del lote"""
+        texts = [batch.text(i) for i in range(len(batch))]
+        if languages is None and batch.features is not None:
+            languages = batch.features.languages
+        self.add_batch(texts, batch.star_ids, batch.row_indices, languages)
+
+    @classmethod
+    def from_result_batch(cls, batch, languages: Optional[Sequence[Optional[str]]] = None) -> 'InvertedIndex':
+        index = cls()
+        index.add_result_batch(batch, languages)
+        return index
+
+    def _language_id(self, code: Optional[str]) -> int:
+        if code is None:
+            return -1
+        if code not in self.languages:
+            self.languages.append(code)
+        return self.languages.index(code)
+
+    def _compact(self):
+        """Fusionar lotes pendientes en el formato CSR (se llama antes de consultar)"""
+        with self._lock:
+            if not self._pending:
+                return
+            # Postings existentes expresados otra vez como pares (term_id, doc_id)
+            old_terms = np.repeat(np.arange(len(self._offsets) - 1, dtype=np.int64), np.diff(self._offsets))
+            term_ids = np.concatenate([old_terms] + [chunk['term_ids'] for chunk in self._pending])
+            doc_ids = np.concatenate([self._postings] + [chunk['doc_ids'] for chunk in self._pending])
+            # Orden estable por termino: dentro de cada termino los documentos quedan crecientes
+            order = np.argsort(term_ids, kind='stable')
+            self._postings = doc_ids[order]
+            counts = np.bincount(term_ids, minlength=len(self._vocabulary))
+            self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+            for column in ('row_ids', 'star_ids', 'language_ids', 'category_masks'):
+                setattr(self, column, np.concatenate([getattr(self, column)] + [chunk[column] for chunk in self._pending]))
+            self._pending = []
+            self._terms = [None] * len(self._vocabulary)
+            for term, term_id in self._vocabulary.items():
+                self._terms[term_id] = term
+            self._sorted_terms = sorted(self._vocabulary)
+
+    # --- Consultas ---
+
+    def postings(self, term: str) -> np.ndarray:
+        """Documentos que contienen el termino; 'entreg*' = cualquier termino con ese prefijo"""
+        self._compact()
+        term = normalize_term(term.strip())
+        if term.endswith('*'):
+            prefix = term[:-1]
+            start = bisect_left(self._sorted_terms, prefix)
+            lists = []
+            for candidate in self._sorted_terms[start:]:
+                if not candidate.startswith(prefix):
+                    break
+                lists.append(self._postings_for(self._vocabulary[candidate]))
+            return self._union(lists)
+        term_id = self._vocabulary.get(term)
+        return self._postings_for(term_id) if term_id is not None else np.zeros(0, dtype=np.int64)
+
+    def _postings_for(self, term_id: int) -> np.ndarray:
+        return self._postings[self._offsets[term_id]:self._offsets[term_id + 1]]
+
+    def _union(self, lists: List[np.ndarray]) -> np.ndarray:
+        """Union ordenada con una mascara de documentos: O(N) sin ordenar postings grandes"""
+        if not lists:
+            return np.zeros(0, dtype=np.int64)
+        if len(lists) == 1:
+            return lists[0]
+        member = np.zeros(self._documents, dtype=bool)
+        for postings in lists:
+            member[postings] = True
+        return np.flatnonzero(member)
+
+    def search(self, terms: Optional[Sequence[str]] = None, category: Optional[BusinessCategory] = None,
+               min_stars: Optional[int] = None, max_stars: Optional[int] = None, language: Optional[str] = None,
+               match_all: bool = True, page: int = 0, page_size: int = 20) -> Dict[str, Any]:
+        """Documentos que cumplen terminos (todos o alguno) y filtros, paginados en orden de documento"""
+        self._compact()
+        if isinstance(terms, str):
+            terms = terms.split()
+        terms = [term for term in (terms or []) if term.strip()]
+
+        if terms:
+            lists = sorted((self.postings(term) for term in terms), key=len)
+            if match_all:
+                # Se parte de la lista mas corta y se filtra con la pertenencia a las demas
+                documents = lists[0]
+                for postings in lists[1:]:
+                    member = np.zeros(self._documents, dtype=bool)
+                    member[postings] = True
+                    documents = documents[member[documents]]
+            else:
+                documents = self._union(lists)
+        else:
+            documents = np.arange(self._documents, dtype=np.int64)
+
+        mask = np.ones(len(documents), dtype=bool)
+        if min_stars is not None:
+            mask &= self.star_ids[documents] >= min_stars
+        if max_stars is not None:
+            mask &= self.star_ids[documents] <= max_stars
+        if category is not None:
+            mask &= (self.category_masks[documents] & _CATEGORY_BITS[category]) != 0
+        if language is not None:
+            language_id = self.languages.index(language) if language in self.languages else -2
+            mask &= self.language_ids[documents] == language_id
+        documents = documents[mask]
+
+        start = page * page_size
+        selected = documents[start:start + page_size]
+        return {
+            'total': int(len(documents)),
+            'page': page,
+            'page_size': page_size,
+            'pages': -(-len(documents) // page_size) if page_size else 0,
+            'documents': selected,
+            'row_ids': self.row_ids[selected]
+        }
+
+    def top_terms(self, n: int = 20, documents: Optional[np.ndarray] = None) -> List[tuple]:
+        """Terminos mas frecuentes (en todo el indice o en un subconjunto de documentos)"""
+        self._compact()
+        if documents is None:
+            counts = np.diff(self._offsets)
+        else:
+            member = np.zeros(self._documents, dtype=bool)
+            member[documents] = True
+            term_of_posting = np.repeat(np.arange(len(self._terms)), np.diff(self._offsets))
+            counts = np.bincount(term_of_posting[member[self._postings]], minlength=len(self._terms))
+        top = np.argsort(counts)[::-1][:n]
+        return [(self._terms[term_id], int(counts[term_id])) for term_id in top if counts[term_id]]
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._compact()
+        return {
+            'documents': self._documents,
+            'terms': len(self._vocabulary),
+            'postings': int(len(self._postings)),
+            'languages': list(self.languages),
+            'memory_bytes': int(sum(array.nbytes for array in (self._postings, self._offsets, self.row_ids,
+                                                               self.star_ids, self.language_ids, self.category_masks)))
+        }
+
+    # --- Persistencia ---
+
+    def save(self, path: str):
+        """Guardar en un .npz (sin pickle)"""
+        self._compact()
+        np.savez_compressed(
+            path,
+            terms=np.array(self._terms, dtype=np.str_),
+            offsets=self._offsets,
+            postings=self._postings,
+            row_ids=self.row_ids,
+            star_ids=self.star_ids,
+            language_ids=self.language_ids,
+            category_masks=self.category_masks,
+            languages=np.array(self.languages, dtype=np.str_)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'InvertedIndex':
+        index = cls()
+        with np.load(path, allow_pickle=False) as data:
+            index._terms = data['terms'].tolist()
+            index._vocabulary = {term: term_id for term_id, term in enumerate(index._terms)}
+            index._sorted_terms = sorted(index._vocabulary)
+            index._offsets = data['offsets']
+            index._postings = data['postings']
+            index.row_ids = data['row_ids']
+            index.star_ids = data['star_ids']
+            index.language_ids = data['language_ids']
+            index.category_masks = data['category_masks']
+            index.languages = data['languages'].tolist()
+        index._documents = len(index.row_ids)
+        return index
@@ -0,0 +1,175 @@
+# src/core/language_id.py
+"""Identificacion de idioma por perfiles de trigramas de caracteres, vectorizada por lote"""
+
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_BUCKETS = 1 << 18
+DEFAULT_CACHE_SIZE = 200000
+# Suavizado de Laplace: trigramas nunca vistos no anulan un idioma
+SMOOTHING = 0.5
+
+# Textos de referencia para los perfiles incluidos (palabras y construcciones frecuentes)
+SAMPLE_TEXTS = {
+    'es': """
+        el producto llego a tiempo y la calidad es muy buena, lo recomiendo a todos los que buscan algo
+        economico. la entrega fue lenta pero el servicio de atencion al cliente me ayudo con el problema.
+        no me gusto el precio porque es demasiado caro para lo que ofrece. el vendedor fue muy amable y
+        respondio todas mis preguntas. estoy muy contento con la compra, funciona perfectamente desde el
+        primer dia. la caja llego rota y faltaban piezas, tuve que esperar una semana para el cambio.
+        es una buena opcion si quieres algo sencillo, pero hay mejores productos en el mercado.
+        que mala experiencia, nunca mas vuelvo a comprar en esta tienda. el envio fue rapido y el paquete
+        estaba bien protegido. la bateria dura poco y se calienta mucho cuando la uso. me encanta el
+        diseno, es bonito y comodo de usar todos los dias. el soporte tecnico no contesta los correos y
+        el reembolso tarda demasiado. para mi es el mejor de los que he probado hasta ahora, vale la pena.
+        los materiales parecen baratos y se rompio despues de dos semanas. tambien pedi una talla mas
+        grande y me la cambiaron sin problemas. gracias por la rapidez, todo llego en perfecto estado.
+        la aplicacion se cierra sola y no puedo iniciar sesion desde ayer. pero el personal de la tienda
+        fue muy atento conmigo y me explicaron como funciona. esta bien por el precio, aunque esperaba mas.
+        """,
+    'en': """
+        the product arrived on time and the quality is very good, i would recommend it to anyone looking
+        for something cheap. the delivery was slow but the customer service team helped me with the issue.
+        i did not like the price because it is too expensive for what it offers. the seller was very kind
+        and answered all of my questions. i am really happy with this purchase, it has worked perfectly
+        since the first day. the box arrived broken and some parts were missing, so i had to wait a week for
+        the replacement. it is a good option if you want something simple, but there are better products
+        out there. what a bad experience, i will never buy from this store again. shipping was fast and the
+        package was well protected. the battery does not last long and it gets very hot when i use it.
+        i love the design, it looks nice and is comfortable to use every day. technical support never
+        answers emails and the refund takes far too long. for me it is the best one i have tried so far,
+        worth the money. the materials feel cheap and it broke after two weeks. i also ordered a bigger
+        size and they exchanged it without any problems. thanks for the quick response, everything arrived
+        in perfect condition. the app keeps crashing and i have not been able to log in since yesterday.
+        but the staff at the store were very helpful and explained how it works. it is fine for the price,
+        although i expected more.
+        """,
+}
+
+def _codepoints(texts: Sequence[str]) -> np.ndarray:
+    """Todos los textos en un solo array de codepoints: ' texto ' separados por 0"""
+    joined = ' \x00 '.join(text if isinstance(text, str) else '' for text in texts).lower()
+    codes = np.frombuffer((' ' + joined + ' ').encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    # Digitos y puntuacion ASCII / Latin-1 -> espacio (las letras acentuadas se conservan)
+    non_letter = (codes < 65) | ((codes > 90) & (codes < 97)) | ((codes > 122) & (codes < 192))
+    return np.where(non_letter & (codes != 0), np.uint64(32), codes)
+
+def _trigram_hashes(codes: np.ndarray, buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(bucket de cada trigrama valido, indice de texto de cada trigrama valido)"""
+    if len(codes) < 3:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    a, b, c = codes[:-2], codes[1:-1], codes[2:]
+    # Trigramas que cruzan el separador entre textos o sin ninguna letra no cuentan
+    valid = (a != 0) & (b != 0) & (c != 0) & ((a != 32) | (b != 32) | (c != 32))
+    hashes = ((a * np.uint64(0x9E3779B1) + b) * np.uint64(0x85EBCA77) + c) * np.uint64(0xC2B2AE3D)
+    buckets_ = ((hashes >> np.uint64(32)) % np.uint64(buckets)).astype(np.int64)
+    text_ids = np.cumsum(codes == 0)[:-2]
+    return buckets_[valid], text_ids[valid]
+
+class LanguageIdentifier:
+    """Perfiles de trigramas por idioma (log-probabilidades por bucket) y clasificacion por lote
+
+    identify_batch concatena los textos y suma las log-probabilidades de todos los trigramas con
+    operaciones de NumPy sobre el lote completo. Los resultados se memoizan por hash del texto.
+    """
+
+    def __init__(self, samples: Optional[Dict[str, str]] = None, buckets: int = DEFAULT_BUCKETS,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self.buckets = buckets
+        self.cache_size = cache_size
+        self.languages: List[str] = []
+        self._log_probs = np.zeros((buckets, 0), dtype=np.float32)
+        self._cache: Dict[int, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        for code, sample in (SAMPLE_TEXTS if samples is None else samples).items():
+            self.add_language(code, sample)
+
+    def add_language(self, code: str, sample: str):
+        """Registrar (o reemplazar) un idioma a partir de texto de ejemplo"""
+        hashes, _ = _trigram_hashes(_codepoints([sample]), self.buckets)
+        counts = np.bincount(hashes, minlength=self.buckets).astype(np.float64)
+        log_probs = np.log((counts + SMOOTHING) / (counts.sum() + SMOOTHING * self.buckets)).astype(np.float32)
+        self.add_profile(code, log_probs)
+
+    def add_profile(self, code: str, log_probs: np.ndarray):
+        """Registrar un perfil ya calculado (log-probabilidad por bucket)"""
+        if log_probs.shape != (self.buckets,):
+            raise ValueError(f"El perfil debe tener {self.buckets} buckets")
+        with self._lock:
+            if code in self.languages:
+                self._log_probs[:, self.languages.index(code)] = log_probs
+            else:
+                self.languages.append(code)
+                self._log_probs = np.column_stack([self._log_probs, log_probs]).astype(np.float32)
+            self._cache.clear()
+
+    def identify(self, text: str) -> Tuple[Optional[str], float]:
+        codes, scores = self.identify_batch([text])
+        return codes[0], float(scores[0])
+
+    def identify_batch(self, texts: Sequence[str]) -> Tuple[List[Optional[str]], np.ndarray]:
+        """(codigo de idioma por texto, confianza 0-1); None si el texto no tiene letras"""
+        indices, scores = self.identify_indices(texts)
+        return [self.languages[index] if index >= 0 else None for index in indices.tolist()], scores
+
+    def identify_indices(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Como identify_batch pero con el indice del idioma en self.languages (-1 = sin decidir)"""
+        count = len(texts)
+        indices = np.full(count, -1, dtype=np.int64)
+        scores = np.zeros(count, dtype=np.float32)
+        if count == 0 or not self.languages:
+            return indices, scores
+
+        keys = [hash(text) for text in texts]
+        missing: List[int] = []
+        with self._lock:
+            cache = self._cache
+            for position, key in enumerate(keys):
+                cached = cache.get(key)
+                if cached is None:
+                    missing.append(position)
+                else:
+                    indices[position], scores[position] = cached
+
+        if missing:
+            new_indices, new_scores = self._classify([texts[position] for position in missing])
+            indices[missing] = new_indices
+            scores[missing] = new_scores
+            with self._lock:
+                if not self.cache_size:
+                    return indices, scores
+                if len(self._cache) + len(missing) > self.cache_size:
+                    self._cache.clear()
+                self._cache.update(zip((keys[p] for p in missing), zip(new_indices.tolist(), new_scores.tolist())))
+        return indices, scores
+
+    def _classify(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        hashes, text_ids = _trigram_hashes(_codepoints(texts), self.buckets)
+        count = len(texts)
+        log_likelihood = np.column_stack([
+            np.bincount(text_ids, weights=self._log_probs[hashes, column], minlength=count)
+            for column in range(len(self.languages))
+        ])
+        best = log_likelihood.argmax(axis=1)
+        # Confianza: softmax sobre la log-verosimilitud total de cada idioma
+        shifted = log_likelihood - log_likelihood.max(axis=1, keepdims=True)
+        probabilities = np.exp(shifted)
+        scores = (probabilities.max(axis=1) / probabilities.sum(axis=1)).astype(np.float32)
+
+        has_trigrams = np.bincount(text_ids, minlength=count) > 0
+        best = np.where(has_trigrams, best, -1)
+        scores = np.where(has_trigrams, scores, np.float32(0.0))
+        return best, scores
+
+_default: Optional[LanguageIdentifier] = None
+_default_lock = threading.Lock()
+
+def get_identifier() -> LanguageIdentifier:
+    """Identificador compartido con los perfiles incluidos (se construye una vez)"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = LanguageIdentifier()
+        return _default
@@ -0,0 +1,86 @@
+# src/core/text_features.py
+"""Rasgos de texto calculados una sola vez por texto unico: aspectos, idioma y claves de categoria"""
+
+import re
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from domain.entities import SPANISH_CATEGORIES, ENGLISH_CATEGORIES
+
+_ASPECT = re.compile(r'\b[a-zA-Z]{3,}\b')
+MAX_ASPECTS = 5
+
+# Stop words de los aspectos de SentimentService
+ASPECT_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to',
+    'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'this', 'that'
+})
+
+# Categorias de todas las estrategias: keyword_hits son indices sobre esta lista
+KEYWORD_CATEGORIES = SPANISH_CATEGORIES + ENGLISH_CATEGORIES
+
+def extract_aspects(normalized: str, max_aspects: int = MAX_ASPECTS) -> List[str]:
+    """Palabras de 3+ letras que no son stop words (texto ya en minusculas)"""
+    aspects = []
+    for word in _ASPECT.findall(normalized):
+        if word not in ASPECT_STOP_WORDS:
+            aspects.append(word)
+            if len(aspects) == max_aspects:
+                break
+    return aspects
+
+class TextFeatures:
+    """Idioma y claves de categoria por texto unico, con un indice fila -> texto unico
+
+    compute() recorre cada texto unico una vez (claves) y detecta el idioma de todo el lote junto.
+    Las filas duplicadas apuntan al mismo texto unico: take()/concat() solo mueven el indice,
+    igual que ResultBatch guarda indices de fila en lugar de copiar texto.
+    """
+
+    def __init__(self, languages: List[Optional[str]], keyword_hits: List[Tuple[int, ...]],
+                 index: Optional[np.ndarray] = None):
+        # Codigo de idioma de core.language_id (None = sin letras), por texto unico
+        self.unique_languages = languages
+        self.unique_keyword_hits = keyword_hits
+        self.index = np.arange(len(languages), dtype=np.int64) if index is None else np.asarray(index, dtype=np.int64)
+
+    @classmethod
+    def compute(cls, texts: Sequence[str]) -> 'TextFeatures':
+        from core.language_id import get_identifier
+        from core.topic_extraction.keyword_matcher import get_matcher
+
+        matcher = get_matcher(KEYWORD_CATEGORIES)
+        keyword_hits = [tuple(matcher.match_indices(text.lower())) if isinstance(text, str) else ()
+                        for text in texts]
+        languages, _ = get_identifier().identify_batch(texts)
+        return cls(languages, keyword_hits)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def language(self, i: int) -> Optional[str]:
+        return self.unique_languages[self.index[i]]
+
+    def keyword_hits(self, i: int) -> Tuple[int, ...]:
+        return self.unique_keyword_hits[self.index[i]]
+
+    @property
+    def languages(self) -> List[Optional[str]]:
+        """Idioma de cada fila (los mismos objetos str, sin copiar)"""
+        return [self.unique_languages[j] for j in self.index.tolist()]
+
+    def take(self, positions: Sequence[int]) -> 'TextFeatures':
+        return TextFeatures(self.unique_languages, self.unique_keyword_hits,
+                            self.index[np.asarray(positions, dtype=np.int64)])
+
+    @classmethod
+    def concat(cls, parts: Sequence['TextFeatures']) -> 'TextFeatures':
+        languages: List[Optional[str]] = []
+        keyword_hits: List[Tuple[int, ...]] = []
+        indexes = []
+        for part in parts:
+            indexes.append(part.index + len(languages))
+            languages.extend(part.unique_languages)
+            keyword_hits.extend(part.unique_keyword_hits)
+        return cls(languages, keyword_hits, np.concatenate(indexes) if indexes else None)
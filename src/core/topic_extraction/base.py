@@ -1,9 +1,90 @@
+import zlib
+from bisect import insort
 from abc import ABC, abstractmethod
-from typing import List, Dict
-from domain.entities import AnalyzedText, Topic, Language, SentimentLabel
+from typing import List, Dict, Iterable, Tuple, Optional
+from domain.entities import AnalyzedText, Topic, Language, SentimentLabel, BusinessCategory, TopicCategory
+
+MIN_MENTIONS = 2  # REGLA DE NEGOCIO: minimo 2 menciones para que exista un tema
+MAX_EXAMPLES = 3
+
+class _TopicState:
+    """Contadores de una categoria: frecuencia, sentimientos y reservorio de ejemplos"""
+
+    __slots__ = ('frequency', 'sentiments', 'examples')
+
+    def __init__(self):
+        self.frequency = 0
+        self.sentiments = {label: 0 for label in SentimentLabel}
+        # (prioridad, ejemplo) ordenados: se conservan las max_examples prioridades mas bajas
+        self.examples: List[Tuple[int, str]] = []
+
+class TopicAccumulator:
+    """Estado incremental de temas de un idioma: memoria constante por categoria
+
+    add() suma un texto en O(1). Los ejemplos son una muestra por prioridad: cada ejemplo
+    recibe una prioridad pseudoaleatoria estable (hash del texto con semilla) y se conservan
+    las mas bajas (sin repetir). El resultado no depende del orden ni del reparto en shards, asi que
+    merge() de acumuladores parciales da exactamente lo mismo que una sola pasada.
+    """
+
+    def __init__(self, language: Language, max_examples: int = MAX_EXAMPLES, seed: int = 42):
+        self.language = language
+        self.max_examples = max_examples
+        self.seed = seed
+        self.states: Dict[BusinessCategory, _TopicState] = {}
+
+    def _state(self, category: BusinessCategory) -> _TopicState:
+        state = self.states.get(category)
+        if state is None:
+            state = self.states[category] = _TopicState()
+        return state
+
+    def _offer(self, state: _TopicState, entry: Tuple[int, str]):
+        examples = state.examples
+        # Textos repetidos tienen la misma prioridad: solo se guardan una vez
+        if (len(examples) < self.max_examples or entry < examples[-1]) and entry not in examples:
+            insort(examples, entry)
+            del examples[self.max_examples:]
+
+    def add(self, category: BusinessCategory, text: AnalyzedText):
+        state = self._state(category)
+        state.frequency += 1
+        state.sentiments[text.sentiment] += 1
+
+        example = text.text[:80] + "..."
+        self._offer(state, (zlib.crc32(example.encode('utf-8'), self.seed), example))
+
+    def merge(self, other: 'TopicAccumulator') -> 'TopicAccumulator':
+        """Sumar un acumulador parcial del mismo idioma (conmutativo y asociativo)"""
+        for category, other_state in other.states.items():
+            state = self._state(category)
+            state.frequency += other_state.frequency
+            for label, count in other_state.sentiments.items():
+                state.sentiments[label] += count
+            for entry in other_state.examples:
+                self._offer(state, entry)
+        return self
+
+    def to_topics(self, min_mentions: int = MIN_MENTIONS) -> List[Topic]:
+        """Temas actuales (copias: el acumulador puede seguir recibiendo textos)"""
+        return [
+            Topic(
+                name=category.value,
+                category=category,
+                frequency=state.frequency,
+                sentiment_distribution=dict(state.sentiments),
+                examples=[example for _, example in state.examples],
+                language=self.language
+            )
+            for category, state in self.states.items()
+            if state.frequency >= min_mentions
+        ]
 
 class BaseTopicExtractor(ABC):
     """Interface para estrategias de extraccion de temas"""
+
+    # Categorias que reconoce la estrategia (las asigna cada subclase en __init__)
+    categories: List[TopicCategory]
     
     @property
     @abstractmethod
@@ -15,10 +96,41 @@ class BaseTopicExtractor(ABC):
     def extract(self, texts: List[AnalyzedText]) -> List[Topic]:
         """Extraer temas de textos analizados"""
         pass
+
+    def new_accumulator(self) -> TopicAccumulator:
+        return TopicAccumulator(self.supported_language)
+
+    def accumulate(self, texts: Iterable[AnalyzedText], accumulator: TopicAccumulator):
+        """Sumar textos a los contadores por categoria (sin guardar los textos)"""
+        # Un solo escaneo por texto, o ninguno si ya trae keyword_hits de TextFeatures
+        for text in texts:
+            for category in self._matched_categories(text):
+                accumulator.add(category.category, text)
+
+    def build_topics(self, accumulator: TopicAccumulator) -> List[Topic]:
+        return accumulator.to_topics()
+
+    def _matched_categories(self, text: AnalyzedText) -> List[TopicCategory]:
+        """Categorias (de self.categories) del texto: reutiliza keyword_hits si los trae"""
+        from .keyword_matcher import get_matcher
+        positions = self._hit_positions()
+        if text.keyword_hits is None or positions is None:
+            return get_matcher(self.categories).match(text.text)
+        return [self.categories[j] for j in sorted({positions[i] for i in text.keyword_hits if i in positions})]
+
+    def _hit_positions(self) -> Optional[Dict[int, int]]:
+        """Indice en KEYWORD_CATEGORIES -> posicion en self.categories (None si hay categorias propias)"""
+        if '_hit_positions_cache' not in self.__dict__:
+            from core.text_features import KEYWORD_CATEGORIES
+            positions = {i: self.categories.index(category)
+                         for i, category in enumerate(KEYWORD_CATEGORIES) if category in self.categories}
+            covered = len(set(positions.values())) == len(self.categories)
+            self._hit_positions_cache = positions if covered else None
+        return self._hit_positions_cache
     
     def _calculate_sentiment_distribution(self, texts: List[AnalyzedText]) -> Dict[SentimentLabel, int]:
         """Calcular distribucion de sentimientos"""
         distribution = {label: 0 for label in SentimentLabel}
         for text in texts:
             distribution[text.sentiment] += 1
-        return distribution
\ No newline at end of file
+        return distribution
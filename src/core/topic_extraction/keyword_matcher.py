@@ -0,0 +1,125 @@
+# src/core/topic_extraction/keyword_matcher.py
+import re
+import threading
+from typing import List, Dict, Tuple, Iterable
+
+from domain.entities import TopicCategory
+
+# Modos de coincidencia de palabras clave
+PREFIX = 'prefix'        # al inicio de una palabra, admite sufijos: 'entrega' -> 'entregas'
+WORD = 'word'            # palabra completa: 'time' no coincide con 'timely'
+SUBSTRING = 'substring'  # en cualquier posicion (comportamiento anterior: 'time' en 'sometimes')
+
+_BOUNDARIES = {
+    PREFIX: (r'(?<!\w)', ''),
+    WORD: (r'(?<!\w)', r'(?!\w)'),
+    SUBSTRING: ('', ''),
+}
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Alternancia en forma de trie: prefijos comunes se comparan una sola vez y gana la clave mas larga"""
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def _emit(node: Dict[str, dict]) -> str:
+        terminal = '' in node
+        branches = [re.escape(char) + _emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Si aqui termina una clave, el resto es opcional y codicioso: primero intenta la clave mas larga
+        return '(?:' + body + ')?' if terminal else body
+
+    return _emit(trie)
+
+class KeywordMatcher:
+    """Automata de palabras clave de varias categorias: un solo escaneo por texto
+
+    Las claves de todas las categorias se compilan en una expresion regular con forma de trie.
+    Cada coincidencia se traduce a las categorias de esa clave y de las claves mas cortas que
+    tambien coinciden en la misma posicion.
+    """
+
+    def __init__(self, categories: List[TopicCategory], mode: str = PREFIX):
+        if mode not in _BOUNDARIES:
+            raise ValueError(f"Modo desconocido: {mode}")
+        self.categories = list(categories)
+        self.mode = mode
+
+        keyword_categories: Dict[str, set] = {}
+        for index, category in enumerate(self.categories):
+            for keyword in category.keywords:
+                keyword = keyword.lower()
+                if keyword:
+                    keyword_categories.setdefault(keyword, set()).add(index)
+        self.keyword_count = len(keyword_categories)
+
+        # Clave encontrada -> categorias (incluye claves mas cortas que coinciden en la misma posicion)
+        self._categories_for: Dict[str, Tuple[int, ...]] = {}
+        for keyword in keyword_categories:
+            indices = set()
+            for end in range(1, len(keyword) + 1):
+                prefix = keyword[:end]
+                if prefix in keyword_categories and self._accepts_prefix(keyword, prefix):
+                    indices |= keyword_categories[prefix]
+            self._categories_for[keyword] = tuple(sorted(indices))
+
+        before, after = _BOUNDARIES[mode]
+        # Lookahead: coincidencias solapadas (se prueba cada posicion sin consumir texto)
+        self._pattern = re.compile(f"(?=({before}(?:{_trie_pattern(keyword_categories)}){after}))") \
+            if keyword_categories else None
+
+    def _accepts_prefix(self, keyword: str, other: str) -> bool:
+        """¿La clave other coincide donde coincide keyword?"""
+        if self.mode != WORD or len(other) == len(keyword):
+            return True
+        # En modo palabra la clave corta debe terminar en un limite de palabra dentro de la larga
+        return not (keyword[len(other)].isalnum() or keyword[len(other)] == '_')
+
+    def match_indices(self, text: str) -> List[int]:
+        """Indices (en el orden de self.categories) de las categorias presentes en el texto"""
+        if not self._pattern or not isinstance(text, str):
+            return []
+        found = set()
+        for match in self._pattern.finditer(text.lower()):
+            found.update(self._categories_for[match.group(1)])
+            if len(found) == len(self.categories):
+                break
+        return sorted(found)
+
+    def match(self, text: str) -> List[TopicCategory]:
+        """Categorias presentes en el texto, en el orden de definicion"""
+        return [self.categories[index] for index in self.match_indices(text)]
+
+    def matches(self, text: str, category: TopicCategory) -> bool:
+        return category in self.match(text)
+
+    def match_keywords(self, text: str) -> Dict[str, List[str]]:
+        """Claves encontradas por categoria (util para explicar una coincidencia)"""
+        if not self._pattern or not isinstance(text, str):
+            return {}
+        found: Dict[str, List[str]] = {}
+        for match in self._pattern.finditer(text.lower()):
+            keyword = match.group(1)
+            for index in self._categories_for[keyword]:
+                keywords = found.setdefault(self.categories[index].category.value, [])
+                if keyword not in keywords:
+                    keywords.append(keyword)
+        return found
+
+_cache: Dict[tuple, KeywordMatcher] = {}
+_cache_lock = threading.Lock()
+
+def get_matcher(categories: List[TopicCategory], mode: str = PREFIX) -> KeywordMatcher:
+    """KeywordMatcher compilado una vez por conjunto de categorias y modo"""
+    key = (mode, tuple((category.category, category.language, tuple(category.keywords)) for category in categories))
+    with _cache_lock:
+        matcher = _cache.get(key)
+        if matcher is None:
+            matcher = KeywordMatcher(categories, mode)
+            _cache[key] = matcher
+        return matcher
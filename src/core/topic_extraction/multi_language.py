@@ -1,13 +1,37 @@
 #-*- coding: utf-8 -*-
-from typing import List, Dict
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List, Dict, Iterable, Tuple
 from domain.entities import AnalyzedText, Topic, Language
-from .base import BaseTopicExtractor
+from .base import BaseTopicExtractor, TopicAccumulator
+
+DEFAULT_SHARD_SIZE = 50000
+
+def _accumulate_shard(extractor: BaseTopicExtractor, texts: List[AnalyzedText]) -> TopicAccumulator:
+    """Trabajo de un shard (funcion de modulo para poder enviarla a otro proceso)"""
+    accumulator = extractor.new_accumulator()
+    extractor.accumulate(texts, accumulator)
+    return accumulator
 
 class MultiLanguageTopicExtractor(BaseTopicExtractor):
-    """Coordinador que delega a extractores especificos por idioma"""
+    """Coordinador que delega a extractores especificos por idioma
+
+    Con workers > 1 los textos de cada idioma se parten en shards de shard_size que se procesan
+    en un pool de hilos (o de procesos con use_processes=True); los acumuladores parciales se
+    fusionan en orden de shard, con el mismo resultado que la ruta en serie.
+    """
     
-    def __init__(self):
+    def __init__(self, workers: int = 1, use_processes: bool = False, shard_size: int = DEFAULT_SHARD_SIZE):
+        if workers < 1:
+            raise ValueError("workers debe ser >= 1")
+        self.workers = workers
+        self.use_processes = use_processes
+        self.shard_size = shard_size
         self.extractors: Dict[Language, BaseTopicExtractor] = {}
+        # Estado incremental de update()/snapshot(), un acumulador por idioma
+        self.accumulators: Dict[Language, TopicAccumulator] = {}
+        self._lock = threading.Lock()
         self._setup_extractors()
     
     def _setup_extractors(self):
@@ -28,18 +52,71 @@ class MultiLanguageTopicExtractor(BaseTopicExtractor):
     
     def extract(self, texts: List[AnalyzedText]) -> List[Topic]:
         """Extraer temas agrupando por idioma - LoGICA DE COORDINACIoN"""
+        accumulators = self.new_accumulator()
+        self.accumulate(texts, accumulators)
+        return self.build_topics(accumulators)
+
+    def new_accumulator(self) -> Dict[Language, TopicAccumulator]:
+        """Estado del coordinador: un acumulador por idioma (se crean al llegar textos)"""
+        return {}
+
+    def accumulate(self, texts: Iterable[AnalyzedText], accumulators: Dict[Language, TopicAccumulator]):
+        """Sumar textos a los acumuladores de su idioma (temas con el idioma de cada extractor)"""
+        self._accumulate(texts, accumulators)
+
+    def build_topics(self, accumulators: Dict[Language, TopicAccumulator]) -> List[Topic]:
+        return self._build_topics(accumulators)
+
+    def update(self, texts: Iterable[AnalyzedText]) -> 'MultiLanguageTopicExtractor':
+        """Sumar un lote nuevo al estado incremental en O(lote)"""
+        with self._lock:
+            self._accumulate(texts, self.accumulators)
+        return self
+
+    def snapshot(self) -> List[Topic]:
+        """Temas de todo lo recibido por update() hasta ahora"""
+        with self._lock:
+            return self._build_topics(self.accumulators)
+
+    def reset(self):
+        with self._lock:
+            self.accumulators = {}
+
+    def _accumulate(self, texts: Iterable[AnalyzedText], accumulators: Dict[Language, TopicAccumulator]):
         # Agrupar textos por idioma
         texts_by_language: Dict[Language, List[AnalyzedText]] = {}
         for text in texts:
-            if text.language not in texts_by_language:
-                texts_by_language[text.language] = []
-            texts_by_language[text.language].append(text)
-        
-        # Extraer temas por idioma
-        all_topics = []
+            texts_by_language.setdefault(text.language, []).append(text)
+
+        shards: List[Tuple[Language, List[AnalyzedText]]] = []
         for language, language_texts in texts_by_language.items():
-            if language in self.extractors:
-                language_topics = self.extractors[language].extract(language_texts)
-                all_topics.extend(language_topics)
-        
-        return all_topics
\ No newline at end of file
+            if language not in self.extractors:
+                continue
+            if language not in accumulators:
+                accumulators[language] = self.extractors[language].new_accumulator()
+            shards.extend((language, language_texts[start:start + self.shard_size])
+                          for start in range(0, len(language_texts), self.shard_size))
+
+        if self.workers == 1 or len(shards) <= 1:
+            for language, shard in shards:
+                self.extractors[language].accumulate(shard, accumulators[language])
+            return
+
+        # map conserva el orden de los shards: la fusion es determinista
+        with self._executor() as executor:
+            partials = executor.map(_accumulate_shard, [self.extractors[language] for language, _ in shards],
+                                    [shard for _, shard in shards])
+            for (language, _), partial in zip(shards, partials):
+                accumulators[language].merge(partial)
+
+    def _executor(self):
+        if self.use_processes:
+            # spawn, igual que el pool de inferencia (seguro con hilos ya creados en el padre)
+            return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='topics')
+
+    def _build_topics(self, accumulators: Dict[Language, TopicAccumulator]) -> List[Topic]:
+        all_topics = []
+        for language, accumulator in accumulators.items():
+            all_topics.extend(self.extractors[language].build_topics(accumulator))
+        return all_topics
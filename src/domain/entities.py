@@ -1,6 +1,6 @@
 # src/domain/entities.py
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from enum import Enum
 
 class Language(Enum):
@@ -21,6 +21,18 @@ class SentimentLabel(Enum):
     POSITIVE = "4 stars"
     VERY_POSITIVE = "5 stars"
 
+def detect_languages(texts: List[str]) -> List[Language]:
+    """Idioma de cada texto en una sola pasada (perfiles de trigramas de core.language_id)"""
+    from core.language_id import get_identifier
+    codes, _ = get_identifier().identify_batch(texts)
+    known = {language.value: language for language in Language}
+    # Sin decision (texto vacio) o idioma sin Language: ingles, como la heuristica anterior
+    return [known.get(code, Language.ENGLISH) for code in codes]
+
+def detect_language(text: str) -> Language:
+    """Idioma de un texto"""
+    return detect_languages([text])[0]
+
 @dataclass
 class TopicCategory:
     """CategorIa de negocio con sus palabras clave - ENTIDAD DE DOMINIO"""
@@ -40,9 +52,11 @@ class AnalyzedText:
     sentiment: SentimentLabel
     confidence: float
     language: Language
+    # Indices de core.text_features.KEYWORD_CATEGORIES ya encontrados (None = calcular al extraer)
+    keyword_hits: Optional[Tuple[int, ...]] = None
     
     @classmethod
-    def from_legacy(cls, legacy_data: Dict[str, Any]) -> 'AnalyzedText':
+    def from_legacy(cls, legacy_data: Dict[str, Any], language: Optional[Language] = None) -> 'AnalyzedText':
         """Factory method para crear desde formato legacy"""
         sentiment_map = {
             '1 star': SentimentLabel.VERY_NEGATIVE,
@@ -52,21 +66,38 @@ class AnalyzedText:
             '5 stars': SentimentLabel.VERY_POSITIVE
         }
         
-        # Deteccion simple de idioma
         text = legacy_data.get('text', '')
-        spanish_indicators = ['el', 'la', 'de', 'que', 'y', 'en', 'un', 'es']
-        english_indicators = ['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on']
-        
-        spanish_count = sum(1 for word in spanish_indicators if word in text.lower())
-        english_count = sum(1 for word in english_indicators if word in text.lower())
-        language = Language.SPANISH if spanish_count > english_count else Language.ENGLISH
-        
         return cls(
             text=text,
             sentiment=sentiment_map.get(legacy_data.get('sentiment', '3 stars'), SentimentLabel.NEUTRAL),
             confidence=legacy_data.get('confidence', 0.5),
-            language=language
+            language=language or detect_language(text)
         )
+    
+    @classmethod
+    def from_legacy_batch(cls, legacy_results: List[Dict[str, Any]]) -> List['AnalyzedText']:
+        """Como from_legacy, detectando el idioma de todo el lote en una pasada"""
+        legacy_results = list(legacy_results)
+        languages = detect_languages([result.get('text', '') for result in legacy_results])
+        return [cls.from_legacy(result, language) for result, language in zip(legacy_results, languages)]
+
+    @classmethod
+    def from_result_batch(cls, batch) -> List['AnalyzedText']:
+        """Desde un ResultBatch: reutiliza idioma y claves de batch.features si los tiene"""
+        features = batch.features
+        if features is None:
+            return cls.from_legacy_batch(batch)
+        known = {language.value: language for language in Language}
+        return [
+            cls(
+                text=result['text'] or '',
+                sentiment=SentimentLabel(result['sentiment']) if star else SentimentLabel.NEUTRAL,
+                confidence=result['confidence'],
+                language=known.get(features.language(i), Language.ENGLISH),
+                keyword_hits=features.keyword_hits(i)
+            )
+            for i, (result, star) in enumerate(zip(batch, batch.star_ids.tolist()))
+        ]
 
 @dataclass
 class Topic:
@@ -0,0 +1,188 @@
+# src/domain/result_batch.py
+from typing import List, Dict, Any, Optional, Sequence, Iterator, Union
+
+import numpy as np
+
+from domain.entities import SentimentLabel
+
+# Escala de estrellas <-> id compacto (0 = etiqueta fuera de la escala, p.ej. un fallo)
+STAR_LABELS = {index + 1: label.value for index, label in enumerate(SentimentLabel)}
+STAR_IDS = {label: star for star, label in STAR_LABELS.items()}
+
+def star_id(label: str) -> int:
+    """'4 stars' -> 4; cualquier otra etiqueta -> 0"""
+    return STAR_IDS.get(label, 0)
+
+class ResultBatch:
+    """Resultados de sentimiento en columnas - ENTIDAD DE DOMINIO
+
+    Guarda estrellas (int8) y confianzas (float32) en arrays de NumPy e indices de fila
+    hacia el origen en lugar de copiar el texto. Iterar devuelve los dicts legacy.
+    """
+
+    def __init__(self, star_ids: np.ndarray, confidences: np.ndarray, row_indices: np.ndarray,
+                 source: Optional[Sequence[str]] = None, aspects: Optional[List[List[str]]] = None,
+                 other_labels: Optional[Dict[int, str]] = None, method: str = 'BERT',
+                 model_used: Optional[str] = None, features=None):
+        self.star_ids = np.asarray(star_ids, dtype=np.int8)
+        self.confidences = np.asarray(confidences, dtype=np.float32)
+        self.row_indices = np.asarray(row_indices, dtype=np.int64)
+        # source[row_indices[i]] es el texto de la fila i (posicional)
+        self.source = source
+        self.aspects = aspects
+        # Etiquetas fuera de la escala (star_id == 0), por posicion, para no perderlas
+        self.other_labels = other_labels or {}
+        self.method = method
+        self.model_used = model_used
+        # core.text_features.TextFeatures alineado con las filas (opcional): idioma y claves
+        self.features = features
+
+    @classmethod
+    def from_results(cls, results: Sequence[Dict[str, Any]], row_indices: Optional[Sequence[int]] = None,
+                     source: Optional[Sequence[str]] = None) -> 'ResultBatch':
+        """Construir desde dicts legacy (si no hay source, los textos de los dicts hacen de source)"""
+        labels = [r['sentiment'] for r in results]
+        star_ids = np.fromiter((star_id(label) for label in labels), dtype=np.int8, count=len(labels))
+        other_labels = {i: label for i, label in enumerate(labels) if star_ids[i] == 0}
+        if source is None:
+            source = [r.get('text') for r in results]
+            row_indices = None
+        return cls(
+            star_ids=star_ids,
+            confidences=np.fromiter((r.get('confidence', 0.0) for r in results), dtype=np.float32, count=len(results)),
+            row_indices=np.arange(len(results)) if row_indices is None else row_indices,
+            source=source,
+            aspects=[r.get('aspects', []) for r in results],
+            other_labels=other_labels,
+            method=results[0].get('method', 'BERT') if results else 'BERT',
+            model_used=results[0].get('model_used') if results else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.star_ids)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self.to_dict(i)
+
+    def __getitem__(self, index: Union[int, slice, np.ndarray]) -> Union[Dict[str, Any], 'ResultBatch']:
+        if isinstance(index, (int, np.integer)):
+            return self.to_dict(int(index))
+        return self.select(index)
+
+    def label(self, i: int) -> str:
+        star = int(self.star_ids[i])
+        return STAR_LABELS[star] if star else self.other_labels.get(i, 'NEUTRAL')
+
+    def text(self, i: int) -> Optional[str]:
+        if self.source is None:
+            return None
+        row = int(self.row_indices[i])
+        return self.source.iloc[row] if hasattr(self.source, 'iloc') else self.source[row]
+
+    def to_dict(self, i: int) -> Dict[str, Any]:
+        """Vista de compatibilidad con el formato legacy del dashboard"""
+        result = {
+            'text': self.text(i),
+            'sentiment': self.label(i),
+            'confidence': float(self.confidences[i]),
+            'aspects': self.aspects[i] if self.aspects is not None else [],
+            'method': self.method
+        }
+        if self.model_used is not None:
+            result['model_used'] = self.model_used
+        return result
+
+    def select(self, index: Union[slice, np.ndarray, Sequence[int]]) -> 'ResultBatch':
+        """Subconjunto por mascara booleana, slice o posiciones"""
+        positions = np.arange(len(self))[index]
+        remap = {int(old): new for new, old in enumerate(positions) if int(old) in self.other_labels}
+        return ResultBatch(
+            star_ids=self.star_ids[positions],
+            confidences=self.confidences[positions],
+            row_indices=self.row_indices[positions],
+            source=self.source,
+            aspects=[self.aspects[p] for p in positions] if self.aspects is not None else None,
+            other_labels={new: self.other_labels[old] for old, new in remap.items()},
+            method=self.method,
+            model_used=self.model_used,
+            features=self.features.take(positions) if self.features is not None else None
+        )
+
+    def to_arrow(self, languages: Optional[Sequence[str]] = None):
+        """Tabla Arrow tipada: row int64, star_id int8, confidence float32, language dictionary, aspects list<string>
+
+        Sin languages se usa el idioma de features o se detecta el de cada texto del source (si lo hay).
+        """
+        import pyarrow as pa
+
+        if languages is None and self.features is not None:
+            languages = self.features.languages
+        if languages is None and self.source is not None:
+            from core.language_id import get_identifier
+            languages, _ = get_identifier().identify_batch([self.text(i) for i in range(len(self))])
+        columns = {
+            'row': pa.array(self.row_indices, type=pa.int64()),
+            'star_id': pa.array(self.star_ids, type=pa.int8()),
+            'sentiment': pa.array([self.label(i) for i in range(len(self))], type=pa.string()).dictionary_encode(),
+            'confidence': pa.array(self.confidences, type=pa.float32()),
+            'language': pa.array(languages if languages is not None else [None] * len(self),
+                                 type=pa.string()).dictionary_encode(),
+            'aspects': pa.array(self.aspects if self.aspects is not None else [[] for _ in range(len(self))],
+                                type=pa.list_(pa.string()))
+        }
+        metadata = {'method': self.method, 'model_used': self.model_used or ''}
+        return pa.table(columns, metadata=metadata)
+
+    # --- Accesores vectorizados ---
+
+    def star_counts(self) -> np.ndarray:
+        """Conteo por id de estrella: posicion 0 = fuera de escala, 1..5 = estrellas"""
+        return np.bincount(self.star_ids.astype(np.int64), minlength=6)
+
+    def distribution(self) -> Dict[str, int]:
+        """Conteo por etiqueta (equivalente a Counter de las etiquetas)"""
+        counts = self.star_counts()
+        distribution = {STAR_LABELS[star]: int(counts[star]) for star in range(1, 6) if counts[star]}
+        for label in self.other_labels.values():
+            distribution[label] = distribution.get(label, 0) + 1
+        return distribution
+
+    def average_rating(self) -> float:
+        """Promedio de estrellas sobre las filas dentro de la escala"""
+        rated = self.star_ids[self.star_ids > 0]
+        return float(rated.mean()) if len(rated) else 0.0
+
+    def positive_mask(self) -> np.ndarray:
+        return self.star_ids >= 4
+
+    def negative_mask(self) -> np.ndarray:
+        return (self.star_ids >= 1) & (self.star_ids <= 2)
+
+    def neutral_mask(self) -> np.ndarray:
+        return self.star_ids == 3
+
+    @classmethod
+    def concat(cls, batches: Sequence['ResultBatch']) -> 'ResultBatch':
+        """Unir lotes que comparten el mismo source"""
+        if not batches:
+            return cls(np.zeros(0), np.zeros(0), np.zeros(0))
+        offsets = np.cumsum([0] + [len(batch) for batch in batches[:-1]])
+        other_labels = {int(offset) + i: label
+                        for batch, offset in zip(batches, offsets) for i, label in batch.other_labels.items()}
+        has_aspects = all(batch.aspects is not None for batch in batches)
+        features = None
+        if all(batch.features is not None for batch in batches):
+            from core.text_features import TextFeatures
+            features = TextFeatures.concat([batch.features for batch in batches])
+        return cls(
+            star_ids=np.concatenate([batch.star_ids for batch in batches]),
+            confidences=np.concatenate([batch.confidences for batch in batches]),
+            row_indices=np.concatenate([batch.row_indices for batch in batches]),
+            source=batches[0].source,
+            aspects=[a for batch in batches for a in batch.aspects] if has_aspects else None,
+            other_labels=other_labels,
+            method=batches[0].method,
+            model_used=batches[0].model_used,
+            features=features
+        )
@@ -0,0 +1,64 @@
+"""Agreement check between BERTModel backends on a sample corpus"""
+
+import logging
+import time
+from typing import Dict, Any, List, Optional, Sequence
+
+from models.backends import PYTORCH, PYTORCH_INT8, ONNX
+
+logger = logging.getLogger(__name__)
+
+def compare_backends(texts: Sequence[str], backends: Optional[List[str]] = None,
+                     reference: str = PYTORCH, onnx_path: Optional[str] = None,
+                     batch_size: Optional[int] = None, model_name: Optional[str] = None,
+                     label_map: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Correr el mismo corpus en cada backend y reportar acuerdo de etiquetas y latencia"""
+    from models.bert_model import BERTModel, MODEL_NAME
+
+    if backends is None:
+        backends = [PYTORCH, PYTORCH_INT8] + ([ONNX] if onnx_path else [])
+    if reference not in backends:
+        backends = [reference] + list(backends)
+
+    texts = list(texts)
+    labels: Dict[str, List[str]] = {}
+    report: Dict[str, Any] = {'sample_size': len(texts), 'reference': reference, 'backends': {}}
+
+    for name in backends:
+        started = time.perf_counter()
+        model = BERTModel(backend=name, onnx_path=onnx_path, model_name=model_name or MODEL_NAME,
+                          label_map=label_map)
+        load_seconds = time.perf_counter() - started
+
+        # Un pase de calentamiento para no medir la inicializacion perezosa del backend
+        model.analyze_batch(texts[:1])
+        started = time.perf_counter()
+        results = model.analyze_batch(texts, batch_size=batch_size)
+        seconds = time.perf_counter() - started
+
+        labels[name] = [r['sentiment'] for r in results]
+        report['backends'][name] = {
+            'load_seconds': load_seconds,
+            'total_seconds': seconds,
+            'latency_ms_per_text': seconds / len(texts) * 1000 if texts else 0.0,
+            'failures': sum(1 for r in results if not r['success'])
+        }
+        logger.info(f"Backend {name}: {seconds:.2f}s for {len(texts)} texts")
+
+    for name, entry in report['backends'].items():
+        pairs = list(zip(labels[reference], labels[name]))
+        entry['label_agreement'] = sum(1 for a, b in pairs if a == b) / len(pairs) if pairs else 0.0
+        entry['within_one_star'] = sum(
+            1 for a, b in pairs if abs(_stars(a) - _stars(b)) <= 1
+        ) / len(pairs) if pairs else 0.0
+        entry['speedup'] = (report['backends'][reference]['total_seconds'] / entry['total_seconds']
+                            if entry['total_seconds'] > 0 else 0.0)
+
+    return report
+
+def _stars(label: str) -> int:
+    """'4 stars' -> 4; etiquetas desconocidas -> 0"""
+    try:
+        return int(label.split()[0])
+    except (ValueError, IndexError, AttributeError):
+        return 0
@@ -0,0 +1,153 @@
+"""Inference backends for BERTModel: PyTorch fp32, PyTorch dynamic int8 and ONNX Runtime"""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+PYTORCH = 'pytorch'
+PYTORCH_INT8 = 'pytorch-int8'
+ONNX = 'onnx'
+
+class InferenceBackend(ABC):
+    """Interface: recibe features ya tokenizadas con padding (numpy) y devuelve logits (numpy)"""
+
+    name = ''
+
+    def __init__(self):
+        self.id2label: Dict[int, str] = {}
+        self.version = 'unknown'
+
+    @abstractmethod
+    def load(self, model_name: str):
+        """Cargar pesos del backend"""
+        pass
+
+    @abstractmethod
+    def forward(self, features: Dict[str, Any]) -> Any:
+        """Forward pass sobre un lote con padding; devuelve logits (lote x clases)"""
+        pass
+
+    def memory_bytes(self) -> Optional[int]:
+        """Memoria aproximada de los pesos cargados (None si no se puede medir)"""
+        return None
+
+class PyTorchBackend(InferenceBackend):
+    """Modelo fp32 de transformers"""
+
+    name = PYTORCH
+
+    def __init__(self):
+        super().__init__()
+        self.model = None
+
+    def load(self, model_name: str):
+        from transformers import AutoModelForSequenceClassification
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.model.eval()
+        self.id2label = dict(self.model.config.id2label)
+        # Revision del hub: si cambian los pesos cambia la version y se invalida la cache
+        self.version = getattr(self.model.config, '_commit_hash', None) or 'unknown'
+
+    def forward(self, features: Dict[str, Any]) -> Any:
+        import torch
+        inputs = {key: torch.from_numpy(value) for key, value in features.items()}
+        with torch.inference_mode():
+            return self.model(**inputs).logits.numpy()
+
+    def memory_bytes(self) -> Optional[int]:
+        tensors = list(self.model.parameters()) + list(self.model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+class QuantizedPyTorchBackend(PyTorchBackend):
+    """Cuantizacion dinamica int8 de las capas Linear (solo CPU)"""
+
+    name = PYTORCH_INT8
+
+    def load(self, model_name: str):
+        import torch
+        super().load(model_name)
+        self.model = torch.ao.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.version = f"{self.version}+int8"
+
+    def memory_bytes(self) -> Optional[int]:
+        # Los pesos int8 empaquetados no aparecen como parametros
+        return None
+
+class ONNXBackend(InferenceBackend):
+    """Export ONNX cargado desde un directorio local (model.onnx + config/tokenizer)"""
+
+    name = ONNX
+
+    def __init__(self, onnx_path: str):
+        super().__init__()
+        self.onnx_path = onnx_path
+        self.session = None
+        self._input_names = set()
+
+    def load(self, model_name: str):
+        import onnxruntime
+        from transformers import AutoConfig
+
+        model_file = os.path.join(self.onnx_path, 'model.onnx')
+        if not os.path.exists(model_file):
+            raise FileNotFoundError(f"ONNX model not found: {model_file}")
+
+        self.session = onnxruntime.InferenceSession(model_file, providers=['CPUExecutionProvider'])
+        self._input_names = {node.name for node in self.session.get_inputs()}
+        self.id2label = dict(AutoConfig.from_pretrained(self.onnx_path).id2label)
+        stat = os.stat(model_file)
+        self.version = f"onnx-{stat.st_size}-{int(stat.st_mtime)}"
+
+    def forward(self, features: Dict[str, Any]) -> Any:
+        inputs = {key: value.astype('int64') for key, value in features.items() if key in self._input_names}
+        return self.session.run(None, inputs)[0]
+
+    def memory_bytes(self) -> Optional[int]:
+        return os.path.getsize(os.path.join(self.onnx_path, 'model.onnx'))
+
+def create_backend(name: str, onnx_path: Optional[str] = None) -> InferenceBackend:
+    """Fabrica de backends por nombre"""
+    if name == PYTORCH:
+        return PyTorchBackend()
+    if name == PYTORCH_INT8:
+        return QuantizedPyTorchBackend()
+    if name == ONNX:
+        if not onnx_path:
+            raise ValueError("El backend ONNX necesita onnx_path")
+        return ONNXBackend(onnx_path)
+    raise ValueError(f"Backend desconocido: {name}")
+
+def export_onnx(model_name: str, output_dir: str, opset: int = 14) -> str:
+    """Exportar el modelo de transformers a output_dir/model.onnx junto con config y tokenizer"""
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    dummy = tokenizer(["export"], return_tensors="pt")
+    # Mismo orden que la firma de forward(), que es como se nombran las entradas del grafo
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in dummy]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['logits'] = {0: 'batch'}
+
+    model_file = os.path.join(output_dir, 'model.onnx')
+    torch.onnx.export(
+        model,
+        # Un dict como ultimo argumento se pasa como kwargs al forward
+        ({name: dummy[name] for name in input_names},),
+        model_file,
+        input_names=input_names,
+        output_names=['logits'],
+        dynamic_axes=dynamic_axes,
+        opset_version=opset
+    )
+    tokenizer.save_pretrained(output_dir)
+    model.config.save_pretrained(output_dir)
+    logger.info(f"ONNX export written to {model_file}")
+    return model_file
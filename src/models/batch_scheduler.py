@@ -0,0 +1,109 @@
+"""Length-bucketed, token-budget batch scheduler for BERT inference"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Sequence
+
+DEFAULT_MAX_TOKENS = 8192
+DEFAULT_MAX_BATCH_SIZE = 64
+MIN_BUCKET = 16
+
+def bucket_for(length: int) -> int:
+    """Bucket = siguiente potencia de dos >= longitud (minimo MIN_BUCKET)"""
+    bucket = MIN_BUCKET
+    while bucket < length:
+        bucket *= 2
+    return bucket
+
+@dataclass
+class BatchStats:
+    """Estadisticas de un lote ejecutado"""
+    bucket: int
+    size: int
+    real_tokens: int
+    padded_tokens: int
+    seconds: float = 0.0
+
+    @property
+    def padding_ratio(self) -> float:
+        return 1 - self.real_tokens / self.padded_tokens if self.padded_tokens else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.real_tokens / self.seconds if self.seconds > 0 else 0.0
+
+@dataclass
+class SchedulerReport:
+    """Acumula BatchStats de una llamada y los resume por bucket"""
+    batches: List[BatchStats] = field(default_factory=list)
+    naive_padded_tokens: int = 0
+
+    def record(self, stats: BatchStats):
+        self.batches.append(stats)
+
+    def summary(self) -> Dict[str, Any]:
+        buckets: Dict[int, Dict[str, Any]] = {}
+        for stats in self.batches:
+            entry = buckets.setdefault(stats.bucket, {
+                'batches': 0, 'texts': 0, 'real_tokens': 0, 'padded_tokens': 0, 'seconds': 0.0
+            })
+            entry['batches'] += 1
+            entry['texts'] += stats.size
+            entry['real_tokens'] += stats.real_tokens
+            entry['padded_tokens'] += stats.padded_tokens
+            entry['seconds'] += stats.seconds
+
+        for entry in buckets.values():
+            entry['padding_ratio'] = 1 - entry['real_tokens'] / entry['padded_tokens'] if entry['padded_tokens'] else 0.0
+            entry['tokens_per_second'] = entry['real_tokens'] / entry['seconds'] if entry['seconds'] > 0 else 0.0
+
+        real = sum(s.real_tokens for s in self.batches)
+        padded = sum(s.padded_tokens for s in self.batches)
+        seconds = sum(s.seconds for s in self.batches)
+        return {
+            'buckets': dict(sorted(buckets.items())),
+            'batches': len(self.batches),
+            'texts': sum(s.size for s in self.batches),
+            'real_tokens': real,
+            'padded_tokens': padded,
+            'padding_ratio': 1 - real / padded if padded else 0.0,
+            'tokens_per_second': real / seconds if seconds > 0 else 0.0,
+            # Lo que habria costado el lote fijo en orden original, para ver el ahorro
+            'naive_padded_tokens': self.naive_padded_tokens,
+            'naive_padding_ratio': 1 - real / self.naive_padded_tokens if self.naive_padded_tokens else 0.0
+        }
+
+class TokenBudgetScheduler:
+    """Ordena por longitud tokenizada y forma lotes bajo un presupuesto de tokens"""
+
+    def __init__(self, max_tokens: int = DEFAULT_MAX_TOKENS, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+        if max_tokens <= 0 or max_batch_size <= 0:
+            raise ValueError("max_tokens y max_batch_size deben ser positivos")
+        self.max_tokens = max_tokens
+        self.max_batch_size = max_batch_size
+
+    def schedule(self, lengths: Sequence[int]) -> List[List[int]]:
+        """Devolver lotes de indices; cada lote cumple len(lote) * max_longitud <= max_tokens"""
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+        batches: List[List[int]] = []
+        current: List[int] = []
+
+        for index in order:
+            # Orden ascendente: la longitud actual es la maxima del lote si se agrega
+            padded_length = max(lengths[index], 1)
+            if current and (padded_length * (len(current) + 1) > self.max_tokens
+                            or len(current) >= self.max_batch_size):
+                batches.append(current)
+                current = []
+            current.append(index)
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def naive_padded_tokens(self, lengths: Sequence[int]) -> int:
+        """Tokens con padding si se usaran lotes fijos de max_batch_size en orden original"""
+        total = 0
+        for start in range(0, len(lengths), self.max_batch_size):
+            chunk = lengths[start:start + self.max_batch_size]
+            total += max(chunk) * len(chunk)
+        return total
@@ -2,61 +2,301 @@
 """Responsabilidad: Interactuar con tecnologias externas (BERT, APIs, bases de datos)."""
 
 import logging
-from typing import Dict, Any
+import threading
+import time
+from typing import Dict, Any, List, Sequence, Optional, Tuple, Callable
+
+from models.batch_scheduler import TokenBudgetScheduler, SchedulerReport, BatchStats, bucket_for, DEFAULT_MAX_TOKENS
+from models.backends import create_backend, PYTORCH, ONNX
 
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = "nlptown/bert-base-multilingual-uncased-sentiment"
+MAX_LENGTH = 512
+DEFAULT_BATCH_SIZE = 32
+
+# Estados de carga del modelo
+NOT_LOADED = 'not_loaded'
+LOADING = 'loading'
+WARMING_UP = 'warming_up'
+READY = 'ready'
+ERROR = 'error'
+
+WARMUP_TEXTS = [
+    "warm up",
+    "This is a short warm up sentence for the sentiment model.",
+    "Esta es una frase de calentamiento un poco mas larga para el modelo de sentimiento."
+]
+
 class BERTModel:
     """BERT-based sentiment analysis model"""
-    
-    def __init__(self):
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, max_tokens: int = DEFAULT_MAX_TOKENS,
+                 backend: str = PYTORCH, onnx_path: Optional[str] = None, lazy: bool = False,
+                 model_name: str = MODEL_NAME, label_map: Optional[Dict[str, str]] = None):
         self.model = None
-        self._load_model()
-    
+        self.model_name = model_name
+        # Traduce etiquetas propias del modelo (p.ej. POSITIVE) a la escala de estrellas
+        self.label_map = label_map or {}
+        self.tokenizer = None
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.backend = backend
+        self.onnx_path = onnx_path
+        self.last_report = SchedulerReport()
+        # Cada backend produce scores distintos, asi que forma parte de la identidad en cache
+        self.model_id = model_name if backend == PYTORCH else f"{model_name}:{backend}"
+        self.model_version = None
+
+        self.state = NOT_LOADED
+        self.timings: Dict[str, float] = {}
+        self._load_error: Optional[Exception] = None
+        self._load_lock = threading.Lock()
+        self._load_callbacks: List[Callable[['BERTModel'], None]] = []
+        self._ready = threading.Event()
+        if not lazy:
+            self.load()
+
+    def load(self, warmup: bool = False):
+        """Load the model once (thread-safe); later calls return immediately
+
+        warmup=True runs the warm-up pass before the model reports READY.
+        """
+        if self.model is not None:
+            return
+        with self._load_lock:
+            if self.model is not None:
+                return
+            if self._load_error is not None:
+                raise self._load_error
+            self.state = LOADING
+            try:
+                backend = self._load_model()
+                # Callbacks (p.ej. invalidar la cache) antes de publicar el modelo a otros hilos
+                for callback in self._load_callbacks:
+                    callback(self)
+            except Exception as e:
+                self._load_error = e
+                self.state = ERROR
+                self._ready.set()
+                raise
+            self.model = backend
+
+            if warmup:
+                self.state = WARMING_UP
+                try:
+                    self._run_warmup(WARMUP_TEXTS)
+                except Exception as e:
+                    logger.warning(f"BERT warm-up failed: {e}")
+            self.state = READY
+            self._ready.set()
+
+    def unload(self):
+        """Drop weights and tokenizer so the memory can be reclaimed; load() works again later"""
+        with self._load_lock:
+            self.model = None
+            self.tokenizer = None
+            self.state = NOT_LOADED
+            self._ready.clear()
+
+    def memory_mb(self) -> Optional[float]:
+        """Measured size of the loaded weights in MB (None if unknown or not loaded)"""
+        size = self.model.memory_bytes() if self.model is not None else None
+        return size / (1024 * 1024) if size is not None else None
+
+    def on_load(self, callback: Callable[['BERTModel'], None]):
+        """Register a callback run after loading (immediately if already loaded)"""
+        self._load_callbacks.append(callback)
+        if self.model is not None:
+            callback(self)
+
+    def start_background_load(self, warmup: bool = True) -> threading.Thread:
+        """Preload (and optionally warm up) in a daemon thread"""
+        def _run():
+            try:
+                self.load(warmup=warmup)
+            except Exception as e:
+                logger.error(f"Background BERT load failed: {e}")
+
+        thread = threading.Thread(target=_run, name='bert-preload', daemon=True)
+        thread.start()
+        return thread
+
+    def warmup(self, texts: Optional[List[str]] = None):
+        """Run dummy inputs through the model so first real requests don't pay lazy init costs"""
+        if self.model is None and texts is None:
+            self.load(warmup=True)
+            return
+        self.load()
+        # Ya cargado: calentar no cambia el estado de readiness
+        self._run_warmup(texts or WARMUP_TEXTS)
+
+    def _run_warmup(self, texts: Sequence[str]):
+        started = time.perf_counter()
+        self.analyze_batch(texts)
+        self.timings['warmup_seconds'] = time.perf_counter() - started
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout) and self.state != ERROR
+
+    def readiness(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'error': str(self._load_error) if self._load_error else None,
+            **self.timings
+        }
+
     def _load_model(self):
-        """Load BERT model"""
+        """Load BERT tokenizer and the selected inference backend (returned, not yet published)"""
         try:
-            from transformers import pipeline
-            logger.info("Loading BERT model...")
-            self.model = pipeline(
-                "sentiment-analysis",
-                model="nlptown/bert-base-multilingual-uncased-sentiment",
-                truncation=True
-            )
+            started = time.perf_counter()
+            from transformers import AutoTokenizer
+            self.timings['import_seconds'] = time.perf_counter() - started
+
+            logger.info(f"Loading BERT model ({self.backend})...")
+            started = time.perf_counter()
+            backend = create_backend(self.backend, self.onnx_path)
+            backend.load(self.model_name)
+            # El export ONNX lleva su propio tokenizer junto al modelo
+            self.tokenizer = AutoTokenizer.from_pretrained(self.onnx_path if self.backend == ONNX else self.model_name)
+            self.model_version = backend.version
+            self.timings['load_seconds'] = time.perf_counter() - started
             logger.info("BERT model loaded successfully")
+            # load() lo publica en self.model despues de los callbacks
+            return backend
         except ImportError:
             logger.error("Transformers not available")
             raise
         except Exception as e:
             logger.error(f"Error loading BERT: {e}")
             raise
-    
+
     def analyze_text(self, text: str) -> Dict[str, Any]:
         """Analyze sentiment using BERT"""
         try:
-            result = self.model(text[:512])[0]
-            return {
-                'text': text,
-                'sentiment': result['label'],
-                'confidence': result['score'],
-                'model': 'BERT',
-                'success': True
-            }
+            self.load()
+            label, score = self._predict([text])[0]
+            return self._success_result(text, label, score)
         except Exception as e:
             logger.error(f"Error analyzing with BERT: {e}")
-            return {
-                'text': text,
-                'sentiment': 'NEUTRAL',
-                'confidence': 0.0,
-                'model': 'BERT',
-                'success': False,
-                'error': str(e)
-            }
-    
+            return self._error_result(text, e)
+
+    def analyze_batch(self, texts: Sequence[str], batch_size: Optional[int] = None,
+                      max_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Analyze many texts in length-bucketed minibatches under a token budget"""
+        self.load()
+        scheduler = TokenBudgetScheduler(max_tokens=max_tokens or self.max_tokens,
+                                         max_batch_size=batch_size or self.batch_size)
+        report = SchedulerReport()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+
+        valid: List[int] = []
+        for i, text in enumerate(texts):
+            if isinstance(text, str):
+                valid.append(i)
+            else:
+                results[i] = self._error_result(text, TypeError("BERT input must be a string"))
+
+        try:
+            encoded = self._encode([texts[i] for i in valid])
+        except Exception as e:
+            logger.warning(f"Batch tokenization failed ({e}), analyzing per item")
+            for i in valid:
+                results[i] = self.analyze_text(texts[i])
+            self.last_report = report
+            return results
+
+        lengths = [len(ids) for ids in encoded['input_ids']]
+        report.naive_padded_tokens = scheduler.naive_padded_tokens(lengths)
+
+        for batch in scheduler.schedule(lengths):
+            batch_lengths = [lengths[j] for j in batch]
+            stats = BatchStats(
+                bucket=bucket_for(max(batch_lengths)),
+                size=len(batch),
+                real_tokens=sum(batch_lengths),
+                padded_tokens=max(batch_lengths) * len(batch)
+            )
+            started = time.perf_counter()
+            try:
+                features = {key: [encoded[key][j] for j in batch] for key in encoded.keys()}
+                predictions = self._predict_encoded(features)
+            except Exception as e:
+                # Aislar el fallo: reintentar item por item para que una fila mala no tumbe el lote
+                logger.warning(f"Batch of {len(batch)} failed ({e}), retrying per item")
+                for j in batch:
+                    results[valid[j]] = self.analyze_text(texts[valid[j]])
+                continue
+            stats.seconds = time.perf_counter() - started
+            report.record(stats)
+
+            for j, (label, score) in zip(batch, predictions):
+                results[valid[j]] = self._success_result(texts[valid[j]], label, score)
+
+        self.last_report = report
+        return results
+
+    def _encode(self, texts: List[str]) -> Dict[str, List[List[int]]]:
+        """Tokenize without padding; padding is applied per scheduled batch"""
+        return self.tokenizer(
+            [text[:MAX_LENGTH] for text in texts],
+            truncation=True,
+            max_length=MAX_LENGTH
+        )
+
+    def _predict(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """Run one padded forward pass and return (label, score) per text"""
+        if not all(isinstance(text, str) for text in texts):
+            raise TypeError("BERT input must be a string")
+        return self._predict_encoded(self._encode(texts))
+
+    def _predict_encoded(self, features: Dict[str, List[List[int]]]) -> List[Tuple[str, float]]:
+        """Pad already-tokenized features and run a single forward pass on the backend"""
+        import numpy as np
+
+        padded = self.tokenizer.pad(dict(features), padding=True, return_tensors="np")
+        logits = self.model.forward(dict(padded)).astype(np.float64)
+
+        # Softmax en numpy: mismo esquema de resultado para todos los backends
+        logits -= logits.max(axis=-1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=-1, keepdims=True)
+        label_ids = probabilities.argmax(axis=-1)
+        scores = probabilities[np.arange(len(label_ids)), label_ids]
+        id2label = self.model.id2label
+        return [(self.label_map.get(id2label[label_id], id2label[label_id]), score) for label_id, score in zip(label_ids.tolist(), scores.tolist())]
+
+    def cached_result(self, text: str, cached: Dict[str, Any]) -> Dict[str, Any]:
+        """Rebuild a full result from a cached (sentiment, confidence) entry"""
+        return self._success_result(text, cached['sentiment'], cached['confidence'])
+
+    def _success_result(self, text: str, label: str, score: float) -> Dict[str, Any]:
+        return {
+            'text': text,
+            'sentiment': label,
+            'confidence': score,
+            'model': 'BERT',
+            'success': True
+        }
+
+    def _error_result(self, text: str, error: Exception) -> Dict[str, Any]:
+        return {
+            'text': text,
+            'sentiment': 'NEUTRAL',
+            'confidence': 0.0,
+            'model': 'BERT',
+            'success': False,
+            'error': str(error)
+        }
+
     def get_model_info(self) -> Dict[str, Any]:
         return {
             'name': 'BERT',
+            'model_name': self.model_name,
             'provider': 'Hugging Face',
             'type': 'Transformer',
-            'status': 'loaded' if self.model else 'error'
-        }
\ No newline at end of file
+            'backend': self.backend,
+            'model_id': self.model_id,
+            'version': self.model_version,
+            'status': 'loaded' if self.model else self.state
+        }
@@ -0,0 +1,190 @@
+"""Model registry: named sentiment models, loaded on demand under a RAM budget"""
+
+import gc
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Callable, Iterator
+
+from models.bert_model import BERTModel, MODEL_NAME
+from models.backends import PYTORCH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = 'bert-multilingual'
+
+@dataclass
+class ModelSpec:
+    """Descripcion de un modelo registrable"""
+    name: str
+    model_name: str
+    description: str
+    # Etiquetas del modelo -> escala de estrellas, para que todos devuelvan el mismo esquema
+    label_map: Dict[str, str] = field(default_factory=dict)
+    # Estimacion usada hasta poder medir el modelo cargado
+    memory_mb: float = 700.0
+    backend: str = PYTORCH
+    onnx_path: Optional[str] = None
+
+    def model_kwargs(self) -> Dict[str, Any]:
+        """Argumentos de BERTModel para este modelo"""
+        return {
+            'model_name': self.model_name,
+            'label_map': self.label_map,
+            'backend': self.backend,
+            'onnx_path': self.onnx_path
+        }
+
+DEFAULT_MODELS = [
+    ModelSpec(
+        name=DEFAULT_MODEL,
+        model_name=MODEL_NAME,
+        description='Multilingual BERT, 1-5 stars',
+        memory_mb=680.0
+    ),
+    ModelSpec(
+        name='english-binary',
+        model_name='distilbert-base-uncased-finetuned-sst-2-english',
+        description='English DistilBERT, positive/negative',
+        label_map={'POSITIVE': '5 stars', 'NEGATIVE': '1 star'},
+        memory_mb=270.0
+    ),
+    ModelSpec(
+        name='distilled-multilingual',
+        model_name='lxyuan/distilbert-base-multilingual-cased-sentiments-student',
+        description='Distilled multilingual DistilBERT, positive/neutral/negative',
+        label_map={'positive': '5 stars', 'neutral': '3 stars', 'negative': '1 star'},
+        memory_mb=520.0
+    )
+]
+
+class ModelRegistry:
+    """Registro de modelos con carga bajo demanda y desalojo LRU por presupuesto de memoria"""
+
+    def __init__(self, specs: Optional[List[ModelSpec]] = None, memory_budget_mb: Optional[float] = None,
+                 on_load: Optional[Callable[[BERTModel], None]] = None):
+        self.memory_budget_mb = memory_budget_mb
+        self._on_load = on_load
+        self._specs: Dict[str, ModelSpec] = {}
+        self._models: Dict[str, BERTModel] = {}
+        # Modelos cargados en orden de uso (el primero es el menos reciente) -> MB
+        self._loaded: "OrderedDict[str, float]" = OrderedDict()
+        # Usos en curso por modelo (use()): un modelo en uso nunca se desaloja
+        self._in_use: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.evictions = 0
+        for spec in specs if specs is not None else DEFAULT_MODELS:
+            self.register(spec)
+
+    def register(self, spec: ModelSpec):
+        with self._lock:
+            if spec.name in self._loaded:
+                self.unload(spec.name)
+            self._specs[spec.name] = spec
+            self._models.pop(spec.name, None)
+
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def spec(self, name: str) -> ModelSpec:
+        if name not in self._specs:
+            raise KeyError(f"Modelo no registrado: {name}. Disponibles: {self.names()}")
+        return self._specs[name]
+
+    def peek(self, name: str) -> BERTModel:
+        """Devolver el BERTModel (perezoso) sin cargar pesos"""
+        with self._lock:
+            if name not in self._models:
+                model = BERTModel(lazy=True, **self.spec(name).model_kwargs())
+                if self._on_load:
+                    model.on_load(self._on_load)
+                self._models[name] = model
+            return self._models[name]
+
+    def get(self, name: str, warmup: bool = False) -> BERTModel:
+        """Devolver el modelo cargado, cargandolo (y calentandolo) y desalojando otros si hace falta"""
+        with self._lock:
+            model = self.peek(name)
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+                return model
+
+        # Cargar fuera del lock: puede tardar segundos
+        model.load(warmup=warmup)
+
+        with self._lock:
+            measured = model.memory_mb()
+            self._loaded[name] = measured if measured is not None else self.spec(name).memory_mb
+            self._loaded.move_to_end(name)
+            self._enforce_budget(keep=name)
+        return model
+
+    @contextmanager
+    def use(self, name: str, warmup: bool = False) -> Iterator[BERTModel]:
+        """Modelo cargado y protegido contra desalojo mientras dure el bloque"""
+        with self._lock:
+            self._in_use[name] = self._in_use.get(name, 0) + 1
+        try:
+            yield self.get(name, warmup=warmup)
+        finally:
+            with self._lock:
+                self._in_use[name] -= 1
+                if not self._in_use[name]:
+                    del self._in_use[name]
+                # Desalojos aplazados mientras el modelo estaba en uso
+                self._enforce_budget()
+
+    def preload(self, name: str, warmup: bool = True) -> threading.Thread:
+        """Cargar (y calentar) un modelo en segundo plano respetando el presupuesto"""
+        def _run():
+            try:
+                self.get(name, warmup=warmup)
+            except Exception as e:
+                logger.error(f"Background load of {name} failed: {e}")
+
+        thread = threading.Thread(target=_run, name=f'preload-{name}', daemon=True)
+        thread.start()
+        return thread
+
+    def unload(self, name: str):
+        with self._lock:
+            model = self._models.get(name)
+            if model is not None:
+                model.unload()
+            self._loaded.pop(name, None)
+        gc.collect()
+
+    def memory_used_mb(self) -> float:
+        with self._lock:
+            return sum(self._loaded.values())
+
+    def loaded_models(self) -> List[str]:
+        with self._lock:
+            return list(self._loaded)
+
+    def info(self, name: str) -> Dict[str, Any]:
+        spec = self.spec(name)
+        with self._lock:
+            loaded = name in self._loaded
+            info = self.peek(name).get_model_info()
+            info.update({
+                'registry_name': name,
+                'description': spec.description,
+                'loaded': loaded,
+                'memory_mb': self._loaded.get(name, spec.memory_mb)
+            })
+        return info
+
+    def _enforce_budget(self, keep: Optional[str] = None):
+        if self.memory_budget_mb is None:
+            return
+        while self.memory_used_mb() > self.memory_budget_mb:
+            # El menos reciente que no este en uso; si todos lo estan se reintenta al liberar
+            victim = next((name for name in self._loaded if name != keep and name not in self._in_use), None)
+            if victim is None:
+                break
+            logger.info(f"Evicting model {victim} to stay under {self.memory_budget_mb} MB")
+            self.unload(victim)
+            self.evictions += 1
@@ -0,0 +1,171 @@
+"""Analysis session: load a dataset once, infer each row once, serve every report from memory"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils import load_reviews_data
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RANDOM_STATE = 42
+DEFAULT_MAX_FILES = 4
+
+def file_fingerprint(file_path: str) -> Tuple[str, int, int]:
+    """Ruta absoluta + tamano + mtime: si el archivo cambia, cambia la huella"""
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+class _RowResults:
+    """Resultados por fila del archivo completo (posicion -> estrellas/confianza/aspectos)"""
+
+    def __init__(self, rows: int):
+        # -1 = fila aun no analizada
+        self.star_ids = np.full(rows, -1, dtype=np.int8)
+        self.confidences = np.zeros(rows, dtype=np.float32)
+        self.aspects: List[Optional[List[str]]] = [None] * rows
+        self.other_labels: Dict[int, str] = {}
+
+    def missing(self, positions: np.ndarray) -> np.ndarray:
+        return positions[self.star_ids[positions] < 0]
+
+    def store(self, positions: np.ndarray, batch):
+        self.star_ids[positions] = batch.star_ids
+        self.confidences[positions] = batch.confidences
+        for i, position in enumerate(positions.tolist()):
+            self.aspects[position] = batch.aspects[i] if batch.aspects is not None else []
+            if i in batch.other_labels:
+                self.other_labels[position] = batch.other_labels[i]
+
+    def batch(self, positions: np.ndarray, source, model_used: str):
+        from domain.result_batch import ResultBatch
+        other_labels = {i: self.other_labels[p] for i, p in enumerate(positions.tolist()) if p in self.other_labels}
+        return ResultBatch(
+            star_ids=self.star_ids[positions],
+            confidences=self.confidences[positions],
+            row_indices=positions,
+            source=source,
+            aspects=[self.aspects[p] for p in positions.tolist()],
+            other_labels=other_labels,
+            model_used=model_used
+        )
+
+class _FileEntry:
+    def __init__(self, fingerprint: Tuple[str, int, int]):
+        self.fingerprint = fingerprint
+        self.frame: Optional[pd.DataFrame] = None
+        self.complete = False
+        # (sample_size, random_state) -> posiciones de la muestra
+        self.samples: Dict[Tuple[int, int], np.ndarray] = {}
+        # (text_column, model) -> resultados por fila
+        self.results: Dict[Tuple[str, str], _RowResults] = {}
+
+class AnalysisSession:
+    """Memoiza datos, muestras y resultados de BERT por (huella del archivo, muestra, modelo)
+
+    Los reportes de DatasetAnalyzer son vistas sobre estos resultados: pedir la comparacion y
+    luego los insights del mismo archivo no vuelve a leer el archivo ni a inferir las mismas filas.
+    """
+
+    def __init__(self, sentiment_service, max_files: int = DEFAULT_MAX_FILES):
+        self.sentiment_service = sentiment_service
+        self.max_files = max_files
+        self._files: "OrderedDict[str, _FileEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.stats = {'file_loads': 0, 'inferred_rows': 0, 'reused_rows': 0}
+
+    def frame(self, file_path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """DataFrame del archivo; solo se leen del disco las columnas que faltan"""
+        with self._lock:
+            entry = self._entry(file_path)
+            if entry.frame is None or (columns is None and not entry.complete):
+                self._load(entry, file_path, columns)
+            elif columns is not None:
+                missing = [col for col in columns if col not in entry.frame.columns]
+                if missing and not entry.complete:
+                    extra = self._read(file_path, missing)
+                    entry.frame = pd.concat([entry.frame, extra], axis=1)
+            return entry.frame if columns is None else entry.frame[list(columns)]
+
+    def sample_positions(self, file_path: str, sample_size: int,
+                         random_state: int = DEFAULT_RANDOM_STATE) -> np.ndarray:
+        """Posiciones de la muestra (misma semilla -> mismas filas, se lean las columnas que se lean)"""
+        with self._lock:
+            entry = self._entry(file_path)
+            key = (sample_size, random_state)
+            if key not in entry.samples:
+                frame = entry.frame if entry.frame is not None else self.frame(file_path)
+                # La muestra solo depende del numero de filas: es la misma que df.sample sobre el archivo completo
+                sample = frame.sample(min(sample_size, len(frame)), random_state=random_state)
+                entry.samples[key] = frame.index.get_indexer(sample.index).astype(np.int64)
+            return entry.samples[key]
+
+    def sample(self, file_path: str, sample_size: int, columns: Optional[Sequence[str]] = None,
+               random_state: int = DEFAULT_RANDOM_STATE) -> pd.DataFrame:
+        frame = self.frame(file_path, columns)
+        return frame.iloc[self.sample_positions(file_path, sample_size, random_state)]
+
+    def analyze(self, file_path: str, text_column: str, sample_size: Optional[int] = None,
+                random_state: int = DEFAULT_RANDOM_STATE, model_name: Optional[str] = None):
+        """ResultBatch de las filas con texto de la muestra (o del archivo completo si sample_size es None)
+
+        Solo se infieren las filas que ninguna llamada anterior analizo con el mismo modelo.
+        """
+        model_name = model_name or self.sentiment_service.default_model
+        with self._lock:
+            texts = self.frame(file_path, [text_column])[text_column]
+            entry = self._entry(file_path)
+            if sample_size is None:
+                positions = np.arange(len(texts), dtype=np.int64)
+            else:
+                positions = self.sample_positions(file_path, sample_size, random_state)
+            positions = positions[texts.iloc[positions].notna().to_numpy()]
+
+            results = entry.results.setdefault((text_column, model_name), _RowResults(len(texts)))
+            missing = results.missing(positions)
+            if len(missing):
+                batch = self.sentiment_service.analyze_result_batch(texts.to_numpy()[missing], model_name=model_name)
+                results.store(missing, batch)
+            self.stats['inferred_rows'] += len(missing)
+            self.stats['reused_rows'] += len(positions) - len(missing)
+            return results.batch(positions, texts, model_name)
+
+    def invalidate(self, file_path: Optional[str] = None):
+        with self._lock:
+            if file_path is None:
+                self._files.clear()
+            else:
+                self._files.pop(os.path.abspath(file_path), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'files': len(self._files)}
+
+    def _entry(self, file_path: str) -> _FileEntry:
+        fingerprint = file_fingerprint(file_path)
+        path = fingerprint[0]
+        entry = self._files.get(path)
+        if entry is None or entry.fingerprint != fingerprint:
+            # Archivo nuevo o modificado: todo lo memoizado para la version anterior se descarta
+            entry = _FileEntry(fingerprint)
+            self._files[path] = entry
+        self._files.move_to_end(path)
+        while len(self._files) > self.max_files:
+            self._files.popitem(last=False)
+        return entry
+
+    def _load(self, entry: _FileEntry, file_path: str, columns: Optional[Sequence[str]]):
+        entry.frame = self._read(file_path, columns)
+        entry.complete = columns is None
+
+    def _read(self, file_path: str, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+        df = load_reviews_data(file_path, columns=list(columns) if columns is not None else None)
+        if df is None:
+            raise ValueError(f"Could not load {file_path}")
+        self.stats['file_loads'] += 1
+        return df
@@ -1,54 +1,64 @@
 ﻿"""Analyze datasets using BERT model"""
 
-import pandas as pd
+import numpy as np
 import os
+import time
 from collections import Counter
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Callable
+
+from services.insight_aggregator import InsightAggregator
+from services.schema_sniffer import sniff_dataframe, sniff_file
+from utils import read_columns, iter_reviews_chunks
+
+# Columnas de etiquetas conocidas: Sentiment (0-2) y category de Reddit (-1,0,1)
+LABEL_COLUMNS = ['Sentiment', 'category']
+DEFAULT_CHUNKSIZE = 10000
 
 class DatasetAnalyzer:
     """Analyze sentiment datasets using BERT"""
     
-    def __init__(self, sentiment_service):
+    def __init__(self, sentiment_service, session=None):
+        from services.analysis_session import AnalysisSession
         self.sentiment_service = sentiment_service
+        # Datos y resultados compartidos entre reportes: cada fila se infiere una sola vez
+        self.session = session or AnalysisSession(sentiment_service)
     
     def analyze_dataset_comparison(self, file_path: str, sample_size: int = 100):
         """Analyze dataset and compare with BERT"""
         print(f"Loading dataset: {file_path}")
         
         try:
-            df = pd.read_csv(file_path)
-            print(f"Dataset: {len(df)} records")
-            
-            # Sample for analysis
-            df_sample = df.sample(min(sample_size, len(df)), random_state=42)
-            
-            # Get text column
-            text_column = self._find_text_column(df_sample)
+            # Solo se leen las columnas de texto y etiqueta
+            text_column = self._detect_text_column(file_path)
             if not text_column:
                 return None
+            columns = self._report_columns(file_path, text_column)
+            print(f"Dataset: {len(self.session.frame(file_path, columns))} records")
             
-            # Analyze with BERT
-            our_results = self._analyze_with_bert(df_sample, text_column)
+            # Sample for analysis
+            df_sample = self.session.sample(file_path, sample_size, columns)
+            
+            # Analyze with BERT (memoizado en la sesion)
+            our_results = self.session.analyze(file_path, text_column, sample_size)
             
             # Compare approaches
-            return self._compare_approaches(df_sample, our_results, text_column)
+            return self._compare_approaches(df_sample, our_results, text_column,
+                                            frame=self.session.frame(file_path, columns))
             
         except Exception as e:
             print(f"Error: {e}")
             return None
     
-    def _analyze_with_bert(self, df, text_column):
-        """Analyze with BERT keeping original 1-5 star scale"""
-        texts = df[text_column].dropna().tolist()
-        return self.sentiment_service.analyze_batch(texts)
-    
-    def _compare_approaches(self, df, our_results, text_column):
+    def _compare_approaches(self, df, our_results, text_column, frame=None):
         """Compare BERT with dataset labels"""
+        from services.evaluation import evaluate, LABEL_SCHEMES
         print("\n=== BERT vs DATASET COMPARISON ===")
         
+        # Filas del dataset en el mismo orden que los resultados
+        our_results, aligned = self._align_results(df, our_results, text_column, frame)
+        
         # BERT distribution (1-5 stars)
-        our_sentiments = [r['sentiment'] for r in our_results]
-        our_dist = Counter(our_sentiments)
+        our_dist = Counter(our_results.distribution())
         
         print("BERT SENTIMENT (1-5 stars):")
         for sentiment, count in our_dist.most_common():
@@ -65,16 +75,25 @@ class DatasetAnalyzer:
                 name = label_names.get(sentiment, f"Label_{sentiment}")
                 print(f"  {name} ({sentiment}): {count} ({percentage:.1f}%)")
         
+        # Evaluacion vectorizada (3 y 2 clases) sobre filas alineadas
+        evaluation = None
+        if 'Sentiment' in df.columns:
+            evaluation = evaluate(our_results.star_ids, our_results.confidences, aligned['Sentiment'].to_numpy(),
+                                  LABEL_SCHEMES['Sentiment'])
+            print(f"\nAccuracy (3 classes): {evaluation['three_class']['accuracy']:.2%} | "
+                  f"Macro F1: {evaluation['three_class']['macro_f1']:.3f}")
+        
         # Show examples
         print("\n=== EXAMPLE COMPARISONS ===")
         print("Format: Text -> BERT | Dataset_Label")
         
         for i in range(min(5, len(our_results))):
-            our_sentiment = our_results[i]['sentiment']
-            true_label = df['Sentiment'].iloc[i] if 'Sentiment' in df.columns else 'N/A'
+            our_sentiment = our_results.label(i)
+            true_label = aligned['Sentiment'].iloc[i] if 'Sentiment' in df.columns else 'N/A'
             true_label_name = {0: 'Negative', 1: 'Neutral', 2: 'Positive'}.get(true_label, true_label)
             
-            text_preview = df[text_column].iloc[i][:60] + "..." if len(df[text_column].iloc[i]) > 60 else df[text_column].iloc[i]
+            text = aligned[text_column].iloc[i]
+            text_preview = text[:60] + "..." if len(text) > 60 else text
             
             print(f"\n'{text_preview}'")
             print(f"  → BERT: {our_sentiment} | Dataset: {true_label_name} ({true_label})")
@@ -82,29 +101,46 @@ class DatasetAnalyzer:
         return {
             'bert_distribution': dict(our_dist),
             'dataset_distribution': dict(true_dist) if 'Sentiment' in df.columns else {},
-            'sample_size': len(our_results)
+            'sample_size': len(our_results),
+            'evaluation': evaluation
         }
     
+    def _align_results(self, df, our_results, text_column, frame=None):
+        """(ResultBatch, filas de df en el orden de los resultados)
+        
+        Un ResultBatch de la sesion trae la posicion de cada resultado en el archivo completo
+        (frame, por defecto df); una lista legacy corresponde a df[text_column].dropna() en orden.
+        """
+        from domain.result_batch import ResultBatch
+        if isinstance(our_results, ResultBatch):
+            # Posiciones, no etiquetas: Parquet/Feather pueden restaurar un indice que no es RangeIndex
+            return our_results, (df if frame is None else frame).iloc[our_results.row_indices]
+        return ResultBatch.from_results(our_results), df[df[text_column].notna()]
+    
+    def _report_columns(self, file_path: str, text_column: str):
+        """Columna de texto + la de etiqueta si existe (proyeccion de columnas)"""
+        available = read_columns(file_path)
+        label_column = next((col for col in LABEL_COLUMNS if col in available), None)
+        return [text_column] + ([label_column] if label_column else [])
+    
     def _find_text_column(self, df):
-        """Find text column in dataframe"""
-        for col in ['clean_text', 'Comment', 'comment', 'text', 'review', 'Tweet']:
-            if col in df.columns:
-                return col
-        return None
+        """Find text column in dataframe (perfil de una muestra de filas)"""
+        return sniff_dataframe(df).text_column
+    
+    def _detect_text_column(self, file_path: str):
+        """Columna de texto del archivo, perfilando solo sus primeras filas"""
+        return sniff_file(file_path).text_column
 
     def generate_insights_report(self, file_path: str, sample_size: int = 500):
         """Generate business insights using BERT"""
         print(f"\n=== BERT BUSINESS INSIGHTS ===")
         
-        df = pd.read_csv(file_path)
-        df_sample = df.sample(min(sample_size, len(df)), random_state=42)
-        
-        text_column = self._find_text_column(df_sample)
+        text_column = self._detect_text_column(file_path)
         if not text_column:
             return None
         
-        # Analyze with BERT
-        our_results = self._analyze_with_bert(df_sample, text_column)
+        # Analyze with BERT (reutiliza las filas ya analizadas por otros reportes)
+        our_results = self.session.analyze(file_path, text_column, sample_size)
         
         # Generate insights based on BERT's 1-5 star system
         insights = self._generate_business_insights(our_results)
@@ -120,42 +156,77 @@ class DatasetAnalyzer:
         return insights
     
     def _generate_business_insights(self, results):
-        """Generate insights using BERT's 1-5 star scale"""
-        # Map star ratings to counts
-        star_counts = Counter()
-        for result in results:
-            sentiment = result['sentiment']
-            if '5 stars' in sentiment:
-                star_counts[5] += 1
-            elif '4 stars' in sentiment:
-                star_counts[4] += 1
-            elif '3 stars' in sentiment:
-                star_counts[3] += 1
-            elif '2 stars' in sentiment:
-                star_counts[2] += 1
-            elif '1 star' in sentiment:
-                star_counts[1] += 1
+        """Generate insights using BERT's 1-5 star scale (list of results or ResultBatch)"""
+        return InsightAggregator().update(results).to_insights()
+
+    def analyze_dataset_streaming(self, file_path: str, text_column: Optional[str] = None,
+                                  label_column: Optional[str] = None, chunksize: int = DEFAULT_CHUNKSIZE,
+                                  progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """Analyze the whole file chunk by chunk, reading only the text/label columns"""
+        print(f"Streaming dataset: {file_path}")
         
-        # Calculate metrics
-        total = sum(star_counts.values())
-        average_rating = sum(star * count for star, count in star_counts.items()) / total if total > 0 else 0
+        text_column = text_column or self._detect_text_column(file_path)
+        if not text_column:
+            print("No text column found")
+            return None
+        if label_column is None:
+            available = read_columns(file_path)
+            label_column = next((col for col in LABEL_COLUMNS if col in available), None)
+        columns = [text_column] + ([label_column] if label_column else [])
         
-        positive_reviews = star_counts[4] + star_counts[5]
-        negative_reviews = star_counts[1] + star_counts[2]
+        aggregates = InsightAggregator()
+        started = time.perf_counter()
+        chunks = 0
         
-        # Get common aspects from negative reviews
-        common_issues = []
-        for result in results:
-            if any(star in result['sentiment'] for star in ['1 star', '2 stars']):
-                common_issues.extend(result.get('aspects', []))
+        for chunk in iter_reviews_chunks(file_path, columns=columns, chunksize=chunksize):
+            aggregates.rows += len(chunk)
+            column = chunk[text_column].to_numpy()
+            mask = chunk[text_column].notna().to_numpy()
+            # row_indices son posiciones dentro del chunk (source), no numeros de fila del archivo
+            batch = self.sentiment_service.analyze_result_batch(column[mask], row_indices=np.flatnonzero(mask),
+                                                                source=column)
+            labels = chunk[label_column].to_numpy()[mask] if label_column else None
+            aggregates.update(batch, labels)
+            chunks += 1
+            
+            elapsed = time.perf_counter() - started
+            progress = {
+                'chunks': chunks,
+                'rows': aggregates.rows,
+                'analyzed_rows': aggregates.analyzed_rows,
+                'elapsed_seconds': elapsed,
+                'rows_per_second': aggregates.rows / elapsed if elapsed > 0 else 0.0
+            }
+            if progress_callback:
+                progress_callback(progress)
+            else:
+                print(f"  {progress['rows']} rows ({progress['rows_per_second']:.1f} rows/s)")
         
-        return {
-            'average_rating': average_rating,
-            'positive_percentage': (positive_reviews / total) * 100,
-            'negative_percentage': (negative_reviews / total) * 100,
-            'star_distribution': dict(star_counts),
-            'common_issues': Counter(common_issues).most_common(5)
-        }
+        elapsed = time.perf_counter() - started
+        summary = aggregates.to_dict()
+        summary.update({
+            'insights': aggregates.to_insights(),
+            'text_column': text_column,
+            'label_column': label_column,
+            'elapsed_seconds': elapsed,
+            'rows_per_second': aggregates.rows / elapsed if elapsed > 0 else 0.0
+        })
+        
+        print(f"Analyzed {summary['analyzed_rows']}/{summary['rows']} rows "
+              f"in {elapsed:.1f}s ({summary['rows_per_second']:.1f} rows/s)")
+        print(f"  • Average rating: {summary['average_rating']:.1f}/5 stars")
+        return summary
+
+    def run_dataset_job(self, file_path: str, output_dir: str, text_column: Optional[str] = None,
+                        label_column: Optional[str] = None, chunksize: int = DEFAULT_CHUNKSIZE,
+                        part_format: str = 'jsonl',
+                        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """Like analyze_dataset_streaming, but checkpointed to output_dir and resumable"""
+        from services.dataset_jobs import DatasetJob
+        job = DatasetJob(self.sentiment_service, file_path, output_dir, text_column=text_column,
+                         label_column=label_column, chunksize=chunksize, part_format=part_format,
+                         progress_callback=progress_callback)
+        return job.run()
 
     """eliminar lo sgte, solo para test de reddit"""
     def analyze_reddit_dataset(self, file_path: str, sample_size: int = 100):
@@ -163,7 +234,7 @@ class DatasetAnalyzer:
         print(f"Loading Reddit dataset: {file_path}")
     
         try:
-            df = pd.read_csv(file_path)
+            df = self.session.frame(file_path)
             print(f"Reddit dataset: {len(df)} records")
             print(f"Columns: {list(df.columns)}")
         
@@ -172,36 +243,34 @@ class DatasetAnalyzer:
             print(df.head())
         
             # Sample for analysis
-            df_sample = df.sample(min(sample_size, len(df)), random_state=42)
+            df_sample = self.session.sample(file_path, sample_size)
         
-            # Find text column (different names in this dataset)
-            text_column = None
-            for col in ['clean_comment', 'clean_text', 'comment', 'text', 'tweet']:
-                if col in df.columns:
-                    text_column = col
-                    break
+            # Columna de texto detectada con el sniffer, como en los demas reportes
+            text_column = self._detect_text_column(file_path)
         
             if not text_column:
                 print("No text column found")
                 return None
         
             # Analyze with BERT
-            our_results = self._analyze_with_bert(df_sample, text_column)
+            our_results = self.session.analyze(file_path, text_column, sample_size)
         
             # Compare with Reddit's -1,0,1 scale
-            return self._compare_with_reddit_labels(df_sample, our_results, text_column)
+            return self._compare_with_reddit_labels(df_sample, our_results, text_column, frame=df)
         
         except Exception as e:
             print(f"Error: {e}")
             return None
 
-    def _compare_with_reddit_labels(self, df, our_results, text_column):
+    def _compare_with_reddit_labels(self, df, our_results, text_column, frame=None):
         """Compare BERT with Reddit's -1,0,1 labels"""
+        from services.evaluation import evaluate, LABEL_SCHEMES
         print("\n=== BERT vs REDDIT COMPARISON ===")
     
+        our_results, aligned = self._align_results(df, our_results, text_column, frame)
+    
         # BERT distribution (1-5 stars)
-        our_sentiments = [r['sentiment'] for r in our_results]
-        our_dist = Counter(our_sentiments)
+        our_dist = Counter(our_results.distribution())
     
         print("BERT SENTIMENT (1-5 stars):")
         for sentiment, count in our_dist.most_common():
@@ -222,38 +291,28 @@ class DatasetAnalyzer:
         print("\n=== MAPPED COMPARISON ===")
         print("Mapping: 4-5 stars → Positive(1), 3 stars → Neutral(0), 1-2 stars → Negative(-1)")
     
-        def map_bert_to_reddit(bert_sentiment):
-            if '5 stars' in bert_sentiment or '4 stars' in bert_sentiment:
-                return 1  # Positive
-            elif '3 stars' in bert_sentiment:
-                return 0  # Neutral
-            elif '1 star' in bert_sentiment or '2 stars' in bert_sentiment:
-                return -1  # Negative
-            else:
-                return 0  # Default to neutral
-    
-        our_mapped = [map_bert_to_reddit(r['sentiment']) for r in our_results]
-        true_labels = df['category'].values if 'category' in df.columns else []
-    
-        if len(true_labels) > 0:
-            # Calculate accuracy with mapped values
-            correct = sum(1 for i in range(len(our_mapped)) 
-                         if our_mapped[i] == true_labels[i])
-            accuracy = correct / len(our_mapped)
+        evaluation = None
+        if 'category' in df.columns and len(our_results) > 0:
+            # Mapeo vectorizado por id de estrella (services.evaluation.STARS_TO_THREE)
+            evaluation = evaluate(our_results.star_ids, our_results.confidences, aligned['category'].to_numpy(),
+                                  LABEL_SCHEMES['category'])
+            three_class = evaluation['three_class']
+            correct = int(np.trace(np.asarray(three_class['confusion_matrix'])))
         
-            print(f"Accuracy (mapped to -1,0,1): {accuracy:.2%}")
-            print(f"Correct: {correct}/{len(our_mapped)}")
+            print(f"Accuracy (mapped to -1,0,1): {three_class['accuracy']:.2%}")
+            print(f"Correct: {correct}/{three_class['rows']}")
     
         # Show examples
         print("\n=== EXAMPLE COMPARISONS ===")
         print("Format: Text -> BERT | Reddit_Label")
     
         for i in range(min(5, len(our_results))):
-            our_sentiment = our_results[i]['sentiment']
-            true_label = df['category'].iloc[i] if 'category' in df.columns else 'N/A'
+            our_sentiment = our_results.label(i)
+            true_label = aligned['category'].iloc[i] if 'category' in df.columns else 'N/A'
             true_label_name = {-1: 'Negative', 0: 'Neutral', 1: 'Positive'}.get(true_label, true_label)
         
-            text_preview = df[text_column].iloc[i][:60] + "..." if len(df[text_column].iloc[i]) > 60 else df[text_column].iloc[i]
+            text = aligned[text_column].iloc[i]
+            text_preview = text[:60] + "..." if len(text) > 60 else text
         
             print(f"\n'{text_preview}'")
             print(f"  → BERT: {our_sentiment} | Reddit: {true_label_name} ({true_label})")
@@ -261,6 +320,7 @@ class DatasetAnalyzer:
         return {
             'bert_distribution': dict(our_dist),
             'reddit_distribution': dict(true_dist) if 'category' in df.columns else {},
-            'mapped_accuracy': accuracy if len(true_labels) > 0 else None,
-            'sample_size': len(our_results)
+            'mapped_accuracy': evaluation['three_class']['accuracy'] if evaluation else None,
+            'sample_size': len(our_results),
+            'evaluation': evaluation
         }
\ No newline at end of file
@@ -0,0 +1,247 @@
+"""Checkpointed, resumable dataset jobs: part-files + manifest of completed chunks"""
+
+import json
+import logging
+import os
+import time
+from typing import Dict, Any, Optional, Callable
+
+import numpy as np
+import pandas as pd
+
+from services.dataset_analyzer import LABEL_COLUMNS, DEFAULT_CHUNKSIZE
+from services.insight_aggregator import InsightAggregator
+from services.schema_sniffer import sniff_file
+from utils import read_columns, iter_reviews_chunks
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+REPORT = 'report.json'
+JSONL = 'jsonl'
+PARQUET = 'parquet'
+PART_COLUMNS = ['row', 'text', 'sentiment', 'star_id', 'confidence', 'aspects']
+
+def _write_atomic(path: str, write: Callable[[str], None]):
+    """Escribir en un temporal y renombrar: un corte nunca deja un archivo a medias"""
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+class DatasetJob:
+    """Analisis completo de un archivo (CSV, Parquet, Feather) que se puede interrumpir y reanudar"""
+
+    def __init__(self, sentiment_service, file_path: str, output_dir: str,
+                 text_column: Optional[str] = None, label_column: Optional[str] = None,
+                 chunksize: int = DEFAULT_CHUNKSIZE, part_format: str = JSONL,
+                 progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+        if part_format not in (JSONL, PARQUET):
+            raise ValueError(f"Formato de part-file desconocido: {part_format}")
+        self.sentiment_service = sentiment_service
+        self.file_path = file_path
+        self.output_dir = output_dir
+        self.text_column = text_column
+        self.label_column = label_column
+        self.chunksize = chunksize
+        self.part_format = part_format
+        self.progress_callback = progress_callback
+        self.manifest_path = os.path.join(output_dir, MANIFEST)
+
+    def run(self) -> Dict[str, Any]:
+        """Procesar los chunks pendientes y luego unir part-files y reporte"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest = self._load_manifest()
+        if manifest.get('finished'):
+            logger.info(f"Job already finished: {self.output_dir}")
+            return self._read_report()
+
+        completed = {entry['chunk'] for entry in manifest['completed']}
+        text_column, label_column = manifest['text_column'], manifest['label_column']
+        columns = [text_column] + ([label_column] if label_column else [])
+        started = time.perf_counter()
+        new_rows = 0
+
+        chunks = iter_reviews_chunks(self.file_path, columns=columns, chunksize=self.chunksize)
+        for chunk_number, chunk in enumerate(chunks):
+            if chunk_number in completed:
+                continue
+
+            part_name = f"part-{chunk_number:06d}.{self.part_format}"
+            part = self._analyze_chunk(chunk, text_column, label_column)
+            _write_atomic(os.path.join(self.output_dir, part_name), lambda path: self._write_part(part, path))
+
+            # El chunk solo cuenta como hecho cuando el manifest lo registra
+            manifest['completed'].append({
+                'chunk': chunk_number,
+                'start': int(chunk.index[0]),
+                'end': int(chunk.index[-1]) + 1,
+                'rows': len(chunk),
+                'part': part_name
+            })
+            self._save_manifest(manifest)
+
+            new_rows += len(chunk)
+            elapsed = time.perf_counter() - started
+            progress = {
+                'chunk': chunk_number,
+                'completed_chunks': len(manifest['completed']),
+                'rows_done': sum(entry['rows'] for entry in manifest['completed']),
+                'rows_per_second': new_rows / elapsed if elapsed > 0 else 0.0
+            }
+            if self.progress_callback:
+                self.progress_callback(progress)
+            else:
+                logger.info(f"Chunk {chunk_number} committed ({progress['rows_done']} rows done)")
+
+        report = self.merge(manifest)
+        manifest['finished'] = True
+        self._save_manifest(manifest)
+        return report
+
+    def merge(self, manifest: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Unir part-files en orden de chunk en results.* y escribir report.json"""
+        manifest = manifest or self._load_manifest()
+        entries = sorted(manifest['completed'], key=lambda entry: entry['chunk'])
+        aggregates = InsightAggregator()
+        output_path = os.path.join(self.output_dir, f"results.{self.part_format}")
+
+        def _parts():
+            # Un part-file a la vez en memoria
+            for entry in entries:
+                aggregates.rows += entry['rows']
+                part = self._read_part(os.path.join(self.output_dir, entry['part']))
+                # Chunk sin textos: no aporta filas y su esquema vacio no coincide con el de los demas
+                if part.empty:
+                    continue
+                self._fold(aggregates, part, manifest['label_column'])
+                yield part
+
+        def _write_jsonl(path: str):
+            with open(path, 'w', encoding='utf-8') as handle:
+                for part in _parts():
+                    for record in part.to_dict('records'):
+                        handle.write(json.dumps(_to_builtin(record), ensure_ascii=False) + '\n')
+
+        def _write_parquet(path: str):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            writer = None
+            try:
+                for part in _parts():
+                    table = pa.Table.from_pandas(part, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema)
+                    writer.write_table(table)
+                if writer is None:
+                    columns = PART_COLUMNS + (['label'] if manifest['label_column'] else [])
+                    pd.DataFrame(columns=columns).to_parquet(path, index=False)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+        _write_atomic(output_path, _write_jsonl if self.part_format == JSONL else _write_parquet)
+
+        report = aggregates.to_dict()
+        report.update({
+            'insights': aggregates.to_insights(),
+            'file_path': self.file_path,
+            'text_column': manifest['text_column'],
+            'label_column': manifest['label_column'],
+            'chunks': len(entries),
+            'results_path': output_path
+        })
+        _write_atomic(os.path.join(self.output_dir, REPORT),
+                      lambda path: _dump_json(report, path))
+        return report
+
+    def _analyze_chunk(self, chunk: pd.DataFrame, text_column: str, label_column: Optional[str]) -> pd.DataFrame:
+        column = chunk[text_column].to_numpy()
+        mask = chunk[text_column].notna().to_numpy()
+        texts = column[mask]
+        # Numero de fila del archivo: va a la columna 'row' del part, no al ResultBatch
+        rows = chunk.index.to_numpy()[mask]
+        # Sin cache: cada chunk se infiere igual en una corrida reanudada que en una continua
+        batch = self.sentiment_service.analyze_result_batch(texts, row_indices=np.flatnonzero(mask), source=column,
+                                                            use_cache=False)
+
+        part = pd.DataFrame({
+            'row': rows.astype(np.int64),
+            'text': texts,
+            'sentiment': [batch.label(i) for i in range(len(batch))],
+            'star_id': batch.star_ids,
+            'confidence': batch.confidences,
+            'aspects': batch.aspects
+        })
+        if label_column:
+            part['label'] = chunk[label_column].to_numpy()[mask]
+        return part
+
+    def _fold(self, aggregates: InsightAggregator, part: pd.DataFrame, label_column: Optional[str]):
+        from domain.result_batch import ResultBatch
+        batch = ResultBatch(part['star_id'].to_numpy(), part['confidence'].to_numpy(), part['row'].to_numpy(),
+                            aspects=list(part['aspects']))
+        aggregates.update(batch, part['label'].to_numpy() if label_column else None)
+
+    def _write_part(self, part: pd.DataFrame, path: str):
+        if self.part_format == PARQUET:
+            part.to_parquet(path, index=False)
+            return
+        # json de la libreria estandar: los float se escriben con repr exacto
+        with open(path, 'w', encoding='utf-8') as handle:
+            for record in part.to_dict('records'):
+                handle.write(json.dumps(_to_builtin(record), ensure_ascii=False) + '\n')
+
+    def _read_part(self, path: str) -> pd.DataFrame:
+        if self.part_format == PARQUET:
+            part = pd.read_parquet(path)
+            part['aspects'] = part['aspects'].map(list)
+            return part
+        with open(path, encoding='utf-8') as handle:
+            records = [json.loads(line) for line in handle if line.strip()]
+        part = pd.DataFrame.from_records(records, columns=None if records else PART_COLUMNS)
+        part['confidence'] = part['confidence'].astype(np.float32)
+        return part
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        """Leer el manifest existente (validando parametros) o crear uno nuevo"""
+        stat = os.stat(self.file_path)
+        source = {'file_path': os.path.abspath(self.file_path), 'file_size': stat.st_size,
+                  'file_mtime': int(stat.st_mtime), 'chunksize': self.chunksize, 'format': self.part_format}
+
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as handle:
+                manifest = json.load(handle)
+            changed = [key for key, value in source.items() if manifest.get(key) != value]
+            if changed:
+                raise ValueError(f"El job en {self.output_dir} se creo con otros parametros ({', '.join(changed)}); "
+                                 "usa otro output_dir")
+            logger.info(f"Resuming job: {len(manifest['completed'])} chunks already committed")
+            return manifest
+
+        text_column = self.text_column or sniff_file(self.file_path).text_column
+        if not text_column:
+            raise ValueError("No text column found")
+        label_column = self.label_column
+        if label_column is None:
+            available = read_columns(self.file_path)
+            label_column = next((col for col in LABEL_COLUMNS if col in available), None)
+
+        manifest = {**source, 'text_column': text_column, 'label_column': label_column,
+                    'completed': [], 'finished': False}
+        self._save_manifest(manifest)
+        return manifest
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        _write_atomic(self.manifest_path, lambda path: _dump_json(manifest, path))
+
+    def _read_report(self) -> Dict[str, Any]:
+        with open(os.path.join(self.output_dir, REPORT), encoding='utf-8') as handle:
+            return json.load(handle)
+
+def _to_builtin(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Tipos NumPy -> tipos de Python para json"""
+    return {key: value.item() if isinstance(value, np.generic) else value for key, value in record.items()}
+
+def _dump_json(data: Dict[str, Any], path: str):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(data, handle, ensure_ascii=False, indent=2, default=str)
@@ -0,0 +1,259 @@
+"""Vectorized evaluation of star predictions against labelled datasets"""
+
+import json
+import logging
+import time
+from typing import Dict, Any, List, Optional, Callable
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+NEGATIVE, NEUTRAL, POSITIVE = 0, 1, 2
+THREE_CLASSES = ['negative', 'neutral', 'positive']
+TWO_CLASSES = ['negative', 'positive']
+
+# Indice = id de estrella (0 = fuera de escala). -1 = fila excluida del esquema
+# 4-5 estrellas -> positivo, 3 -> neutral, 1-2 -> negativo; fuera de escala -> neutral (como el mapeo legacy)
+STARS_TO_THREE = np.array([NEUTRAL, NEGATIVE, NEGATIVE, NEUTRAL, POSITIVE, POSITIVE], dtype=np.int64)
+# Binario: 3 estrellas y fuera de escala no cuentan
+STARS_TO_TWO = np.array([-1, 0, 0, -1, 1, 1], dtype=np.int64)
+THREE_TO_TWO = np.array([0, -1, 1], dtype=np.int64)
+
+# Etiquetas conocidas de los datasets -> clase de 3 niveles
+LABEL_SCHEMES = {
+    'Sentiment': {0: NEGATIVE, 1: NEUTRAL, 2: POSITIVE},
+    'category': {-1: NEGATIVE, 0: NEUTRAL, 1: POSITIVE},
+}
+
+# La confianza de BERT es la probabilidad de la estrella predicha, no de la clase colapsada:
+# la calibracion se mide contra el acierto de estrella, con etiquetas de 1-5 estrellas
+STAR_LABEL_MAP = {star: star for star in range(1, 6)}
+STAR_LABEL_MAP.update({f'{star} star' + ('s' if star > 1 else ''): star for star in range(1, 6)})
+
+DEFAULT_CALIBRATION_BINS = 10
+
+def map_labels(labels, label_map: Dict[Any, int]) -> np.ndarray:
+    """Etiquetas del dataset -> clase de 3 niveles (-1 para etiquetas desconocidas o vacias)"""
+    mapped = pd.Series(labels).map(label_map)
+    return mapped.fillna(-1).to_numpy(dtype=np.int64)
+
+def confusion_matrix(y_true: np.ndarray, y_pred: np.ndarray, n_classes: int) -> np.ndarray:
+    """Filas = etiqueta real, columnas = prediccion"""
+    return np.bincount(y_true * n_classes + y_pred, minlength=n_classes * n_classes).reshape(n_classes, n_classes)
+
+def precision_recall_f1(matrix: np.ndarray) -> Dict[str, np.ndarray]:
+    true_positives = np.diag(matrix).astype(np.float64)
+    predicted = matrix.sum(axis=0)
+    support = matrix.sum(axis=1)
+    precision = np.divide(true_positives, predicted, out=np.zeros_like(true_positives), where=predicted > 0)
+    recall = np.divide(true_positives, support, out=np.zeros_like(true_positives), where=support > 0)
+    total = precision + recall
+    f1 = np.divide(2 * precision * recall, total, out=np.zeros_like(true_positives), where=total > 0)
+    return {'precision': precision, 'recall': recall, 'f1': f1, 'support': support}
+
+class _Calibration:
+    """Bins de calibracion: confianza media vs tasa de acierto del mismo evento que mide la confianza"""
+
+    def __init__(self, bins: int):
+        self.bins = bins
+        self.bin_counts = np.zeros(bins, dtype=np.int64)
+        self.bin_confidence = np.zeros(bins, dtype=np.float64)
+        self.bin_correct = np.zeros(bins, dtype=np.int64)
+
+    def update(self, correct: np.ndarray, confidences: np.ndarray):
+        bin_ids = np.minimum((confidences * self.bins).astype(np.int64), self.bins - 1)
+        self.bin_counts += np.bincount(bin_ids, minlength=self.bins)
+        self.bin_confidence += np.bincount(bin_ids, weights=confidences, minlength=self.bins)
+        self.bin_correct += np.bincount(bin_ids, weights=correct, minlength=self.bins).astype(np.int64)
+
+    def merge(self, other: '_Calibration'):
+        self.bin_counts += other.bin_counts
+        self.bin_confidence += other.bin_confidence
+        self.bin_correct += other.bin_correct
+
+    def report(self) -> Dict[str, Any]:
+        counts = self.bin_counts
+        total = int(counts.sum())
+        mean_confidence = np.divide(self.bin_confidence, counts, out=np.zeros(self.bins), where=counts > 0)
+        accuracy = np.divide(self.bin_correct, counts, out=np.zeros(self.bins), where=counts > 0)
+        # Error de calibracion esperado: |confianza - acierto| ponderado por filas en cada bin
+        ece = float(np.sum(np.abs(mean_confidence - accuracy) * counts) / total) if total else 0.0
+
+        return {
+            'rows': total,
+            'expected_calibration_error': ece,
+            'bins': [
+                {
+                    'lower': i / self.bins,
+                    'upper': (i + 1) / self.bins,
+                    'rows': int(counts[i]),
+                    'mean_confidence': float(mean_confidence[i]),
+                    'accuracy': float(accuracy[i])
+                }
+                for i in range(self.bins)
+            ]
+        }
+
+class _SchemeCounts:
+    """Matriz de confusion acumulada para un esquema de clases"""
+
+    def __init__(self, classes: List[str]):
+        self.classes = classes
+        self.matrix = np.zeros((len(classes), len(classes)), dtype=np.int64)
+        self.excluded = 0
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray):
+        valid = (y_true >= 0) & (y_pred >= 0)
+        self.excluded += int(len(y_true) - valid.sum())
+        self.matrix += confusion_matrix(y_true[valid], y_pred[valid], len(self.classes))
+
+    def merge(self, other: '_SchemeCounts'):
+        self.matrix += other.matrix
+        self.excluded += other.excluded
+
+    def report(self) -> Dict[str, Any]:
+        total = int(self.matrix.sum())
+        scores = precision_recall_f1(self.matrix)
+
+        return {
+            'classes': self.classes,
+            'rows': total,
+            'excluded_rows': self.excluded,
+            'accuracy': float(np.trace(self.matrix) / total) if total else 0.0,
+            'macro_f1': float(scores['f1'].mean()),
+            'confusion_matrix': self.matrix.tolist(),
+            'per_class': {
+                name: {
+                    'precision': float(scores['precision'][i]),
+                    'recall': float(scores['recall'][i]),
+                    'f1': float(scores['f1'][i]),
+                    'support': int(scores['support'][i])
+                }
+                for i, name in enumerate(self.classes)
+            }
+        }
+
+class EvaluationAccumulator:
+    """Evaluacion incremental: update() por chunk, merge() entre shards, report() al final
+
+    Las confianzas son de estrella (probabilidad de la estrella predicha), asi que la calibracion
+    solo se acumula con etiquetas de estrellas (star_labels); los esquemas de 3 y 2 clases no la llevan.
+    """
+
+    def __init__(self, label_map: Dict[Any, int], bins: int = DEFAULT_CALIBRATION_BINS):
+        self.label_map = label_map
+        self.three = _SchemeCounts(THREE_CLASSES)
+        self.two = _SchemeCounts(TWO_CLASSES)
+        self.calibration = _Calibration(bins)
+        self.rows = 0
+
+    def update(self, star_ids: np.ndarray, confidences: np.ndarray, labels,
+               star_labels=None) -> 'EvaluationAccumulator':
+        """star_ids/confidences/labels (y star_labels, opcional) alineados posicion a posicion"""
+        star_ids = np.asarray(star_ids, dtype=np.int64)
+        confidences = np.asarray(confidences, dtype=np.float64)
+        y_true = map_labels(labels, self.label_map)
+        if len(y_true) != len(star_ids):
+            raise ValueError(f"Predicciones ({len(star_ids)}) y etiquetas ({len(y_true)}) no estan alineadas")
+        self.rows += len(star_ids)
+
+        self.three.update(y_true, STARS_TO_THREE[star_ids])
+        true_two = np.where(y_true >= 0, THREE_TO_TWO[np.maximum(y_true, 0)], -1)
+        self.two.update(true_two, STARS_TO_TWO[star_ids])
+
+        if star_labels is not None:
+            true_stars = map_labels(star_labels, STAR_LABEL_MAP)
+            if len(true_stars) != len(star_ids):
+                raise ValueError(f"Predicciones ({len(star_ids)}) y estrellas ({len(true_stars)}) no estan alineadas")
+            valid = true_stars > 0
+            self.calibration.update(star_ids[valid] == true_stars[valid], confidences[valid])
+        return self
+
+    def update_batch(self, batch, labels, star_labels=None) -> 'EvaluationAccumulator':
+        return self.update(batch.star_ids, batch.confidences, labels, star_labels)
+
+    def merge(self, other: 'EvaluationAccumulator') -> 'EvaluationAccumulator':
+        self.three.merge(other.three)
+        self.two.merge(other.two)
+        self.calibration.merge(other.calibration)
+        self.rows += other.rows
+        return self
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'rows': self.rows,
+            'three_class': self.three.report(),
+            'two_class': self.two.report(),
+            # Confianza de estrella vs acierto de estrella (rows = 0 sin etiquetas de estrellas)
+            'star_calibration': self.calibration.report()
+        }
+
+def label_map_for(label_column: str) -> Dict[Any, int]:
+    if label_column not in LABEL_SCHEMES:
+        raise ValueError(f"Esquema de etiquetas desconocido para '{label_column}'; pasa label_map")
+    return LABEL_SCHEMES[label_column]
+
+def evaluate(star_ids: np.ndarray, confidences: np.ndarray, labels, label_map: Dict[Any, int],
+             bins: int = DEFAULT_CALIBRATION_BINS, star_labels=None) -> Dict[str, Any]:
+    """Evaluar predicciones ya alineadas con sus etiquetas en una pasada"""
+    return EvaluationAccumulator(label_map, bins).update(star_ids, confidences, labels, star_labels).report()
+
+def evaluate_dataset(sentiment_service, file_path: str, text_column: Optional[str] = None,
+                     label_column: Optional[str] = None, label_map: Optional[Dict[Any, int]] = None,
+                     star_column: Optional[str] = None,
+                     chunksize: int = 10000, model_name: Optional[str] = None,
+                     bins: int = DEFAULT_CALIBRATION_BINS, output_path: Optional[str] = None,
+                     progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Evaluar un modelo sobre un dataset etiquetado completo, chunk a chunk
+
+    star_column (opcional): etiquetas de 1-5 estrellas para calibrar la confianza de BERT.
+    """
+    from services.dataset_analyzer import LABEL_COLUMNS
+    from services.schema_sniffer import sniff_file
+    from utils import read_columns, iter_reviews_chunks
+
+    available = read_columns(file_path)
+    text_column = text_column or sniff_file(file_path).text_column
+    if label_column is None:
+        label_column = next((col for col in LABEL_COLUMNS if col in available), None)
+    if not text_column or not label_column:
+        raise ValueError(f"Se necesitan columna de texto y de etiqueta (columnas: {available})")
+    label_map = label_map or label_map_for(label_column)
+
+    accumulator = EvaluationAccumulator(label_map, bins)
+    started = time.perf_counter()
+    total_rows = 0
+    columns = [text_column, label_column] + ([star_column] if star_column else [])
+    for chunk in iter_reviews_chunks(file_path, columns=columns, chunksize=chunksize):
+        total_rows += len(chunk)
+        # La misma mascara selecciona textos y etiquetas: filas siempre alineadas
+        column = chunk[text_column].to_numpy()
+        mask = chunk[text_column].notna().to_numpy()
+        # row_indices: posiciones dentro del chunk (source)
+        batch = sentiment_service.analyze_result_batch(column[mask], row_indices=np.flatnonzero(mask),
+                                                       source=column, model_name=model_name)
+        star_labels = chunk[star_column].to_numpy()[mask] if star_column else None
+        accumulator.update_batch(batch, chunk[label_column].to_numpy()[mask], star_labels)
+        if progress_callback:
+            progress_callback({'rows': total_rows, 'evaluated_rows': accumulator.rows})
+
+    report = accumulator.report()
+    report.update({
+        'file_path': file_path,
+        'text_column': text_column,
+        'label_column': label_column,
+        'star_column': star_column,
+        'model': model_name or sentiment_service.default_model,
+        'total_rows': total_rows,
+        'elapsed_seconds': time.perf_counter() - started
+    })
+    if output_path:
+        write_report(report, output_path)
+    return report
+
+def write_report(report: Dict[str, Any], output_path: str):
+    with open(output_path, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, ensure_ascii=False, indent=2, default=str)
+    logger.info(f"Evaluation report written to {output_path}")
@@ -0,0 +1,139 @@
+"""Multi-process inference pool: one BERTModel per worker process"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from models.batch_scheduler import SchedulerReport
+from models.bert_model import NOT_LOADED, LOADING, READY, ERROR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 256
+
+# Modelo propio de cada proceso worker (se carga una sola vez en el initializer)
+_worker_model = None
+
+def _init_worker(threads: int, model_kwargs: Dict[str, Any]):
+    global _worker_model
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Solo se puede fijar antes del primer trabajo paralelo
+        pass
+
+    from models.bert_model import BERTModel
+    _worker_model = BERTModel(**model_kwargs)
+    logger.info(f"Inference worker {os.getpid()} ready ({threads} threads)")
+
+def _analyze_chunk(texts: List[str], batch_size: Optional[int],
+                   max_tokens: Optional[int]) -> Tuple[List[Dict[str, Any]], SchedulerReport]:
+    results = _worker_model.analyze_batch(texts, batch_size=batch_size, max_tokens=max_tokens)
+    return results, _worker_model.last_report
+
+def _model_version() -> str:
+    return _worker_model.model_version
+
+def _warm_worker(warmup: bool) -> str:
+    if warmup:
+        _worker_model.warmup()
+    return _worker_model.model_version
+
+class InferencePool:
+    """Reparte lotes entre procesos y une los resultados en el orden original"""
+
+    def __init__(self, workers: int, threads_per_worker: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, model_kwargs: Optional[Dict[str, Any]] = None):
+        if workers < 1:
+            raise ValueError("workers debe ser >= 1")
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        self.chunk_size = chunk_size
+        self.last_report = SchedulerReport()
+        self._model_version: Optional[str] = None
+        # Readiness de los workers (el proceso principal no carga el modelo)
+        self.state = NOT_LOADED
+        self.timings: Dict[str, float] = {}
+        self._error: Optional[Exception] = None
+        self._ready = threading.Event()
+        # spawn: torch no es seguro tras fork con hilos ya creados
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker, model_kwargs or {})
+        )
+        logger.info(f"Inference pool started: {workers} workers x {self.threads_per_worker} threads")
+
+    def analyze_batch(self, texts: Sequence[str], batch_size: Optional[int] = None,
+                      max_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+        chunks = [list(texts[start:start + self.chunk_size]) for start in range(0, len(texts), self.chunk_size)]
+        report = SchedulerReport()
+        results: List[Dict[str, Any]] = []
+
+        # map conserva el orden de los chunks
+        for chunk_results, chunk_report in self._executor.map(
+                _analyze_chunk, chunks, [batch_size] * len(chunks), [max_tokens] * len(chunks)):
+            results.extend(chunk_results)
+            report.batches.extend(chunk_report.batches)
+            report.naive_padded_tokens += chunk_report.naive_padded_tokens
+
+        self.last_report = report
+        if self.state == NOT_LOADED:
+            self._mark_ready()
+        return results
+
+    def preload(self, warmup: bool = True) -> threading.Thread:
+        """Arrancar los workers (carga + calentamiento) en segundo plano; readiness() informa el progreso"""
+        def _run():
+            started = time.perf_counter()
+            self.state = LOADING
+            try:
+                # Una tarea por worker: el initializer carga el modelo en cada proceso que arranca
+                futures = [self._executor.submit(_warm_worker, warmup) for _ in range(self.workers)]
+                versions = [future.result() for future in futures]
+                self._model_version = versions[0]
+                self.timings['load_seconds'] = time.perf_counter() - started
+                self._mark_ready()
+            except Exception as e:
+                logger.error(f"Inference pool preload failed: {e}")
+                self._error = e
+                self.state = ERROR
+                self._ready.set()
+
+        thread = threading.Thread(target=_run, name='pool-preload', daemon=True)
+        thread.start()
+        return thread
+
+    def readiness(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'error': str(self._error) if self._error else None,
+            'workers': self.workers,
+            **self.timings
+        }
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout) and self.state != ERROR
+
+    def _mark_ready(self):
+        self.state = READY
+        self._ready.set()
+
+    @property
+    def model_version(self) -> str:
+        """Version de los pesos cargados en los workers (se consulta una vez)"""
+        if self._model_version is None:
+            self._model_version = self._executor.submit(_model_version).result()
+        return self._model_version
+
+    def close(self):
+        """Apagar los workers esperando a que terminen los lotes en curso"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        logger.info("Inference pool stopped")
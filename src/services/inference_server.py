@@ -0,0 +1,248 @@
+"""Local HTTP/JSON inference server with dynamic micro-batching (asyncio, stdlib only)"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT_MS = 10.0
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            500: 'Internal Server Error'}
+
+class MicroBatcher:
+    """Junta peticiones individuales concurrentes en lotes (max_batch_size / max_wait_ms)"""
+
+    def __init__(self, service, executor: ThreadPoolExecutor,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        self.service = service
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_sizes: Counter = Counter()
+        self.requests = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, text: str) -> Dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        self.requests += 1
+        await self._queue.put((text, future))
+        return await future
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            self.batch_sizes[len(batch)] += 1
+            texts = [text for text, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.service.analyze_batch, texts)
+            except Exception as e:
+                logger.error(f"Micro-batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        batches = sum(self.batch_sizes.values())
+        return {
+            'queue_depth': self.queue_depth,
+            'requests': self.requests,
+            'batches': batches,
+            'mean_batch_size': sum(size * count for size, count in self.batch_sizes.items()) / batches if batches else 0.0,
+            'batch_size_histogram': dict(sorted(self.batch_sizes.items())),
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000
+        }
+
+class InferenceServer:
+    """Servidor HTTP local: POST /analyze, GET /health, GET /stats"""
+
+    def __init__(self, service, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        # service: SentimentService o cualquier objeto con analyze_batch(texts) (p.ej. un stub en tests)
+        self.service = service
+        self.host = host
+        self.port = port
+        # Un solo hilo de inferencia: el modelo no se usa concurrentemente
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='inference')
+        self.batcher = MicroBatcher(service, self._executor, max_batch_size, max_wait_ms)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._started = time.time()
+
+    async def start(self):
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # Con port=0 el sistema elige un puerto libre
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Inference server listening on http://{self.host}:{self.port}")
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self.batcher.stop()
+        self._executor.shutdown(wait=True)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self._dispatch(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as e:
+            self._write_response(writer, 400, {'error': str(e)}, keep_alive=False)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        parts = request_line.decode('latin-1').split()
+        if len(parts) != 3:
+            raise ValueError("Malformed request line")
+        method, path, _ = parts
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), path.split('?', 1)[0], headers, body
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        if path == '/health':
+            return 200, {'status': 'ok', 'uptime_seconds': time.time() - self._started, **self._readiness()}
+        if path == '/stats':
+            return 200, self.batcher.stats()
+        if path != '/analyze':
+            return 404, {'error': f'Unknown path {path}'}
+        if method != 'POST':
+            return 405, {'error': 'Use POST'}
+
+        try:
+            payload = json.loads(body or b'{}')
+        except json.JSONDecodeError as e:
+            return 400, {'error': f'Invalid JSON: {e}'}
+        if not isinstance(payload, dict):
+            return 400, {'error': 'Body must be a JSON object'}
+
+        try:
+            if 'texts' in payload:
+                texts = payload['texts']
+                if not isinstance(texts, list):
+                    return 400, {'error': "'texts' must be a list"}
+                # Un lote explicito ya viene agrupado: va directo al hilo de inferencia
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self.service.analyze_batch, texts
+                )
+                return 200, {'results': results}
+            if 'text' in payload:
+                return 200, {'result': await self.batcher.submit(payload['text'])}
+        except Exception as e:
+            logger.error(f"Inference request failed: {e}")
+            return 500, {'error': str(e)}
+        return 400, {'error': "Body must contain 'text' or 'texts'"}
+
+    def _readiness(self) -> Dict[str, Any]:
+        get_readiness = getattr(self.service, 'get_readiness', None)
+        return {'model': get_readiness()} if get_readiness else {}
+
+    def _write_response(self, writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], keep_alive: bool):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+
+def serve(service=None, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+          max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+    """Bloquear sirviendo peticiones hasta Ctrl+C"""
+    if service is None:
+        from services.sentiment_service import SentimentService
+        service = SentimentService(preload=True)
+
+    server = InferenceServer(service, host, port, max_batch_size, max_wait_ms)
+
+    async def _main():
+        await server.start()
+        try:
+            await server.serve_forever()
+        finally:
+            await server.stop()
+            if hasattr(service, 'close'):
+                service.close()
+
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        logger.info("Inference server stopped")
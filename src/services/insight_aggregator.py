@@ -0,0 +1,130 @@
+"""Single-pass, mergeable aggregation of sentiment results into business insights"""
+
+from collections import Counter
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+import numpy as np
+import pandas as pd
+
+class InsightAggregator:
+    """Contadores compactos sobre resultados (ResultBatch o dicts legacy)
+
+    update() consume cada lote en una pasada; merge() combina shards o chunks; to_insights()
+    produce el dict de insights de siempre sin guardar las filas.
+    """
+
+    def __init__(self, aspect_extractor: Optional[Callable[[str], List[str]]] = None):
+        # Sin extractor se usan los aspectos que ya trae cada resultado
+        self.aspect_extractor = aspect_extractor
+        # Filas leidas (incluye filas sin texto); la lleva quien lee el archivo
+        self.rows = 0
+        self.analyzed_rows = 0
+        # Posicion 0 = etiquetas fuera de la escala de estrellas
+        self.star_counts = np.zeros(6, dtype=np.int64)
+        self.other_labels: Counter = Counter()
+        self.negative_aspects: Counter = Counter()
+        self.positive_aspects: Counter = Counter()
+        self.label_counts: Counter = Counter()
+        # (etiqueta del dataset, estrellas BERT) -> conteo
+        self.label_vs_stars: Counter = Counter()
+
+    def update(self, results, labels=None) -> 'InsightAggregator':
+        """Sumar un lote; labels (opcional) son las etiquetas del dataset alineadas con results"""
+        from domain.result_batch import ResultBatch
+        batch = results if isinstance(results, ResultBatch) else ResultBatch.from_results(results)
+
+        self.analyzed_rows += len(batch)
+        self.star_counts += batch.star_counts()
+        self.other_labels.update(batch.other_labels.values())
+        self._count_aspects(batch, batch.negative_mask(), self.negative_aspects)
+        self._count_aspects(batch, batch.positive_mask(), self.positive_aspects)
+
+        if labels is not None:
+            labels = np.asarray(labels)
+            # Etiquetas faltantes fuera: cada NaN seria una clave distinta del Counter
+            present = pd.notna(labels)
+            labels = labels[present].tolist()
+            self.label_counts.update(labels)
+            self.label_vs_stars.update(zip(labels, batch.star_ids[present].tolist()))
+        return self
+
+    def merge(self, other: 'InsightAggregator') -> 'InsightAggregator':
+        self.rows += other.rows
+        self.analyzed_rows += other.analyzed_rows
+        self.star_counts += other.star_counts
+        self.other_labels.update(other.other_labels)
+        self.negative_aspects.update(other.negative_aspects)
+        self.positive_aspects.update(other.positive_aspects)
+        self.label_counts.update(other.label_counts)
+        self.label_vs_stars.update(other.label_vs_stars)
+        return self
+
+    def _count_aspects(self, batch, mask: np.ndarray, counter: Counter):
+        for position in mask.nonzero()[0].tolist():
+            if self.aspect_extractor is not None:
+                counter.update(self.aspect_extractor(batch.text(position)))
+            elif batch.aspects is not None:
+                counter.update(batch.aspects[position])
+
+    # --- Vistas ---
+
+    @property
+    def rated(self) -> int:
+        """Filas dentro de la escala de estrellas"""
+        return int(self.star_counts[1:].sum())
+
+    @property
+    def positive(self) -> int:
+        return int(self.star_counts[4] + self.star_counts[5])
+
+    @property
+    def negative(self) -> int:
+        return int(self.star_counts[1] + self.star_counts[2])
+
+    @property
+    def neutral(self) -> int:
+        return int(self.star_counts[3])
+
+    def average_rating(self) -> float:
+        rated = self.rated
+        return float(np.dot(np.arange(1, 6), self.star_counts[1:]) / rated) if rated else 0.0
+
+    def distribution(self) -> Dict[str, int]:
+        """Conteo por etiqueta ('1 star'..'5 stars' y etiquetas fuera de escala)"""
+        from domain.result_batch import STAR_LABELS
+        distribution = {STAR_LABELS[star]: int(self.star_counts[star]) for star in range(1, 6) if self.star_counts[star]}
+        distribution.update(self.other_labels)
+        return distribution
+
+    def top_issues(self, n: int = 5) -> List[Tuple[str, int]]:
+        """Aspectos mas frecuentes en resultados negativos (1-2 estrellas)"""
+        return self.negative_aspects.most_common(n)
+
+    def top_strengths(self, n: int = 5) -> List[Tuple[str, int]]:
+        """Aspectos mas frecuentes en resultados positivos (4-5 estrellas)"""
+        return self.positive_aspects.most_common(n)
+
+    def to_insights(self) -> Dict[str, Any]:
+        """Dict de insights de DatasetAnalyzer (escala de 1-5 estrellas)"""
+        rated = self.rated
+        return {
+            'average_rating': self.average_rating(),
+            'positive_percentage': (self.positive / rated) * 100 if rated > 0 else 0.0,
+            'negative_percentage': (self.negative / rated) * 100 if rated > 0 else 0.0,
+            'star_distribution': {star: int(self.star_counts[star]) for star in range(1, 6) if self.star_counts[star]},
+            'common_issues': self.top_issues(5)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Resumen de corridas por chunks (streaming y jobs)"""
+        comparison: Dict[Any, Dict[int, int]] = {}
+        for (label, star), count in sorted(self.label_vs_stars.items(), key=str):
+            comparison.setdefault(label, {})[star] = count
+        return {
+            'rows': self.rows,
+            'analyzed_rows': self.analyzed_rows,
+            'bert_distribution': {star: int(self.star_counts[star]) for star in range(1, 6) if self.star_counts[star]},
+            'average_rating': self.average_rating(),
+            'dataset_distribution': dict(self.label_counts),
+            'label_comparison': comparison
+        }
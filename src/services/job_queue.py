@@ -0,0 +1,261 @@
+"""SQLite-backed queue of full-dataset jobs and the local worker that runs them"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterator
+
+from services.dataset_analyzer import DEFAULT_CHUNKSIZE
+from services.dataset_jobs import DatasetJob, PARQUET, REPORT
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+DATABASE = 'jobs.sqlite'
+UPLOADS = 'uploads'
+DEFAULT_POLL_INTERVAL = 1.0
+# Un worker sin latido durante este tiempo se considera muerto
+HEARTBEAT_TIMEOUT = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    output_dir TEXT NOT NULL,
+    options TEXT NOT NULL,
+    progress TEXT,
+    error TEXT,
+    worker_pid INTEGER,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    pid INTEGER PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+"""
+
+class JobCancelled(Exception):
+    """El usuario pidio cancelar el job mientras corria"""
+
+class JobQueue:
+    """Cola de jobs en un archivo SQLite compartido por el dashboard y los workers
+
+    Cada job es un DatasetJob con checkpoints en root_dir/<id>: si el worker muere, el job se
+    vuelve a encolar y continua desde el ultimo chunk registrado.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+        self.db_path = os.path.join(root_dir, DATABASE)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Una conexion por operacion: se puede usar desde cualquier hilo (reruns de Streamlit)
+        connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    # --- Dashboard ---
+
+    def submit(self, file_path: str, text_column: Optional[str] = None, label_column: Optional[str] = None,
+               total_rows: Optional[int] = None, chunksize: int = DEFAULT_CHUNKSIZE,
+               part_format: str = PARQUET) -> str:
+        """Encolar un analisis completo de file_path; devuelve el id del job"""
+        job_id = uuid.uuid4().hex[:12]
+        options = {
+            'text_column': text_column,
+            'label_column': label_column,
+            'total_rows': total_rows,
+            'chunksize': chunksize,
+            'part_format': part_format
+        }
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO jobs (id, status, file_path, output_dir, options, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, os.path.abspath(file_path), os.path.join(self.root_dir, job_id),
+                 json.dumps(options), time.time())
+            )
+        logger.info(f"Job {job_id} queued for {file_path}")
+        return job_id
+
+    def submit_bytes(self, data: bytes, file_name: str, **options) -> str:
+        """Guardar un archivo subido en root_dir/uploads y encolarlo"""
+        upload_dir = os.path.join(self.root_dir, UPLOADS)
+        os.makedirs(upload_dir, exist_ok=True)
+        path = os.path.join(upload_dir, f"{uuid.uuid4().hex[:12]}{os.path.splitext(file_name)[1].lower()}")
+        with open(path, 'wb') as handle:
+            handle.write(data)
+        return self.submit(path, **options)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._connect() as connection:
+            rows = connection.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def cancel(self, job_id: str):
+        """Cancelar: un job en cola no llega a correr; uno en curso se detiene tras su chunk actual"""
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                               (CANCELLED, time.time(), job_id, QUEUED))
+            connection.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                               (job_id, RUNNING))
+
+    def report(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """report.json de un job terminado (None si todavia no termino)"""
+        job = self.get(job_id)
+        if not job or job['status'] != DONE:
+            return None
+        with open(os.path.join(job['output_dir'], REPORT), encoding='utf-8') as handle:
+            return json.load(handle)
+
+    def active_workers(self) -> List[int]:
+        with self._connect() as connection:
+            rows = connection.execute("SELECT pid FROM workers WHERE heartbeat > ?",
+                                      (time.time() - HEARTBEAT_TIMEOUT,)).fetchall()
+        return [row['pid'] for row in rows]
+
+    # --- Worker ---
+
+    def claim(self, worker_pid: int) -> Optional[Dict[str, Any]]:
+        """Tomar el job en cola mas antiguo (atomico entre workers)"""
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute("SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                                         (QUEUED,)).fetchone()
+                if row is not None:
+                    connection.execute("UPDATE jobs SET status = ?, worker_pid = ?, started_at = ? WHERE id = ?",
+                                       (RUNNING, worker_pid, time.time(), row['id']))
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return self.get(row['id']) if row is not None else None
+
+    def heartbeat(self, worker_pid: int):
+        with self._connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO workers (pid, heartbeat) VALUES (?, ?)",
+                               (worker_pid, time.time()))
+
+    def remove_worker(self, worker_pid: int):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM workers WHERE pid = ?", (worker_pid,))
+
+    def requeue_orphans(self) -> int:
+        """Volver a encolar jobs 'running' cuyo worker ya no da latidos (se reanudan del checkpoint)"""
+        alive = set(self.active_workers())
+        with self._connect() as connection:
+            rows = connection.execute("SELECT id, worker_pid FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+            orphans = [row['id'] for row in rows if row['worker_pid'] not in alive]
+            for job_id in orphans:
+                connection.execute("UPDATE jobs SET status = ?, worker_pid = NULL WHERE id = ?", (QUEUED, job_id))
+        if orphans:
+            logger.info(f"Requeued orphaned jobs: {orphans}")
+        return len(orphans)
+
+    def update_progress(self, job_id: str, progress: Dict[str, Any]) -> bool:
+        """Guardar el progreso; devuelve True si el usuario pidio cancelar"""
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET progress = ? WHERE id = ?", (json.dumps(progress), job_id))
+            row = connection.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row['cancel_requested'])
+
+    def finish(self, job_id: str, status: str = DONE, error: Optional[str] = None):
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                               (status, error, time.time(), job_id))
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job['options'] = json.loads(job['options'])
+        job['progress'] = json.loads(job['progress']) if job['progress'] else {}
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
+
+def run_job(queue: JobQueue, job: Dict[str, Any], sentiment_service) -> Dict[str, Any]:
+    """Correr un job reclamado con DatasetJob, publicando el progreso en la cola"""
+    options = job['options']
+    total_rows = options.get('total_rows')
+
+    def _progress(progress: Dict[str, Any]):
+        if total_rows:
+            progress['total_rows'] = total_rows
+            progress['fraction'] = min(progress['rows_done'] / total_rows, 1.0)
+        if queue.update_progress(job['id'], progress):
+            raise JobCancelled(job['id'])
+
+    dataset_job = DatasetJob(sentiment_service, job['file_path'], job['output_dir'],
+                             text_column=options.get('text_column'), label_column=options.get('label_column'),
+                             chunksize=options.get('chunksize', DEFAULT_CHUNKSIZE),
+                             part_format=options.get('part_format', PARQUET), progress_callback=_progress)
+    return dataset_job.run()
+
+def run_worker(queue: JobQueue, sentiment_service, poll_interval: float = DEFAULT_POLL_INTERVAL,
+               once: bool = False):
+    """Bucle del worker: reclamar jobs en orden de llegada hasta que se interrumpa
+
+    once=True termina cuando la cola queda vacia (util para pruebas y tareas programadas).
+    """
+    pid = os.getpid()
+    queue.heartbeat(pid)
+    queue.requeue_orphans()
+    logger.info(f"Job worker {pid} started on {queue.root_dir}")
+
+    # Latido en un hilo aparte: un chunk largo de inferencia no hace parecer muerto al worker
+    stopped = threading.Event()
+
+    def _beat():
+        while not stopped.wait(HEARTBEAT_TIMEOUT / 3):
+            queue.heartbeat(pid)
+
+    threading.Thread(target=_beat, name='job-heartbeat', daemon=True).start()
+    try:
+        while True:
+            job = queue.claim(pid)
+            if job is None:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            logger.info(f"Job {job['id']} started ({job['file_path']})")
+            try:
+                run_job(queue, job, sentiment_service)
+                queue.finish(job['id'])
+                logger.info(f"Job {job['id']} finished")
+            except JobCancelled:
+                queue.finish(job['id'], CANCELLED)
+                logger.info(f"Job {job['id']} cancelled")
+            except Exception as e:
+                logger.error(f"Job {job['id']} failed: {e}")
+                queue.finish(job['id'], FAILED, str(e))
+    finally:
+        stopped.set()
+        queue.remove_worker(pid)
@@ -0,0 +1,233 @@
+"""Two-tier result cache: bounded in-memory LRU + persistent SQLite tier"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_ENTRIES = 10000
+DEFAULT_DISK_ENTRIES = 1000000
+# SQLite limita la cantidad de parametros por consulta
+_SQL_CHUNK = 500
+# Cada cuantas escrituras se recuenta el disco (otro proceso puede compartir el archivo)
+_RECOUNT_WRITES = 1000
+
+def normalize_text(text: str, lowercase: bool = False) -> str:
+    """Colapsar espacios (y opcionalmente minusculas) para que textos equivalentes compartan clave"""
+    normalized = ' '.join(text.split())
+    return normalized.lower() if lowercase else normalized
+
+def cache_key(text: str, model_id: str) -> str:
+    """Hash del texto normalizado + identidad del modelo"""
+    payload = f"{model_id}\x00{normalize_text(text)}".encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+class ResultCache:
+    """Cache de resultados de sentimiento por (texto normalizado, modelo)"""
+
+    def __init__(self, max_entries: int = DEFAULT_MEMORY_ENTRIES, db_path: Optional[str] = None,
+                 max_disk_entries: int = DEFAULT_DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.db_path = db_path
+        self._memory: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0,
+            'writes': 0,
+            'invalidations': 0
+        }
+        self._versions: Dict[str, str] = {}
+        self._db = self._open_db(db_path) if db_path else None
+        # Filas en disco llevadas a mano: COUNT(*) recorre toda la tabla
+        self._disk_rows = self._disk_count() if self._db is not None else 0
+        self._writes_since_count = 0
+
+    def _open_db(self, db_path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(db_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, model_id TEXT NOT NULL, value TEXT NOT NULL, accessed REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        db.execute("CREATE INDEX IF NOT EXISTS results_model ON results (model_id)")
+        db.execute("CREATE TABLE IF NOT EXISTS model_versions (model_id TEXT PRIMARY KEY, version TEXT NOT NULL)")
+        db.commit()
+        return db
+
+    def get(self, text: str, model_id: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([text], model_id)[0]
+
+    def get_many(self, texts: Sequence[str], model_id: str) -> List[Optional[Dict[str, Any]]]:
+        """Buscar primero en memoria y luego, en una sola pasada, en disco"""
+        found: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        disk_lookup: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, text in enumerate(texts):
+                if not isinstance(text, str):
+                    continue
+                key = cache_key(text, model_id)
+                entry = self._memory.get(key)
+                if entry is not None:
+                    self._memory.move_to_end(key)
+                    found[i] = dict(entry[1])
+                    self._counters['memory_hits'] += 1
+                else:
+                    disk_lookup.setdefault(key, []).append(i)
+
+            if self._db is not None and disk_lookup:
+                for key, value in self._disk_get(list(disk_lookup)).items():
+                    self._remember(key, model_id, value)
+                    for i in disk_lookup.pop(key):
+                        found[i] = dict(value)
+                        self._counters['disk_hits'] += 1
+
+            self._counters['misses'] += sum(1 for entry in found if entry is None)
+        return found
+
+    def put(self, text: str, model_id: str, value: Dict[str, Any]):
+        self.put_many([(text, value)], model_id)
+
+    def put_many(self, items: Sequence[Tuple[str, Dict[str, Any]]], model_id: str):
+        """Guardar resultados en ambos niveles"""
+        rows: Dict[str, Tuple[str, str, str, float]] = {}
+        now = time.time()
+        with self._lock:
+            for text, value in items:
+                if not isinstance(text, str):
+                    continue
+                key = cache_key(text, model_id)
+                self._remember(key, model_id, value)
+                rows[key] = (key, model_id, json.dumps(value), now)
+            self._counters['writes'] += len(rows)
+
+            if self._db is not None and rows:
+                # Solo las claves nuevas suman filas (busqueda por clave primaria, no por toda la tabla)
+                new_rows = len(rows) - self._disk_existing(list(rows))
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO results (key, model_id, value, accessed) VALUES (?, ?, ?, ?)",
+                    list(rows.values())
+                )
+                self._disk_rows += new_rows
+                self._writes_since_count += 1
+                if self._writes_since_count >= _RECOUNT_WRITES:
+                    self._disk_rows = self._disk_count()
+                    self._writes_since_count = 0
+                self._enforce_disk_limit()
+                self._db.commit()
+
+    def invalidate(self, model_id: Optional[str] = None):
+        """Borrar entradas de un modelo (o todas) en memoria y disco"""
+        with self._lock:
+            if model_id is None:
+                self._memory.clear()
+            else:
+                for key in [k for k, (owner, _) in self._memory.items() if owner == model_id]:
+                    del self._memory[key]
+
+            if self._db is not None:
+                if model_id is None:
+                    deleted = self._db.execute("DELETE FROM results").rowcount
+                else:
+                    deleted = self._db.execute("DELETE FROM results WHERE model_id = ?", (model_id,)).rowcount
+                self._disk_rows = max(self._disk_rows - deleted, 0)
+                self._db.commit()
+            self._counters['invalidations'] += 1
+        logger.info(f"Result cache invalidated for {model_id or 'all models'}")
+
+    def check_model_version(self, model_id: str, version: str) -> bool:
+        """Invalidar si los pesos cargados para model_id cambiaron; True si hubo invalidacion"""
+        with self._lock:
+            if self._db is None:
+                previous = self._versions.get(model_id)
+                self._versions[model_id] = version
+            else:
+                row = self._db.execute(
+                    "SELECT version FROM model_versions WHERE model_id = ?", (model_id,)
+                ).fetchone()
+                previous = row[0] if row else None
+                self._db.execute(
+                    "INSERT OR REPLACE INTO model_versions (model_id, version) VALUES (?, ?)", (model_id, version)
+                )
+                self._db.commit()
+
+            if previous is not None and previous != version:
+                logger.info(f"Model {model_id} changed ({previous} -> {version})")
+                self.invalidate(model_id)
+                return True
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+            stats['max_entries'] = self.max_entries
+            if self._db is not None:
+                stats['disk_entries'] = self._disk_rows
+                stats['max_disk_entries'] = self.max_disk_entries
+            lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+            stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: str, model_id: str, value: Dict[str, Any]):
+        self._memory[key] = (model_id, dict(value))
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters['memory_evictions'] += 1
+
+    def _disk_get(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        values = {}
+        for start in range(0, len(keys), _SQL_CHUNK):
+            chunk = keys[start:start + _SQL_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self._db.execute(
+                f"SELECT key, value FROM results WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            values.update((key, json.loads(value)) for key, value in rows)
+
+        if values:
+            now = time.time()
+            self._db.executemany("UPDATE results SET accessed = ? WHERE key = ?", [(now, key) for key in values])
+            self._db.commit()
+        return values
+
+    def _disk_count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def _disk_existing(self, keys: List[str]) -> int:
+        existing = 0
+        for start in range(0, len(keys), _SQL_CHUNK):
+            chunk = keys[start:start + _SQL_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            existing += self._db.execute(
+                f"SELECT COUNT(*) FROM results WHERE key IN ({placeholders})", chunk
+            ).fetchone()[0]
+        return existing
+
+    def _enforce_disk_limit(self):
+        excess = self._disk_rows - self.max_disk_entries
+        if excess > 0:
+            deleted = self._db.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed LIMIT ?)", (excess,)
+            ).rowcount
+            self._disk_rows -= deleted
+            self._counters['disk_evictions'] += deleted
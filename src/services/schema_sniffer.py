@@ -0,0 +1,163 @@
+"""Sample-based schema sniffing: rank text and label column candidates without scanning whole files"""
+
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_ROWS = 2000
+# Nombres conocidos de los datasets del proyecto, en orden de preferencia (deteccion anterior)
+KNOWN_TEXT_COLUMNS = ['clean_text', 'clean_comment', 'Comment', 'comment', 'text', 'review', 'Tweet']
+KNOWN_LABEL_COLUMNS = ['Sentiment', 'category']
+TEXT_NAME_HINTS = ('text', 'comment', 'review', 'tweet', 'message', 'content', 'clean_', 'body', 'opinion')
+LABEL_NAME_HINTS = ('sentiment', 'label', 'category', 'rating', 'stars', 'score', 'class', 'polarity')
+
+# Umbrales: un texto libre es largo y mayormente letras; una etiqueta tiene pocos valores distintos
+MIN_TEXT_LENGTH = 10
+MIN_ALPHA_RATIO = 0.5
+MAX_LABEL_VALUES = 20
+MAX_LABEL_LENGTH = 20
+
+@dataclass
+class ColumnProfile:
+    """Estadisticas de una columna calculadas sobre la muestra"""
+    name: str
+    dtype: str
+    sampled_rows: int
+    non_null_ratio: float = 0.0
+    avg_length: float = 0.0
+    alpha_ratio: float = 0.0
+    unique_ratio: float = 0.0
+    distinct_values: int = 0
+    text_score: float = 0.0
+    label_score: float = 0.0
+
+@dataclass
+class SchemaProfile:
+    """Perfiles de todas las columnas y candidatos ordenados de mejor a peor"""
+    columns: List[ColumnProfile]
+    sampled_rows: int
+    text_candidates: List[str] = field(default_factory=list)
+    label_candidates: List[str] = field(default_factory=list)
+
+    @property
+    def text_column(self) -> Optional[str]:
+        return self.text_candidates[0] if self.text_candidates else None
+
+    @property
+    def label_column(self) -> Optional[str]:
+        return self.label_candidates[0] if self.label_candidates else None
+
+def _name_matches(name: str, hints) -> bool:
+    lowered = str(name).lower()
+    return any(hint in lowered for hint in hints)
+
+def profile_column(name: str, values: pd.Series) -> ColumnProfile:
+    """Perfil de una columna de la muestra (sin convertir la columna entera a str)"""
+    sampled = len(values)
+    profile = ColumnProfile(name=str(name), dtype=str(values.dtype), sampled_rows=sampled)
+    present = values.dropna()
+    if sampled == 0 or present.empty:
+        return profile
+
+    profile.non_null_ratio = len(present) / sampled
+    profile.distinct_values = int(present.nunique())
+    profile.unique_ratio = profile.distinct_values / len(present)
+
+    strings = present[present.map(type) == str] if present.dtype == object else present.astype(str)
+    if pd.api.types.is_string_dtype(present.dtype) and len(strings):
+        lengths = strings.str.len()
+        profile.avg_length = float(lengths.mean())
+        letters = strings.str.count(r'[^\W\d_]').sum()
+        profile.alpha_ratio = float(letters / lengths.sum()) if lengths.sum() else 0.0
+    else:
+        # Numericas/booleanas: longitud de la representacion, sin letras
+        profile.avg_length = float(present.astype(str).str.len().mean())
+
+    profile.text_score = _text_score(profile, values.dtype)
+    profile.label_score = _label_score(profile)
+    return profile
+
+def _text_score(profile: ColumnProfile, dtype) -> float:
+    if not pd.api.types.is_string_dtype(dtype) or profile.alpha_ratio < MIN_ALPHA_RATIO:
+        return 0.0
+    if profile.avg_length < MIN_TEXT_LENGTH and not _name_matches(profile.name, TEXT_NAME_HINTS):
+        return 0.0
+    # Textos largos, con letras, casi todos distintos y presentes
+    score = math.log1p(profile.avg_length) * profile.alpha_ratio * (0.5 + 0.5 * profile.unique_ratio)
+    score *= profile.non_null_ratio
+    if _name_matches(profile.name, TEXT_NAME_HINTS):
+        score *= 2
+    return float(score)
+
+def _label_score(profile: ColumnProfile) -> float:
+    if profile.distinct_values < 2 or profile.distinct_values > MAX_LABEL_VALUES:
+        return 0.0
+    if profile.avg_length > MAX_LABEL_LENGTH:
+        return 0.0
+    # Pocos valores que se repiten mucho
+    score = (1.0 - profile.unique_ratio) * profile.non_null_ratio
+    if _name_matches(profile.name, LABEL_NAME_HINTS):
+        score += 1.0
+    return float(score)
+
+def sample_rows(df: pd.DataFrame, rows: int = DEFAULT_SAMPLE_ROWS) -> pd.DataFrame:
+    """Filas repartidas uniformemente por el DataFrame (deterministico, sin copiar columnas enteras)"""
+    if len(df) <= rows:
+        return df
+    positions = np.linspace(0, len(df) - 1, rows).astype(np.int64)
+    return df.iloc[positions]
+
+def sniff_dataframe(df: pd.DataFrame, rows: int = DEFAULT_SAMPLE_ROWS) -> SchemaProfile:
+    """Perfilar una muestra acotada de cada columna y ordenar candidatos de texto y etiqueta
+
+    Con un DataFrame sin filas (solo cabecera) se decide solo por el nombre de las columnas.
+    """
+    sample = sample_rows(df, rows)
+    columns = [profile_column(name, sample[name]) for name in sample.columns]
+    names = [profile.name for profile in columns]
+
+    if len(sample):
+        text_ranked = sorted((p for p in columns if p.text_score > 0), key=lambda p: -p.text_score)
+        text_candidates = [p.name for p in text_ranked]
+    else:
+        text_candidates = [name for name in names if _name_matches(name, TEXT_NAME_HINTS)]
+    # Los nombres conocidos del proyecto van primero, como en la deteccion anterior
+    known_text = [name for name in KNOWN_TEXT_COLUMNS if name in names]
+    text_candidates = known_text + [name for name in text_candidates if name not in known_text]
+
+    if len(sample):
+        label_ranked = sorted((p for p in columns if p.label_score > 0 and p.name not in text_candidates[:1]),
+                              key=lambda p: -p.label_score)
+        label_candidates = [p.name for p in label_ranked]
+    else:
+        label_candidates = [name for name in names if _name_matches(name, LABEL_NAME_HINTS)]
+    known_label = [name for name in KNOWN_LABEL_COLUMNS if name in names]
+    label_candidates = known_label + [name for name in label_candidates if name not in known_label]
+
+    return SchemaProfile(columns=columns, sampled_rows=len(sample),
+                         text_candidates=text_candidates, label_candidates=label_candidates)
+
+def sniff_file(source, rows: int = DEFAULT_SAMPLE_ROWS) -> SchemaProfile:
+    """Perfilar las primeras filas de un archivo sin leerlo completo"""
+    from utils import data_format, CSV, EXCEL, PARQUET
+
+    file_format = data_format(source)
+    if file_format == CSV:
+        sample = pd.read_csv(source, nrows=rows)
+    elif file_format == EXCEL:
+        sample = pd.read_excel(source, nrows=rows)
+    elif file_format == PARQUET:
+        import pyarrow.parquet as pq
+        batch = next(pq.ParquetFile(source).iter_batches(batch_size=rows), None)
+        sample = batch.to_pandas() if batch is not None else pd.DataFrame(columns=pq.read_schema(source).names)
+    else:
+        # Feather mapeado en memoria: cortar antes de convertir a pandas
+        import pyarrow.feather as feather
+        sample = feather.read_table(source, memory_map=isinstance(source, str)).slice(0, rows).to_pandas()
+    return sniff_dataframe(sample, rows)
@@ -1,76 +1,306 @@
-﻿"""Sentiment Service - Uses BERT model only - VERSIÓN CORREGIDA"""
+﻿"""Sentiment Service - BERT model registry - VERSIÓN CORREGIDA"""
 
 import logging
-from typing import Dict, Any, List
-import re
+from typing import Dict, Any, List, Optional, Sequence
 
 logger = logging.getLogger(__name__)
 
 class SentimentService:
-    """Main sentiment analysis service using BERT"""
+    """Main sentiment analysis service over a registry of BERT models"""
     
-    def __init__(self):
-        self.model = self._initialize_model()
+    def __init__(self, cache_size: int = 10000, cache_path: Optional[str] = None,
+                 workers: int = 0, threads_per_worker: Optional[int] = None, chunk_size: int = 256,
+                 backend: str = 'pytorch', onnx_path: Optional[str] = None,
+                 preload: bool = False, warmup: bool = True,
+                 models: Optional[List[Any]] = None, default_model: Optional[str] = None,
+                 memory_budget_mb: Optional[float] = None):
+        self.cache = self._initialize_cache(cache_size, cache_path)
+        # backend: 'pytorch' (fp32), 'pytorch-int8' (cuantizacion dinamica) u 'onnx' (onnx_path local);
+        # aplica al modelo por defecto, los demas usan su ModelSpec
+        self.registry = self._initialize_registry(models, default_model, memory_budget_mb, backend, onnx_path)
+        self.model_kwargs = self.registry.spec(self.default_model).model_kwargs()
+        self.pool = self._initialize_pool(workers, threads_per_worker, chunk_size)
+        self._pool_version_checked = False
+        self.last_dedup: Dict[str, Any] = {}
+        self._last_runner = self.model
+        if preload:
+            # Carga + calentamiento en segundo plano; get_readiness() informa el progreso.
+            # Con pool solo cargan los workers: el proceso principal no duplica los pesos
+            if self.pool:
+                self.pool.preload(warmup=warmup)
+            else:
+                self.registry.preload(self.default_model, warmup=warmup)
     
-    def _initialize_model(self):
-        """Initialize BERT model"""
+    def _initialize_registry(self, models, default_model, memory_budget_mb, backend, onnx_path):
+        """Initialize model registry; models load lazily on first use or preload"""
         try:
-            from models.bert_model import BERTModel
-            model = BERTModel()
-            logger.info("BERT model loaded successfully")
-            return model
+            from dataclasses import replace
+            from models.registry import ModelRegistry, DEFAULT_MODELS, DEFAULT_MODEL
+            specs = list(models if models is not None else DEFAULT_MODELS)
+            self.default_model = default_model or (DEFAULT_MODEL if models is None else specs[0].name)
+            specs = [replace(spec, backend=backend, onnx_path=onnx_path) if spec.name == self.default_model else spec
+                     for spec in specs]
+            on_load = self._check_cache_version if self.cache else None
+            registry = ModelRegistry(specs, memory_budget_mb=memory_budget_mb, on_load=on_load)
+            registry.spec(self.default_model)
+            return registry
         except Exception as e:
-            logger.error(f"Failed to load BERT model: {e}")
+            logger.error(f"Failed to initialize model registry: {e}")
             raise
     
-    def analyze_text(self, text: str) -> Dict[str, Any]:
+    @property
+    def model(self):
+        """Default model (not loaded until first use)"""
+        return self.registry.peek(self.default_model)
+    
+    def _initialize_cache(self, cache_size: int, cache_path: Optional[str]):
+        """Initialize result cache (memory LRU + optional SQLite file)"""
+        if not cache_size and not cache_path:
+            return None
+        from services.result_cache import ResultCache
+        return ResultCache(max_entries=cache_size, db_path=cache_path)
+    
+    def _check_cache_version(self, model):
+        """Si cambiaron los pesos cargados por BERTModel._load_model, invalidar"""
+        self.cache.check_model_version(model.model_id, model.model_version)
+    
+    def _initialize_pool(self, workers: int, threads_per_worker: Optional[int], chunk_size: int):
+        """Optional process pool for analyze_batch (workers=0 keeps inference in-process)"""
+        if workers <= 0:
+            return None
+        from services.inference_pool import InferencePool
+        return InferencePool(workers, threads_per_worker=threads_per_worker, chunk_size=chunk_size,
+                             model_kwargs=self.model_kwargs)
+    
+    def close(self):
+        """Shut down pool workers and the cache database"""
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+        if self.cache:
+            self.cache.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def analyze_text(self, text: str, model_name: Optional[str] = None, use_cache: bool = True) -> Dict[str, Any]:
         """Analyze text using BERT - VERSIÓN COMPATIBLE"""
+        model_name = model_name or self.default_model
         try:
-            # Obtener resultado base de BERT
-            bert_result = self.model.analyze_text(text)
-            
-            # CONVERTIR al formato que espera el dashboard
-            result = {
-                'text': bert_result['text'],
-                'sentiment': bert_result['sentiment'],
-                'confidence': bert_result['confidence'],
-                'aspects': self._extract_aspects_simple(text),  # ← AGREGAR ASPECTS
-                'method': 'BERT'
-            }
-            
-            return result
+            # Misma ruta que los lotes: cache y pool (o modelo en proceso) segun la configuracion
+            bert_result = self._analyze_uncached([text], None, None, model_name, use_cache)[0]
+            return self._to_dashboard_result(text, bert_result, model_name)
             
         except Exception as e:
             logger.error(f"Error in analyze_text: {e}")
-            # Fallback completo
-            return {
-                'text': text,
-                'sentiment': '3 stars',
-                'confidence': 0.5,
-                'aspects': self._extract_aspects_simple(text),
-                'method': 'BERT'
-            }
-    
-    def analyze_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
-        """Analyze multiple texts using BERT"""
-        return [self.analyze_text(text) for text in texts]
-    
-    def get_model_info(self) -> Dict[str, Any]:
-        """Return information about BERT model"""
-        return self.model.get_model_info()
+            return self._fallback_result(text, model_name)
     
-    def _extract_aspects_simple(self, text: str) -> List[str]:
-        """Extrae aspectos simples usando regex - COPIADO DE TU CÓDIGO ORIGINAL"""
+    def analyze_batch(self, texts: List[str], batch_size: Optional[int] = None,
+                      max_tokens: Optional[int] = None, dedupe: bool = True,
+                      lowercase: bool = False, model_name: Optional[str] = None,
+                      use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Analyze multiple texts using BERT token-budget batches, results in input order"""
+        unique_results, positions, _ = self._analyze_unique(texts, batch_size, max_tokens, dedupe, lowercase,
+                                                            model_name, use_cache)
+        
+        # Repartir cada resultado a todas las posiciones originales (con su texto original)
+        return [dict(unique_results[j], text=text) for text, j in zip(texts, positions)]
+    
+    def analyze_result_batch(self, texts: Sequence[str], row_indices: Optional[Sequence[int]] = None,
+                             source: Optional[Sequence[str]] = None, batch_size: Optional[int] = None,
+                             max_tokens: Optional[int] = None, dedupe: bool = True, lowercase: bool = False,
+                             model_name: Optional[str] = None, use_cache: bool = True, features: bool = False):
+        """Like analyze_batch but returns a columnar ResultBatch (no per-row dicts, no copied text)
+        
+        row_indices/source: posiciones de cada texto dentro de source (por defecto, texts mismo).
+        features=True adjunta TextFeatures (idioma y claves por texto unico) para temas e indice.
+        """
+        import numpy as np
+        from domain.result_batch import ResultBatch
+        
+        unique_results, positions, unique_texts = self._analyze_unique(texts, batch_size, max_tokens, dedupe,
+                                                                       lowercase, model_name, use_cache)
+        unique_batch = ResultBatch.from_results(unique_results)
+        positions = np.asarray(positions, dtype=np.int64)
+        other_labels = {i: unique_batch.other_labels[int(j)]
+                        for i, j in enumerate(positions) if int(j) in unique_batch.other_labels}
+        
+        return ResultBatch(
+            star_ids=unique_batch.star_ids[positions],
+            confidences=unique_batch.confidences[positions],
+            row_indices=np.arange(len(texts)) if row_indices is None else row_indices,
+            source=texts if source is None else source,
+            aspects=[unique_batch.aspects[j] for j in positions],
+            other_labels=other_labels,
+            model_used=model_name or self.default_model,
+            features=self._text_features(unique_texts, positions) if features else None
+        )
+    
+    def _text_features(self, unique_texts, positions):
+        from core.text_features import TextFeatures
+        return TextFeatures.compute(unique_texts).take(positions)
+    
+    def _analyze_unique(self, texts, batch_size, max_tokens, dedupe, lowercase, model_name, use_cache=True):
+        """Inferencia sobre textos unicos; devuelve (resultados unicos, posicion -> indice unico, textos unicos)"""
+        model_name = model_name or self.default_model
+        unique_texts, positions = self._deduplicate(texts, dedupe, lowercase)
+        
         try:
-            stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 
-                         'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'this', 'that'}
-            
-            # Encontrar palabras sustantivas (patrón simple)
-            words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
-            aspects = [word for word in words if word not in stop_words and len(word) > 2]
-            
-            return aspects[:5]  # Máximo 5 aspectos
-            
+            bert_results = self._analyze_uncached(unique_texts, batch_size, max_tokens, model_name, use_cache)
+            unique_results = [self._to_dashboard_result(text, bert_result, model_name)
+                              for text, bert_result in zip(unique_texts, bert_results)]
         except Exception as e:
-            logger.error(f"Error extracting aspects: {e}")
-            return []
\ No newline at end of file
+            logger.error(f"Error in analyze_batch, falling back to per-text analysis: {e}")
+            unique_results = [self.analyze_text(text, model_name, use_cache) for text in unique_texts]
+        return unique_results, positions, unique_texts
+    
+    def _deduplicate(self, texts: List[str], dedupe: bool, lowercase: bool):
+        """Colapsar duplicados exactos (tras normalizar espacios / mayusculas)"""
+        if not dedupe:
+            unique_texts, positions = list(texts), list(range(len(texts)))
+        else:
+            from services.result_cache import normalize_text
+            first_seen: Dict[Any, int] = {}
+            unique_texts, positions = [], []
+            for i, text in enumerate(texts):
+                # Los valores no textuales nunca se fusionan
+                key = normalize_text(text, lowercase) if isinstance(text, str) else (i,)
+                if key not in first_seen:
+                    first_seen[key] = len(unique_texts)
+                    unique_texts.append(text)
+                positions.append(first_seen[key])
+        
+        total = len(texts)
+        self.last_dedup = {
+            'total': total,
+            'unique': len(unique_texts),
+            'duplicates': total - len(unique_texts),
+            'dedup_ratio': (total - len(unique_texts)) / total if total else 0.0
+        }
+        return unique_texts, positions
+    
+    def _analyze_uncached(self, texts: List[str], batch_size: Optional[int],
+                          max_tokens: Optional[int], model_name: str, use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Run BERT (in-process or on the pool) only on texts missing from the cache"""
+        # Los workers del pool solo tienen cargado el modelo por defecto
+        if self.pool and model_name == self.default_model:
+            # Con pool el proceso principal no carga pesos: solo usa model_id para la cache
+            model = self.registry.peek(model_name)
+            if self.cache and use_cache:
+                self._check_pool_version(model)
+            return self._run_with_cache(self.pool, model, texts, batch_size, max_tokens, use_cache)
+        # En uso: el registro no lo desaloja mientras corre el lote
+        with self.registry.use(model_name) as model:
+            return self._run_with_cache(model, model, texts, batch_size, max_tokens, use_cache)
+    
+    def _run_with_cache(self, runner, model, texts: List[str], batch_size: Optional[int],
+                        max_tokens: Optional[int], use_cache: bool) -> List[Dict[str, Any]]:
+        self._last_runner = runner
+        # use_cache=False: lotes identicos en cada corrida (trabajos reanudables reproducibles)
+        if not self.cache or not use_cache:
+            return runner.analyze_batch(texts, batch_size=batch_size, max_tokens=max_tokens)
+        
+        cached = self.cache.get_many(texts, model.model_id)
+        missing = [i for i, entry in enumerate(cached) if entry is None]
+        fresh = runner.analyze_batch([texts[i] for i in missing], batch_size=batch_size, max_tokens=max_tokens)
+        self._store_in_cache(model, fresh)
+        
+        bert_results = [model.cached_result(text, entry) if entry is not None else None
+                        for text, entry in zip(texts, cached)]
+        for i, bert_result in zip(missing, fresh):
+            bert_results[i] = bert_result
+        return bert_results
+    
+    def _check_pool_version(self, model):
+        """Validar la cache contra los pesos de los workers (una vez por pool)"""
+        if not self._pool_version_checked:
+            self.cache.check_model_version(model.model_id, self.pool.model_version)
+            self._pool_version_checked = True
+    
+    def _store_in_cache(self, model, bert_results: List[Dict[str, Any]]):
+        """Only successful predictions are cached"""
+        if self.cache:
+            self.cache.put_many(
+                [(r['text'], {'sentiment': r['sentiment'], 'confidence': r['confidence']})
+                 for r in bert_results if r.get('success')],
+                model.model_id
+            )
+    
+    def _to_dashboard_result(self, text: str, bert_result: Dict[str, Any], model_name: str) -> Dict[str, Any]:
+        """CONVERTIR al formato que espera el dashboard"""
+        return {
+            'text': bert_result['text'],
+            'sentiment': bert_result['sentiment'],
+            'confidence': bert_result['confidence'],
+            'aspects': self._extract_aspects_simple(text),  # ← AGREGAR ASPECTS
+            'method': 'BERT',
+            'model_used': model_name
+        }
+    
+    def _fallback_result(self, text: str, model_name: str) -> Dict[str, Any]:
+        """Fallback completo"""
+        return {
+            'text': text,
+            'sentiment': '3 stars',
+            'confidence': 0.5,
+            'aspects': self._extract_aspects_simple(text),
+            'method': 'BERT',
+            'model_used': model_name
+        }
+    
+    def get_available_models(self) -> List[str]:
+        """Names of the registered models"""
+        return self.registry.names()
+    
+    def get_model_info(self, model_name: Optional[str] = None) -> Dict[str, Any]:
+        """Return information about a registered model (default model if omitted)"""
+        return self.registry.info(model_name or self.default_model)
+    
+    def get_registry_stats(self) -> Dict[str, Any]:
+        """Loaded models (LRU order), memory used vs budget and evictions"""
+        return {
+            'loaded': self.registry.loaded_models(),
+            'memory_used_mb': self.registry.memory_used_mb(),
+            'memory_budget_mb': self.registry.memory_budget_mb,
+            'evictions': self.registry.evictions
+        }
+    
+    def get_readiness(self, model_name: Optional[str] = None) -> Dict[str, Any]:
+        """Load state plus import/load/warm-up timings (of the pool workers when they serve the model)"""
+        model_name = model_name or self.default_model
+        if self.pool and model_name == self.default_model:
+            return self.pool.readiness()
+        return self.registry.peek(model_name).readiness()
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        return (self.pool or self.model).wait_until_ready(timeout)
+    
+    def compare_backends(self, sample_texts: List[str], backends: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Label agreement and latency of each backend against PyTorch fp32 on a sample corpus"""
+        from models.backend_check import compare_backends
+        return compare_backends(sample_texts, backends=backends, onnx_path=self.model_kwargs['onnx_path'],
+                                model_name=self.model_kwargs['model_name'],
+                                label_map=self.model_kwargs['label_map'])
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and sizes of the result cache"""
+        return self.cache.get_stats() if self.cache else {}
+    
+    def invalidate_cache(self, model_name: Optional[str] = None):
+        """Drop cached results for a model (default model if omitted)"""
+        if self.cache:
+            self.cache.invalidate(self.registry.peek(model_name or self.default_model).model_id)
+    
+    def get_batch_stats(self) -> Dict[str, Any]:
+        """Per-bucket padding ratio, tokens/sec and dedup ratio of the last analyze_batch call"""
+        stats = self._last_runner.last_report.summary()
+        stats['dedup'] = self.last_dedup
+        return stats
+    
+    def _extract_aspects_simple(self, text: str) -> List[str]:
+        """Extrae aspectos simples (misma regla que core.text_features para un solo texto)"""
+        from core.text_features import extract_aspects
+        return extract_aspects(text.lower()) if isinstance(text, str) else []
\ No newline at end of file
@@ -1,21 +1,22 @@
 ﻿# src/services/topic_service.py - SOLO COORDINACIÓN
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
 class TopicService:
     """Servicio de temas - SOLO coordina, CERO LOGICA de negocio"""
     
-    def __init__(self):
+    def __init__(self, workers: int = 1, use_processes: bool = False):
         # ✅ DELEGA toda la LOGICA de negocio al core
-        self.multi_language_extractor = self._initialize_extractor()
+        # workers > 1: extraccion por shards en paralelo (mismo resultado que en serie)
+        self.multi_language_extractor = self._initialize_extractor(workers, use_processes)
     
-    def _initialize_extractor(self):
+    def _initialize_extractor(self, workers: int = 1, use_processes: bool = False):
         """Inicializar el extractor multiidioma - SOLO COORDINACIÓN"""
         try:
             from core.topic_extraction.multi_language import MultiLanguageTopicExtractor
-            return MultiLanguageTopicExtractor()
+            return MultiLanguageTopicExtractor(workers=workers, use_processes=use_processes)
         except ImportError as e:
             logger.warning(f"MultiLanguage extractor not available: {e}")
             return None
@@ -43,11 +44,30 @@ class TopicService:
             logger.error(f"Error in topic extraction coordination: {e}")
             return []
     
+    def update_topics_from_legacy(self, legacy_results: List[Dict[str, Any]]):
+        """Sumar un lote de un feed continuo al estado incremental de temas"""
+        if not self.multi_language_extractor:
+            logger.warning("Topic extractor not available")
+            return
+        try:
+            self.multi_language_extractor.update(self._convert_to_domain_entities(legacy_results))
+        except Exception as e:
+            logger.error(f"Error updating incremental topics: {e}")
+
+    def topics_snapshot(self) -> List[Dict[str, Any]]:
+        """Temas acumulados por update_topics_from_legacy, en formato legacy"""
+        if not self.multi_language_extractor:
+            return []
+        return self._convert_to_legacy_format(self.multi_language_extractor.snapshot())
+
     def _convert_to_domain_entities(self, legacy_results: List[Dict[str, Any]]) -> List[Any]:
         """Convertir resultados legacy a entidades de dominio - RESPONSABILIDAD DEL SERVICIO"""
         try:
             from domain.entities import AnalyzedText
-            return [AnalyzedText.from_legacy(result) for result in legacy_results]
+            if getattr(legacy_results, 'features', None) is not None:
+                # ResultBatch con TextFeatures: idioma y claves ya calculados
+                return AnalyzedText.from_result_batch(legacy_results)
+            return AnalyzedText.from_legacy_batch(legacy_results)
         except ImportError as e:
             logger.error(f"Error importing domain entities: {e}")
             return []
@@ -61,4 +81,27 @@ class TopicService:
                 # Fallback si no tiene el método
                 return []
         except (IndexError, AttributeError):
-            return []
\ No newline at end of file
+            return []
+    
+    def build_index(self, results):
+        """Indice invertido para explorar todas las reseñas de un tema (no solo los ejemplos)"""
+        try:
+            from core.inverted_index import InvertedIndex
+            from domain.result_batch import ResultBatch
+            batch = results if isinstance(results, ResultBatch) else ResultBatch.from_results(results)
+            return InvertedIndex.from_result_batch(batch)
+        except ImportError as e:
+            logger.warning(f"Inverted index not available: {e}")
+            return None
+
+    def drill_down(self, results, index, terms: Optional[str] = None, category: Optional[str] = None,
+                   min_stars: Optional[int] = None, max_stars: Optional[int] = None,
+                   language: Optional[str] = None, page: int = 0, page_size: int = 20) -> Dict[str, Any]:
+        """Pagina de resultados legacy que cumplen los filtros (category = valor de BusinessCategory)"""
+        from domain.entities import BusinessCategory
+        found = index.search(terms, category=BusinessCategory(category) if category else None,
+                             min_stars=min_stars, max_stars=max_stars, language=language,
+                             page=page, page_size=page_size)
+        found['results'] = [results[int(position)] for position in found.pop('documents')]
+        found['row_ids'] = found['row_ids'].tolist()
+        return found
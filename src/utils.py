@@ -4,6 +4,21 @@ import logging
 import pandas as pd
 import os
 
+CSV = 'csv'
+EXCEL = 'excel'
+PARQUET = 'parquet'
+FEATHER = 'feather'
+
+_EXTENSIONS = {
+    '.csv': CSV,
+    '.xlsx': EXCEL,
+    '.xls': EXCEL,
+    '.parquet': PARQUET,
+    '.pq': PARQUET,
+    '.feather': FEATHER,
+    '.arrow': FEATHER,
+}
+
 def setup_logging():
     """Configura el sistema de logging"""
     logging.basicConfig(
@@ -15,16 +30,94 @@ def setup_logging():
         ]
     )
 
-def load_reviews_data(file_path):
-    """Carga datos de reviews desde un archivo CSV"""
+def data_format(source):
+    """Formato del archivo segun su extension (acepta rutas o archivos subidos con .name)"""
+    name = source if isinstance(source, str) else getattr(source, 'name', '')
+    extension = os.path.splitext(name)[1].lower()
+    if extension not in _EXTENSIONS:
+        raise ValueError(f"Formato no soportado: {extension or name}")
+    return _EXTENSIONS[extension]
+
+def read_columns(source):
+    """Nombres de columnas sin leer los datos (en Parquet/Feather solo se lee el esquema)"""
+    file_format = data_format(source)
+    if file_format == PARQUET:
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(source).names)
+    if file_format == FEATHER:
+        import pyarrow as pa
+        return list(pa.ipc.open_file(pa.memory_map(source) if isinstance(source, str) else source).schema.names)
+    if file_format == EXCEL:
+        return list(pd.read_excel(source, nrows=0).columns)
+    return list(pd.read_csv(source, nrows=0).columns)
+
+def load_reviews_data(source, columns=None, memory_map=True):
+    """Carga datos de reviews desde CSV, Excel, Parquet o Feather
+
+    columns: leer solo esas columnas (en Parquet/Feather las demas ni se leen del disco).
+    memory_map: mapear Parquet/Feather en memoria en lugar de copiarlos (solo rutas locales).
+    """
     try:
-        df = pd.read_csv(file_path)
+        file_format = data_format(source)
+        memory_map = memory_map and isinstance(source, str)
+        if file_format == PARQUET:
+            df = pd.read_parquet(source, columns=columns, memory_map=memory_map)
+        elif file_format == FEATHER:
+            import pyarrow.feather as feather
+            df = feather.read_table(source, columns=columns, memory_map=memory_map).to_pandas()
+        elif file_format == EXCEL:
+            df = pd.read_excel(source, usecols=columns)
+        else:
+            df = pd.read_csv(source, usecols=columns)
         logging.info(f"✅ Datos cargados: {len(df)} reviews")
         return df
     except Exception as e:
         logging.error(f"❌ Error cargando datos: {e}")
         return None
 
+def iter_reviews_chunks(source, columns=None, chunksize=10000):
+    """Leer por bloques de filas; el indice continua entre bloques (numero de fila global)"""
+    file_format = data_format(source)
+    if file_format == CSV:
+        yield from pd.read_csv(source, usecols=columns, chunksize=chunksize)
+        return
+
+    if file_format == PARQUET:
+        import pyarrow.parquet as pq
+        batches = (batch.to_pandas() for batch in
+                   pq.ParquetFile(source, memory_map=isinstance(source, str)).iter_batches(batch_size=chunksize,
+                                                                                             columns=columns))
+    else:
+        # Feather/Excel: lectura completa (Feather mapeado en memoria) y cortes sin copia
+        df = load_reviews_data(source, columns=columns)
+        if df is None:
+            raise ValueError(f"No se pudo leer {source}")
+        batches = (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+
+    start = 0
+    for chunk in batches:
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+def save_results(batch, path, languages=None, file_format=None):
+    """Guardar un ResultBatch como Parquet o Feather con columnas tipadas de Arrow
+
+    path puede ser un buffer (p.ej. BytesIO) si se indica file_format.
+    """
+    file_format = file_format or data_format(path)
+    table = batch.to_arrow(languages)
+    if file_format == PARQUET:
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    elif file_format == FEATHER:
+        import pyarrow.feather as feather
+        feather.write_feather(table, path)
+    else:
+        raise ValueError("Los resultados se guardan en .parquet o .feather")
+    logging.info(f"✅ Resultados guardados: {len(batch)} filas")
+    return path
+
 def ensure_directory(path):
     """Asegura que un directorio existe"""
     os.makedirs(path, exist_ok=True)
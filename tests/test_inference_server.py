@@ -0,0 +1,185 @@
+"""Servidor HTTP de inferencia con micro-batching sobre un BERTModel con backend stub (sin pesos reales)"""
+
+import asyncio
+import http.client
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from models.backends import InferenceBackend
+from models.bert_model import BERTModel
+from services.inference_server import InferenceServer
+
+STAR_LABELS = {0: '1 star', 1: '2 stars', 2: '3 stars', 3: '4 stars', 4: '5 stars'}
+GOOD, BAD, OTHER = 1, 2, 3
+
+class StubTokenizer:
+    """Una id por palabra: good / bad / cualquier otra"""
+
+    def __call__(self, texts, truncation=True, max_length=512):
+        ids = [[GOOD if word == 'good' else BAD if word == 'bad' else OTHER for word in text.split()][:max_length] or [OTHER]
+               for text in texts]
+        return {'input_ids': ids}
+
+    def pad(self, features, padding=True, return_tensors='np'):
+        width = max(len(ids) for ids in features['input_ids'])
+        input_ids = np.array([ids + [0] * (width - len(ids)) for ids in features['input_ids']])
+        return {'input_ids': input_ids, 'attention_mask': (input_ids > 0).astype(np.int64)}
+
+class StubBackend(InferenceBackend):
+    """Logits deterministicos: 5 estrellas si hay mas 'good' que 'bad', 1 estrella si hay menos, si no 3"""
+
+    name = 'stub'
+
+    def __init__(self, fail_load: bool = False):
+        super().__init__()
+        self.fail_load = fail_load
+        self.batch_sizes = []
+        self._lock = threading.Lock()
+
+    def load(self, model_name: str):
+        if self.fail_load:
+            raise RuntimeError("stub weights missing")
+        self.id2label = dict(STAR_LABELS)
+        self.version = 'stub-1'
+
+    def forward(self, features):
+        input_ids = features['input_ids']
+        with self._lock:
+            self.batch_sizes.append(len(input_ids))
+        balance = (input_ids == GOOD).sum(axis=1) - (input_ids == BAD).sum(axis=1)
+        stars = np.where(balance > 0, 4, np.where(balance < 0, 0, 2))
+        logits = np.zeros((len(input_ids), len(STAR_LABELS)))
+        logits[np.arange(len(input_ids)), stars] = 5.0
+        return logits
+
+class StubBERTModel(BERTModel):
+    """BERTModel real (scheduler, padding, softmax) con tokenizer y backend stub"""
+
+    def __init__(self, backend: StubBackend, **kwargs):
+        self.stub_backend = backend
+        super().__init__(lazy=True, **kwargs)
+
+    def _load_model(self):
+        self.tokenizer = StubTokenizer()
+        self.stub_backend.load(self.model_name)
+        self.model_version = self.stub_backend.version
+        return self.stub_backend
+
+def expected_label(text: str) -> str:
+    balance = text.split().count('good') - text.split().count('bad')
+    return '5 stars' if balance > 0 else '1 star' if balance < 0 else '3 stars'
+
+class RunningServer:
+    """InferenceServer en un event loop propio (hilo aparte) con un cliente HTTP sencillo"""
+
+    def __init__(self, service, max_batch_size: int, max_wait_ms: float):
+        self.server = InferenceServer(service, port=0, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start(), self.loop).result(timeout=10)
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result(timeout=10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=10)
+        self.loop.close()
+
+    def request(self, method: str, path: str, body=None, raw: bytes = None):
+        connection = http.client.HTTPConnection(self.server.host, self.server.port, timeout=10)
+        try:
+            payload = raw if raw is not None else (json.dumps(body).encode('utf-8') if body is not None else None)
+            connection.request(method, path, body=payload, headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            connection.close()
+
+@pytest.fixture
+def backend():
+    return StubBackend()
+
+@pytest.fixture
+def running(backend):
+    # Espera larga: las peticiones concurrentes llegan dentro de la misma ventana
+    server = RunningServer(StubBERTModel(backend), max_batch_size=4, max_wait_ms=200)
+    server.start()
+    yield server
+    server.stop()
+
+def test_concurrent_single_requests_are_micro_batched(running, backend):
+    texts = [f"review {i} " + ('good' if i % 2 else 'bad') for i in range(8)]
+
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        responses = list(pool.map(lambda text: running.request('POST', '/analyze', {'text': text}), texts))
+
+    # Cada cliente recibe el resultado de su propio texto
+    for text, (status, payload) in zip(texts, responses):
+        assert status == 200
+        assert payload['result']['text'] == text
+        assert payload['result']['sentiment'] == expected_label(text)
+        assert payload['result']['success'] is True
+
+    status, stats = running.request('GET', '/stats')
+    assert status == 200
+    assert stats['requests'] == len(texts)
+    histogram = {int(size): count for size, count in stats['batch_size_histogram'].items()}
+    assert sum(size * count for size, count in histogram.items()) == len(texts)
+    assert max(histogram) <= 4
+    assert stats['batches'] < len(texts)
+    assert stats['queue_depth'] == 0
+    assert max(backend.batch_sizes) > 1
+
+def test_batch_request_keeps_input_order(running):
+    texts = ["good good", "bad", "plain text", "good bad bad", "good"]
+
+    status, payload = running.request('POST', '/analyze', {'texts': texts})
+
+    assert status == 200
+    assert [result['text'] for result in payload['results']] == texts
+    assert [result['sentiment'] for result in payload['results']] == [expected_label(text) for text in texts]
+
+def test_invalid_items_fail_alone(running):
+    status, payload = running.request('POST', '/analyze', {'texts': ["good", None, "bad"]})
+
+    assert status == 200
+    assert [result['success'] for result in payload['results']] == [True, False, True]
+    assert payload['results'][1]['error'] == "BERT input must be a string"
+
+@pytest.mark.parametrize('method, path, body, raw, expected', [
+    ('POST', '/analyze', None, b'{not json', 400),
+    ('POST', '/analyze', ["good"], None, 400),
+    ('POST', '/analyze', {'texts': "good"}, None, 400),
+    ('POST', '/analyze', {'other': "good"}, None, 400),
+    ('GET', '/analyze', None, None, 405),
+    ('GET', '/missing', None, None, 404),
+])
+def test_error_responses(running, method, path, body, raw, expected):
+    status, payload = running.request(method, path, body, raw)
+
+    assert status == expected
+    assert 'error' in payload
+
+def test_model_failure_returns_500():
+    server = RunningServer(StubBERTModel(StubBackend(fail_load=True)), max_batch_size=4, max_wait_ms=5)
+    server.start()
+    try:
+        status, payload = server.request('POST', '/analyze', {'text': "good"})
+        assert status == 500
+        assert 'stub weights missing' in payload['error']
+
+        status, payload = server.request('POST', '/analyze', {'texts': ["good"]})
+        assert status == 500
+
+        # El batcher sigue vivo despues de un lote fallido
+        status, stats = server.request('GET', '/stats')
+        assert status == 200
+        assert stats['batches'] == 1
+    finally:
+        server.stop()